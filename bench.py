@@ -0,0 +1,209 @@
+# bench.py
+#
+# Benchmarks of the hot paths: solving the model, fitting growth rates,
+# parsing entered data and building and drawing figures, at several sizes.
+#
+#   python bench.py --save-baseline          # store bench_baseline.json
+#   python bench.py                          # compare, exit 1 on regressions
+#   python bench.py --output results.json --only fit
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+import cache
+import community
+import downsample
+import estimation
+import importer
+import model
+import plotter
+import spatial
+import strains
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, 'bench_baseline.json')
+
+def growth_data(n):
+    """Returns n time points and noisy exponential growth data for fitting."""
+    rng = np.random.default_rng(n)
+    t = np.linspace(0, 7, n)
+    return t, 0.002 * np.exp(0.957 * t) * (1 + 0.05 * rng.standard_normal(n))
+
+def ensemble_params(n):
+    """Returns n random parameter sets for model.Ensemble."""
+    rng = np.random.default_rng(n)
+    return (rng.uniform(0.3, 1.0, n), rng.uniform(0.001, 0.01, n), rng.uniform(1, 2, n),
+            rng.choice([0.0, 1.0, 2.0], n), rng.uniform(0, 2, n))
+
+def draw(figure):
+    """Draws a figure with the Agg renderer that FigureCanvasTkAgg uses."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    FigureCanvasAgg(figure).draw()
+
+def cases():
+    """
+    Lists the benchmarks as (group, name, size, function), where function
+    takes no arguments and runs the benchmarked code once. Solves and fits
+    bypass cache.results so every call does the work.
+    """
+    m = model.Model(0.957, 0.002, 1.75, 1, 0.5)
+    m_analytic = model.Model(0.957, 0.002, 1.75, 1, 0.5, solver='analytic')
+    yield 'solve', 'Model.solve numeric', 1, m.integrate
+    yield 'solve', 'Model.solve analytic', 1, m_analytic.integrate
+    yield 'solve', 'Model.solve cached', 1, m.solve
+    for n in (100, 1000, 10000):
+        params = ensemble_params(n)
+        yield 'solve', 'Ensemble numeric', n, lambda params=params: model.Ensemble(*params)
+        yield 'solve', 'Ensemble analytic', n, lambda params=params: model.Ensemble(*params, solver='analytic')
+    for n in (2, 10, 60):
+        rng = np.random.default_rng(n)
+        params = (10 ** rng.uniform(-2, 2, n), 0.002, rng.uniform(1, 2, n), rng.choice([0.0, 1.0, 4.0], n),
+                  1.0, rng.uniform(0, 1.5, (n, n)))
+        yield 'solve', 'Community BDF', n, lambda params=params: community.Community(*params, horizon=72)
+    for cells in (100, 1000):
+        yield 'solve', 'DepthModel', cells, lambda cells=cells: spatial.DepthModel(0.957, 1.0, 1.75, 1, 2, cells=cells, binding=500)
+
+    for n in (8, 100, 10000):
+        p = plotter.Plotter(*growth_data(n))
+        yield 'fit', 'Plotter.fit', n, p.compute_fit
+    for wells in (96, 384):
+        t, y = growth_data(100)
+        plate = y * np.random.default_rng(wells).uniform(0.5, 2, (wells, 1))
+        yield 'fit', 'fit_growth_rates', wells, lambda t=t, plate=plate: plotter.fit_growth_rates(t, plate)
+    t = np.linspace(0, 24, 25)
+    curve = model.logistic_solution(t, 0.957, 0.002, 1.75, 0, 0) * (1 + 0.02 * np.random.default_rng(25).standard_normal(25))
+    for starts in (1, 8):
+        yield 'fit', 'fit_biofilm starts', starts, lambda starts=starts: estimation.fit_biofilm(t, curve, starts=starts)
+
+    for n in (10, 1000, 100000):
+        text = '\n'.join(f"{value:.4f}," for value in growth_data(n)[1])
+        yield 'parse', 'parse_values', n, lambda text=text: importer.parse_values(text)
+
+    for n in (100, 10000):
+        t, y = growth_data(25)
+        wells = [(f"plate{i // 96:03d} well{i % 96:02d}", 0.5, t, y) for i in range(n)]
+        registry = strains.StrainRegistry()
+        registry.extend(wells)
+        yield 'strains', 'StrainRegistry.extend', n, lambda wells=wells: strains.StrainRegistry().extend(wells)
+        yield 'strains', 'StrainRegistry.search', n, lambda registry=registry: registry.search('plate00', 40, 12)
+
+    yield 'render', 'Model.figure', m.t.size, m.figure
+    yield 'render', 'Model.figure + draw', m.t.size, lambda: draw(m.figure())
+    for n in (8, 1000, 100000):
+        p = plotter.Plotter(*growth_data(n))
+        yield 'render', 'Plotter.figure', n, p.figure
+        yield 'render', 'Plotter.figure + draw', n, lambda p=p: draw(p.figure())
+    for n in (10000, 1000000):
+        t = np.linspace(0, 24 * 28, n)
+        y = model.logistic_solution(t, 0.957, 0.002, 1.75, 0.0, 0.0)
+        yield 'render', 'lttb', n, lambda t=t, y=y: downsample.lttb(t, y)
+
+def measure(function, min_time=0.2, repeats=5):
+    """
+    Times a function like timeit: calls it in loops long enough to take
+    about min_time / repeats seconds, repeats times.
+
+    Returns
+    -------
+        dict : best and median seconds per call, and the number of calls per loop
+    """
+    function()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeats or loops >= 1 << 20:
+            break
+        loops *= 10 if elapsed < min_time / repeats / 10 else 2
+    times = [elapsed / loops]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        times.append((time.perf_counter() - start) / loops)
+    return {'best' : min(times), 'median' : float(np.median(times)), 'loops' : loops}
+
+def run(groups=None, min_time=0.2):
+    """
+    Runs the benchmarks, optionally only the given groups.
+
+    Returns
+    -------
+        dict : machine description and the timings of every benchmark, keyed 'name[size]'
+    """
+    results = {}
+    for group, name, size, function in cases():
+        if groups and group not in groups:
+            continue
+        timing = measure(function, min_time)
+        results[f"{name}[{size}]"] = {'group' : group, 'size' : size, **timing}
+        print(f"{group:7} {name + f'[{size}]':36} {timing['median'] * 1e6:12.1f} us", file=sys.stderr)
+    cache.results.clear()
+    return {
+        'machine' : {
+            'python' : platform.python_version(),
+            'numpy' : np.__version__,
+            'platform' : platform.platform(),
+            'time' : time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'results' : results
+    }
+
+def compare(current, baseline, tolerance):
+    """
+    Compares the median timings with a baseline.
+
+    Returns
+    -------
+        list : (name, baseline seconds, current seconds) of every benchmark
+        that got slower by more than the tolerance
+    """
+    regressions = []
+    for name, timing in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is not None and timing['median'] > before['median'] * (1 + tolerance):
+            regressions.append((name, before['median'], timing['median']))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the biofilm model hot paths.")
+    parser.add_argument('--only', action='append', choices=['solve', 'fit', 'parse', 'strains', 'render'],
+                        help="run only this group, can be repeated")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--baseline', default=BASELINE, help="baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="store the results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown relative to the baseline, default 0.25")
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds per benchmark")
+    args = parser.parse_args(argv)
+
+    current = run(args.only, args.min_time)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(current, file, indent=1)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(current, file, indent=1)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline first.", file=sys.stderr)
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    regressions = compare(current, baseline, args.tolerance)
+    for name, before, after in regressions:
+        print(f"REGRESSION {name}: {before * 1e6:.1f} us -> {after * 1e6:.1f} us "
+              f"({after / before:.2f}x)", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
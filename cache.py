@@ -0,0 +1,144 @@
+# cache.py
+
+from collections import OrderedDict
+import hashlib
+import sys
+import threading
+
+import numpy as np
+
+class ResultCache:
+    """
+    A least recently used cache for the results of Model solves and Plotter
+    fits, bounded by the memory used by the cached values.
+
+    Attributes
+    ----------
+    max_bytes : int
+        memory budget for the cached values, 0 disables the cache
+    nbytes : int
+        memory currently used by the cached values
+    hits : int
+        number of lookups that found a cached value
+    misses : int
+        number of lookups that had to compute the value
+    evictions : int
+        number of values dropped to stay within the memory budget
+
+    Methods
+    -------
+    fetch():
+        returns the cached value for a key, computing and storing it on a miss
+    stats():
+        returns the counters of the cache
+    clear():
+        removes every cached value
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        Constructs all the necessary attributes for the ResultCache object.
+
+        Parameters
+        ----------
+            max_bytes : int
+                memory budget for the cached values, in bytes
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def fetch(self, key, compute):
+        """
+        Returns the value cached for key. On a miss the value is computed by
+        calling compute() and stored. Cached arrays, also inside a tuple, are
+        made read-only so a caller cannot change the value seen by later callers.
+
+        Parameters
+        ----------
+            key : tuple
+                hashable description of the inputs of the computation
+            compute : callable
+                takes no arguments and returns the value for key
+
+        Returns
+        -------
+            value for key
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        value = compute()
+        size = 0
+        for part in (value if isinstance(value, tuple) else (value,)):
+            if isinstance(part, np.ndarray):
+                part.flags.writeable = False
+                size += part.nbytes
+            else:
+                size += sys.getsizeof(part)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, dropped) = self._entries.popitem(last=False)
+                self.nbytes -= dropped
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        """
+        Returns the counters of the cache.
+
+        Returns
+        -------
+            dict : hits, misses, evictions, number of entries and memory used
+        """
+        with self._lock:
+            return {
+                'hits' : self.hits,
+                'misses' : self.misses,
+                'evictions' : self.evictions,
+                'entries' : len(self._entries),
+                'nbytes' : self.nbytes
+            }
+
+    def clear(self):
+        """Removes every cached value and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = self.hits = self.misses = self.evictions = 0
+
+def array_key(*arrays):
+    """
+    Hashes the values, shapes and types of arrays into a short key, so large
+    inputs such as fitted data can be part of a cache key.
+
+    Returns
+    -------
+        bytes : digest of the arrays
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array, dtype=float)
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.digest()
+
+# cache shared by every Model and Plotter, in the GUI and in scripts
+results = ResultCache()
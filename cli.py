@@ -0,0 +1,183 @@
+# cli.py
+#
+# Runs biofilm simulations, growth rate fits and dose response sweeps
+# without a display. Never imports tkinter or matplotlib.
+#
+#   python cli.py simulate jobs.csv -o curves.npz
+#   python cli.py fit plate.csv -o rates.csv
+#   python cli.py fit-biofilm biofilm.csv -o params.csv
+#   python cli.py sweep sweep.json -o sweep.npz
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import estimation
+import importer
+import model
+import plotter
+import sweep
+
+# columns of a simulation job file, None for columns that must be given,
+# the other defaults are the defaults of the GUI
+JOB_COLUMNS = {
+    'growth_rate' : None,
+    'initial' : 0.002,
+    'max' : 1.75,
+    'mic' : 0.0,
+    'conc' : 0.0
+}
+
+def read_jobs(path):
+    """
+    Reads a CSV file of biofilm simulations with a header row naming the
+    columns of JOB_COLUMNS and an optional name column.
+
+    Returns
+    -------
+        names : array
+            name of every job, its row number if there is no name column
+        params : dict
+            array of every column of JOB_COLUMNS
+    """
+    with open(path, newline='', encoding='utf-8-sig') as file:
+        header = [name.strip().lower() for name in next(csv.reader(file))]
+    missing = [name for name, default in JOB_COLUMNS.items() if default is None and name not in header]
+    if missing:
+        raise ValueError(f"{path} is missing the columns {', '.join(missing)}.")
+
+    usecols = [header.index(name) for name in JOB_COLUMNS if name in header]
+    values = np.loadtxt(path, delimiter=',', skiprows=1, usecols=usecols, ndmin=2, encoding='utf-8-sig')
+    columns = iter(values.T)
+    params = {name : next(columns) if name in header else np.full(len(values), default)
+              for name, default in JOB_COLUMNS.items()}
+    if 'name' in header:
+        names = np.loadtxt(path, delimiter=',', skiprows=1, usecols=[header.index('name')],
+                           dtype=str, ndmin=1, encoding='utf-8-sig')
+    else:
+        names = np.arange(1, len(values) + 1).astype(str)
+    return names, params
+
+def write_table(path, header, names, columns):
+    """
+    Writes a table with one row per name, as CSV or as arrays in an NPZ
+    file, depending on the extension of path.
+    """
+    columns = [np.asarray(column) for column in columns]
+    if os.path.splitext(path)[1].lower() == '.npz':
+        np.savez_compressed(path, **{'name' : np.asarray(names)},
+                            **{name : column for name, column in zip(header[1:], columns)})
+        return
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(zip(names, *(column.tolist() for column in columns)))
+
+def simulate(args):
+    """Solves the biofilm model for every job of a job file."""
+    names, params = read_jobs(args.input)
+    ensemble = model.Ensemble(params['growth_rate'], params['initial'], params['max'],
+                              params['mic'], params['conc'], solver=args.solver,
+                              horizon=args.horizon, resolution=args.resolution)
+    if os.path.splitext(args.output)[1].lower() == '.npz':
+        np.savez_compressed(args.output, name=names, t=ensemble.t, y=ensemble.y, **params)
+    else:
+        header = ['name'] + list(JOB_COLUMNS) + [f't={t:g}' for t in ensemble.t]
+        write_table(args.output, header, names, list(params.values()) + list(ensemble.y.T))
+    return len(names)
+
+def fit(args):
+    """Fits the growth rate of every well of a plate reader export."""
+    t, wells, data = importer.read_plate(args.input, time_unit=args.time_unit)
+    fits = plotter.fit_growth_rates(t, data)
+    header = ['well'] + list(fits)
+    write_table(args.output, header, wells, fits.values())
+    return len(wells)
+
+def fit_biofilm(args):
+    """Fits k_b, B_0 and B_max to the biofilm curve of every well of a plate reader export."""
+    t, wells, data = importer.read_plate(args.input, time_unit=args.time_unit)
+    fits = estimation.fit_plate(t, data, args.mic, args.conc, args.starts, max_workers=args.workers)
+    header = ['well'] + list(fits)
+    write_table(args.output, header, wells, fits.values())
+    return len(wells)
+
+def run_sweep(args):
+    """Runs a dose response sweep described by a JSON file."""
+    with open(args.input) as file:
+        config = json.load(file)
+    concs = np.linspace(0, config['max_conc'], config.get('points', 200))
+    mics = np.linspace(0, config['max_mic'], config.get('points', 200))
+    s = sweep.Sweep(config['growth_rates'], concs, mics, config.get('initial', 0.002),
+                    config.get('max', 1.75))
+    for _ in s.run(max_workers=args.workers):
+        pass
+
+    if os.path.splitext(args.output)[1].lower() == '.npz':
+        arrays = {f"{bacteria}/{metric}" : values
+                  for bacteria, metrics in s.results.items() for metric, values in metrics.items()}
+        np.savez_compressed(args.output, conc=concs, mic=mics, **arrays)
+    else:
+        # long format, one row per bacteria, concentration and MIC
+        conc_grid, mic_grid = np.meshgrid(concs, mics, indexing='ij')
+        names = np.repeat(list(s.results), concs.size * mics.size)
+        columns = [np.tile(conc_grid.ravel(), len(s.results)), np.tile(mic_grid.ravel(), len(s.results))]
+        columns += [np.concatenate([s.results[bacteria][metric].ravel() for bacteria in s.results])
+                    for metric in sweep.METRICS]
+        write_table(args.output, ['bacteria', 'conc', 'mic'] + list(sweep.METRICS), names, columns)
+    return len(s.results) * concs.size * mics.size
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless biofilm model runs.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('simulate', help="solve the biofilm model for a CSV file of jobs")
+    command.add_argument('input', help="CSV with columns " + ", ".join(JOB_COLUMNS) + " and optionally name")
+    command.add_argument('--solver', choices=model.SOLVERS, default='analytic')
+    command.add_argument('--horizon', type=float, default=24, help="hours simulated, default 24")
+    command.add_argument('--resolution', type=float, default=1,
+                         help="hours between output time points, default 1, e.g. 0.0166667 for minutes")
+    command.set_defaults(run=simulate, unit='trajectories')
+
+    command = commands.add_parser('fit', help="fit growth rates to a plate reader export")
+    command.add_argument('input', help="CSV or TSV with a time column and one column per well")
+    command.add_argument('--time-unit', choices=list(importer.TIME_UNITS), default='h')
+    command.set_defaults(run=fit, unit='wells')
+
+    command = commands.add_parser('fit-biofilm', help="fit k_b, B_0 and B_max to biofilm curves of a plate")
+    command.add_argument('input', help="CSV or TSV with a time column and one column of biofilm OD per well")
+    command.add_argument('--time-unit', choices=list(importer.TIME_UNITS), default='h')
+    command.add_argument('--mic', type=float, default=0.0, help="antibiotic MIC of the wells, in µg/ml")
+    command.add_argument('--conc', type=float, default=0.0, help="antibiotic concentration of the wells, in µg/ml")
+    command.add_argument('--starts', type=int, default=8, help="starting points per well, default 8")
+    command.add_argument('--workers', type=int, default=None, help="number of processes")
+    command.set_defaults(run=fit_biofilm, unit='wells')
+
+    command = commands.add_parser('sweep', help="run a dose response sweep from a JSON config")
+    command.add_argument('input', help="JSON with growth_rates, max_conc, max_mic and optionally "
+                                       "points, initial and max")
+    command.add_argument('--workers', type=int, default=None, help="number of processes")
+    command.set_defaults(run=run_sweep, unit='grid points')
+
+    for command in commands.choices.values():
+        command.add_argument('-o', '--output', required=True, help="output file, .csv or .npz")
+
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    try:
+        count = args.run(args)
+    except (OSError, ValueError, KeyError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"{count} {args.unit} in {elapsed:.3f} s ({count / max(elapsed, 1e-9):.0f} per second)",
+          file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
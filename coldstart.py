@@ -0,0 +1,77 @@
+# coldstart.py
+#
+# Measures how long gui.py takes to start in fresh interpreters, and fails
+# when a step goes over its budget.
+#
+#   python coldstart.py [--runs 5] [--record coldstart.jsonl] [--budget first_paint=800]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# budgets for the median timings, in milliseconds from the start of gui.py
+BUDGETS = {
+    'imports' : 500,
+    'first_paint' : 1000,
+    'first_plot' : 2000
+}
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def measure(runs):
+    """
+    Starts gui.py with --startup runs times, each in a new interpreter.
+
+    Returns
+    -------
+        list : timings of every run, in milliseconds, including the wall
+        time of the whole process as 'process'
+    """
+    results = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, os.path.join(HERE, 'gui.py'), '--startup'],
+                                capture_output=True, text=True, check=True, cwd=HERE).stdout
+        timings = json.loads(output.strip().splitlines()[-1])
+        timings['process'] = round((time.perf_counter() - start) * 1000, 1)
+        results.append(timings)
+    return results
+
+def median(results, name):
+    values = sorted(result[name] for result in results if name in result)
+    return values[len(values) // 2] if values else None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start timings of the biofilm GUI.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--record', help="append the median timings to this JSON lines file")
+    parser.add_argument('--budget', action='append', default=[], metavar='STEP=MS',
+                        help="override the budget of a step, e.g. first_paint=800")
+    args = parser.parse_args(argv)
+
+    budgets = dict(BUDGETS)
+    for budget in args.budget:
+        step, ms = budget.split('=')
+        budgets[step] = float(ms)
+
+    results = measure(args.runs)
+    medians = {name : median(results, name) for name in results[0]}
+    failed = False
+    for name, value in medians.items():
+        budget = budgets.get(name)
+        over = budget is not None and value > budget
+        failed |= over
+        limit = f" (budget {budget:g} ms{', OVER' if over else ''})" if budget is not None else ""
+        print(f"{name:12} {value:8.1f} ms{limit}")
+
+    if args.record:
+        with open(args.record, 'a') as file:
+            file.write(json.dumps({'time' : time.strftime('%Y-%m-%dT%H:%M:%S'), 'runs' : args.runs,
+                                   **medians}) + '\n')
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,443 @@
+# dosing.py
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import math
+
+import numpy as np
+
+import model
+
+METRICS = {
+    'final' : 'Biofilm at the end (OD)',
+    'lowest' : 'Lowest biofilm (OD)',
+    'auc' : 'Area under curve (OD hours)',
+    'dose' : 'Total antibiotic (µg/ml)'
+}
+
+class Schedule:
+    """
+    A class describing how antibiotic is given over time: bolus doses that
+    raise the concentration at once, infusions that add antibiotic at a
+    constant rate, and first-order decay of the antibiotic in between.
+
+    Attributes
+    ----------
+    doses : list
+        (time in hours, concentration added in micrograms per ml) of every bolus dose
+    infusions : list
+        (start, stop in hours, rate in micrograms per ml per hour) of every infusion
+    half_life : float
+        half-life of the antibiotic in hours, None if it does not decay
+    name : str
+        name of the schedule, e.g. for legends
+
+    Methods
+    -------
+    repeated():
+        creates a schedule of equal doses at a fixed interval
+    breakpoints():
+        returns the times at which the dosing changes
+    """
+
+    def __init__(self, doses=(), infusions=(), half_life=None, name=''):
+        """
+        Constructs all the necessary attributes for the Schedule object.
+
+        Parameters
+        ----------
+            doses : list
+                (time, concentration) of every bolus dose, in hours and micrograms per ml
+            infusions : list
+                (start, stop, rate) of every infusion, in hours and micrograms per ml per hour
+            half_life : float
+                half-life of the antibiotic in hours, None or 0 if it does not decay
+            name : str
+                name of the schedule
+        """
+        self.doses = sorted((float(time), float(amount)) for time, amount in doses)
+        self.infusions = sorted((float(start), float(stop), float(rate)) for start, stop, rate in infusions)
+        if any(time < 0 for time, _ in self.doses) or any(stop < start for start, stop, _ in self.infusions):
+            raise ValueError("Doses must be given at times >= 0 and infusions must stop after they start.")
+        self.half_life = half_life or None
+        self.name = name
+
+    @classmethod
+    def repeated(cls, amount, interval, horizon, half_life=None, infusion=0, start=0, name=None):
+        """
+        Creates a schedule of equal doses every interval hours from start up
+        to the horizon, given as bolus doses or as infusions.
+
+        Parameters
+        ----------
+            amount : float
+                concentration added by every dose, in micrograms per ml
+            interval : float
+                hours between the starts of the doses
+            horizon : float
+                hours covered by the schedule
+            half_life : float
+                half-life of the antibiotic in hours, None if it does not decay
+            infusion : float
+                hours every dose is infused over, 0 for bolus doses
+            start : float
+                time of the first dose in hours
+            name : str
+                name of the schedule, by default it describes the doses
+
+        Returns
+        -------
+            Schedule : the dosing schedule
+        """
+        if not interval > 0:
+            raise ValueError(f"The dosing interval must be positive, got {interval}.")
+        times = np.arange(start, horizon, interval)
+        if name is None:
+            name = f"{amount:g} µg/ml every {interval:g} h" + (f" over {infusion:g} h" if infusion else "")
+        if infusion:
+            return cls(infusions=[(time, time + infusion, amount / infusion) for time in times],
+                       half_life=half_life, name=name)
+        return cls(doses=[(time, amount) for time in times], half_life=half_life, name=name)
+
+    def decay_rate(self):
+        """Returns the first-order elimination rate of the antibiotic, ln(2) / half-life, per hour."""
+        return math.log(2) / self.half_life if self.half_life else 0.0
+
+    def breakpoints(self, horizon):
+        """
+        Returns the times between 0 and horizon at which a dose is given or an
+        infusion starts or stops. The concentration jumps or changes its rate
+        there, so the integration is restarted at each of them.
+
+        Returns
+        -------
+            array : sorted times, starting with 0 and ending with horizon
+        """
+        times = [time for time, _ in self.doses]
+        times += [time for start, stop, _ in self.infusions for time in (start, stop)]
+        inside = [time for time in times if 0 < time < horizon]
+        return np.unique(np.concatenate([[0.0, float(horizon)], inside]))
+
+    def bolus(self, time):
+        """Returns the concentration added by bolus doses given at exactly this time."""
+        return sum(amount for dose_time, amount in self.doses if dose_time == time)
+
+    def rate(self, start, stop):
+        """Returns the infusion rate between two consecutive breakpoints."""
+        return sum(rate for begin, end, rate in self.infusions if begin <= start and stop <= end)
+
+    def total(self, horizon):
+        """Returns the antibiotic given up to horizon, in micrograms per ml."""
+        bolus = sum(amount for time, amount in self.doses if time <= horizon)
+        infused = sum(rate * max(0.0, min(stop, horizon) - start) for start, stop, rate in self.infusions)
+        return bolus + infused
+
+class DosedModel:
+    """
+    A class for modeling biofilm growth under a dosing schedule, with the
+    logistic equation of Model but an antibiotic concentration that changes
+    over time.
+
+    The time span is split at every breakpoint of the schedule. Each piece
+    is integrated separately with solve_ivp, starting from the state at the
+    end of the previous piece plus any bolus dose, and with the step size the
+    previous piece ended with. The right-hand side is smooth within a piece,
+    so the adaptive stepper never has to feel its way across a jump.
+
+    Attributes
+    ----------
+    t : array
+        time points
+    k_b : float
+        bacteria growth rate
+    B_0 : float
+        initial amount of biofilm
+    B_max : float
+        maximum amount of biofilm that can grow
+    agent_MIC : float
+        minimum inhibitory concentration of antibiotic
+    schedule : Schedule
+        how the antibiotic is given
+    y : array
+        biofilm at every time point
+    conc : array
+        antibiotic concentration at every time point
+
+    Methods
+    -------
+    solve():
+        integrates the model piece by piece
+    metrics():
+        returns summary values of the solution
+    """
+
+    def __init__(self, growthrate, initcond, maxvalue, abx_mic, schedule, horizon=24, resolution=0.1):
+        """
+        Constructs all the necessary attributes for the DosedModel object.
+
+        Parameters
+        ----------
+            growthrate : float
+                growth rate of bacteria
+            initcond : float
+                initial amount of biofilm
+            maxvalue : float
+                maximum amount of biofilm that can be reached
+            abx_mic : float
+                minimum inhibitory concentration of antibiotic, in micrograms per ml
+            schedule : Schedule
+                how the antibiotic is given
+            horizon : float
+                length of the simulation in hours
+            resolution : float
+                time between the points of the solution in hours
+        """
+        self.t = model.time_points(horizon, resolution)
+        self.k_b = float(np.asarray(growthrate, dtype=float).item())
+        self.B_0 = initcond
+        self.B_max = maxvalue
+        self.agent_MIC = abx_mic
+        self.schedule = schedule
+        self.y, self.conc = self.solve()
+
+    def theta(self):
+        """Returns the constant that describes agent interaction with biofilm, k_b / MIC, or 0 without an MIC."""
+        return self.k_b / float(self.agent_MIC) if self.agent_MIC != 0 else 0.0
+
+    def solve(self):
+        """
+        Integrates biofilm and antibiotic concentration together between the
+        breakpoints of the schedule.
+
+        Returns
+        -------
+            y : array
+                biofilm at every time point
+            conc : array
+                antibiotic concentration at every time point, after any dose given at that time
+        """
+        from scipy.integrate import solve_ivp
+
+        result = np.zeros((2, self.t.size))
+        if self.B_0 <= 0:
+            # without biofilm only the concentration would change, and log(B) is undefined
+            return result[0], self.concentration()
+        state = np.array([math.log(self.B_0), 0.0])
+        step = None
+        edges = self.schedule.breakpoints(self.t[-1])
+        for start, stop in zip(edges[:-1], edges[1:]):
+            state[1] += self.schedule.bolus(start)
+            solution = solve_ivp(self.rhs, (start, stop), state, args=(self.schedule.rate(start, stop),),
+                                 dense_output=True, rtol=1e-6, atol=1e-9,
+                                 first_step=step and min(step, stop - start))
+            # points at a breakpoint belong to the piece starting there, after its dose
+            inside = slice(np.searchsorted(self.t, start),
+                           np.searchsorted(self.t, stop) if stop < edges[-1] else self.t.size)
+            result[:, inside] = solution.sol(self.t[inside])
+            state = solution.y[:, -1].copy()
+            if solution.t.size > 1:
+                step = solution.t[-1] - solution.t[-2]
+        return np.exp(result[0]), result[1]
+
+    def concentration(self):
+        """Returns the antibiotic concentration at every time point, integrated without biofilm."""
+        B_0, self.B_0 = self.B_0, 1.0
+        try:
+            return self.solve()[1]
+        finally:
+            self.B_0 = B_0
+
+    def rhs(self, t, state, rate):
+        """
+        Callable function required by solve(), the equation of
+        Model.logistic_growth() with a concentration C that decays at the
+        elimination rate k_e of the schedule and is raised by infusions.
+        Biofilm is integrated as u = log(B), which stays accurate when the
+        antibiotic kills the biofilm down to tiny amounts and cannot turn
+        negative:
+
+            du/dt = (k_b)(1 - B/B_max) - (theta)(C)
+            dC/dt = rate - (k_e)(C)
+
+        Returns
+        -------
+            list : du/dt and dC/dt
+        """
+        u, C = state
+        return [self.k_b * (1 - math.exp(u) / self.B_max) - self.theta() * C,
+                rate - self.schedule.decay_rate() * C]
+
+    def metrics(self):
+        """
+        Reduces the solution to the values in METRICS.
+
+        Returns
+        -------
+            dict : biofilm at the end, lowest biofilm, area under the curve
+            and antibiotic given
+        """
+        return {
+            'final' : self.y[-1],
+            'lowest' : self.y.min(),
+            'auc' : np.sum((self.y[1:] + self.y[:-1]) * np.diff(self.t) / 2),
+            'dose' : self.schedule.total(self.t[-1])
+        }
+
+def regimen_curve(growthrate, initcond, maxvalue, abx_mic, schedule, horizon, resolution):
+    """
+    Solves a DosedModel for one schedule. Runs in the worker processes of a Comparison.
+
+    Returns
+    -------
+        y : array
+            biofilm at every time point
+        conc : array
+            antibiotic concentration at every time point
+        metrics : dict
+            values of METRICS
+    """
+    m = DosedModel(growthrate, initcond, maxvalue, abx_mic, schedule, horizon, resolution)
+    return m.y, m.conc, m.metrics()
+
+class Comparison:
+    """
+    A class for comparing many dosing schedules for one bacteria. Every
+    schedule is solved in a process pool, so dozens of regimens take about
+    as long as one per processor.
+
+    Attributes
+    ----------
+    schedules : list
+        the compared Schedule objects
+    t : array
+        time points
+    curves : list
+        biofilm of every schedule, None until it is computed
+    concs : list
+        antibiotic concentration of every schedule, None until it is computed
+    results : list
+        metrics of every schedule, None until it is computed
+
+    Methods
+    -------
+    run():
+        solves every schedule, yielding them as they finish
+    best():
+        returns the index of the best schedule for a metric
+    figure():
+        creates a figure of the biofilm and antibiotic over time for every schedule
+    """
+
+    def __init__(self, schedules, growthrate, initcond, maxvalue, abx_mic, horizon=24, resolution=0.1):
+        """
+        Constructs all the necessary attributes for the Comparison object.
+
+        Parameters
+        ----------
+            schedules : list
+                Schedule objects to compare
+            growthrate : float
+                growth rate of the bacteria
+            initcond : float
+                initial amount of biofilm
+            maxvalue : float
+                maximum amount of biofilm that can be reached
+            abx_mic : float
+                minimum inhibitory concentration of antibiotic, in micrograms per ml
+            horizon : float
+                length of the simulations in hours
+            resolution : float
+                time between the points of the solutions in hours
+        """
+        self.schedules = list(schedules)
+        self.params = (float(np.asarray(growthrate, dtype=float).item()), initcond, maxvalue, abx_mic)
+        self.horizon = horizon
+        self.resolution = resolution
+        self.t = model.time_points(horizon, resolution)
+        self.curves = [None] * len(self.schedules)
+        self.concs = [None] * len(self.schedules)
+        self.results = [None] * len(self.schedules)
+
+    def submit(self, executor):
+        """
+        Submits every schedule to an executor.
+
+        Returns
+        -------
+            dict : maps each future to the index of its schedule
+        """
+        return {executor.submit(regimen_curve, *self.params, schedule, self.horizon, self.resolution) : i
+                for i, schedule in enumerate(self.schedules)}
+
+    def store(self, i, result):
+        """Stores the curves and metrics computed for schedule i."""
+        self.curves[i], self.concs[i], self.results[i] = result
+
+    def run(self, max_workers=None):
+        """
+        Solves every schedule in a process pool.
+
+        Yields
+        ------
+            int : index of each schedule as it finishes, after its result has been stored
+        """
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = self.submit(executor)
+            for future in as_completed(futures):
+                self.store(futures[future], future.result())
+                yield futures[future]
+
+    def best(self, metric='auc'):
+        """Returns the index of the computed schedule with the lowest value of a metric, None if none is computed."""
+        done = [i for i, result in enumerate(self.results) if result is not None]
+        return min(done, key=lambda i: self.results[i][metric]) if done else None
+
+    def figure(self, figure=None, metric='auc'):
+        """
+        Creates a matplotlib Figure, which contains the biofilm growth and
+        antibiotic concentration versus time for every computed schedule,
+        highlighting the best schedule for a metric.
+
+        Parameters
+        ----------
+            figure : Figure
+                figure to clear and draw into, a new one if None
+            metric : str
+                metric of METRICS that decides the best schedule
+
+        Returns
+        -------
+            figure (Figure) : plot of the compared schedules
+        """
+        # imported here so solving works without matplotlib
+        from matplotlib.figure import Figure
+
+        if figure is None:
+            figure = Figure(figsize=(5, 4), dpi=100)
+        figure.clear()
+        ax_biofilm, ax_conc = figure.subplots(2, 1, sharex=True, gridspec_kw={'height_ratios' : [2, 1]})
+        best = self.best(metric)
+        for i, (curve, conc) in enumerate(zip(self.curves, self.concs)):
+            if curve is None:
+                continue
+            style = {'color' : 'C3', 'linewidth' : 2, 'zorder' : 3} if i == best else \
+                    {'color' : 'grey', 'linewidth' : 0.8, 'alpha' : 0.5}
+            ax_biofilm.plot(self.t, curve, **style)
+            ax_conc.plot(self.t, conc, **style)
+        if best is not None:
+            ax_biofilm.set_title(f"Best: {self.schedules[best].name}", fontsize=9)
+        ax_biofilm.set_ylabel('Biofilm (OD)')
+        ax_conc.set_ylabel('Antibiotic (µg/ml)')
+        ax_conc.set_xlabel('Time (hours)')
+        return figure
+
+if __name__ == '__main__':
+    import time
+    schedules = [Schedule.repeated(amount, interval, 72, half_life=4)
+                 for amount in (0.5, 1, 2, 4, 8) for interval in (4, 6, 8, 12, 24)]
+    c = Comparison(schedules, 0.957, 0.002, 1.75, 1, horizon=72)
+    start = time.perf_counter()
+    for _ in c.run():
+        pass
+    best = c.best()
+    print(f"{len(schedules)} schedules in {time.perf_counter() - start:.3f} s, "
+          f"best {schedules[best].name}: auc {c.results[best]['auc']:.3g}")
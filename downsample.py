@@ -0,0 +1,58 @@
+# downsample.py
+
+import numpy as np
+
+# points drawn for one line, about twice the width of a 5 inch figure at 100 dpi
+PLOT_POINTS = 1000
+
+def lttb(x, y, n_out=PLOT_POINTS):
+    """
+    Chooses n_out points of a line with the Largest-Triangle-Three-Buckets
+    algorithm, which keeps the visual shape of the line, including peaks
+    and steps, much better than taking every nth point.
+
+    The first and last points are always kept. The points in between are
+    split into n_out - 2 buckets, and from every bucket the point is chosen
+    that forms the largest triangle with the point chosen from the previous
+    bucket and the average of the next bucket.
+
+    Parameters
+    ----------
+        x : array_like
+            x-values of the line, in increasing order
+        y : array_like
+            y-values of the line
+        n_out : int
+            number of points to keep
+
+    Returns
+    -------
+        array : indices of the kept points, all indices if there are at most n_out points
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = x.size
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    # bucket i holds the points edges[i] to edges[i + 1], every bucket has at least one point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    counts = np.diff(edges)
+    # averages of the next bucket, the last point follows the last bucket
+    next_x = np.append(np.add.reduceat(x[:n - 1], edges[:-1])[1:] / counts[1:], x[-1])
+    next_y = np.append(np.add.reduceat(y[:n - 1], edges[:-1])[1:] / counts[1:], y[-1])
+
+    index = np.empty(n_out, dtype=np.intp)
+    index[0], index[-1] = 0, n - 1
+    edges, next_x, next_y = edges.tolist(), next_x.tolist(), next_y.tolist()
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        ax, ay = float(x[a]), float(y[a])
+        # twice the area of the triangle with every point of the bucket, written as
+        # p*y + q*x + r so only plain floats multiply the slices
+        p, q = ax - next_x[i], next_y[i] - ay
+        area = np.abs(p * y[start:stop] + q * x[start:stop] - (p * ay + q * ax))
+        a = start + int(area.argmax())
+        index[i + 1] = a
+    return index
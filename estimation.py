@@ -0,0 +1,214 @@
+# estimation.py
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import numpy as np
+
+import model
+import plotter
+
+PARAMETERS = ('k_b', 'B_0', 'B_max')
+
+def initial_guess(t, data):
+    """
+    Estimates k_b, B_0 and B_max from a biofilm curve: B_0 from the first
+    point, B_max from the largest point, and k_b from a log-linear fit to
+    the points below half of B_max, where growth is close to exponential.
+
+    Returns
+    -------
+        array : k_b, B_0, B_max
+    """
+    positive = data[data > 0]
+    if positive.size == 0:
+        raise ValueError("A biofilm curve needs at least one positive value to be fit.")
+    B_0 = data[0] if data[0] > 0 else positive.min()
+    B_max = 1.05 * positive.max()
+    early = data < B_max / 2
+    if early.sum() < 3:
+        early = slice(None)
+    k_b = plotter.loglinear_rate(t[early] - t[0], data[early])
+    return np.array([max(float(k_b), 0.05), B_0, B_max])
+
+def start_points(guess, starts, seed=0):
+    """
+    Returns the initial guess followed by starts - 1 points scattered around
+    it by up to a factor of e in every parameter, for multi-start fitting.
+    """
+    rng = np.random.default_rng(seed)
+    scatter = np.exp(rng.uniform(-1, 1, (max(starts, 1) - 1, guess.size)))
+    return np.vstack([guess, guess * scatter])
+
+def fit_from(t, data, start, abx_mic=0.0, abx_conc=0.0):
+    """
+    Fits k_b, B_0 and B_max of the logistic Model to one biofilm curve by
+    Levenberg-Marquardt from one starting point. The parameters are fit as
+    logarithms, so they stay positive, and the Jacobian comes from
+    model.logistic_sensitivities() instead of finite differences.
+
+    Returns
+    -------
+        params : array
+            fitted k_b, B_0, B_max
+        rss : float
+            residual sum of squares
+        success : bool
+            True if the optimizer converged
+    """
+    from scipy.optimize import least_squares
+
+    def residuals(x):
+        return model.logistic_sensitivities(t, *np.exp(x), abx_mic, abx_conc)[0] - data
+
+    def jacobian(x):
+        p = np.exp(x)
+        _, *derivatives = model.logistic_sensitivities(t, *p, abx_mic, abx_conc)
+        # chain rule for the logarithms, dB/dlog(p) = (p)(dB/dp)
+        return np.column_stack(derivatives) * p
+
+    try:
+        with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+            result = least_squares(residuals, np.log(start), jac=jacobian, method='lm', xtol=1e-12)
+    except ValueError:
+        # residuals that overflow to inf or nan at the starting point
+        return np.full(3, np.nan), np.inf, False
+    rss = float(np.sum(result.fun ** 2))
+    return np.exp(result.x), rss if np.isfinite(rss) else np.inf, bool(result.success)
+
+def fit_biofilm(t, data, abx_mic=0.0, abx_conc=0.0, starts=8, seed=0, executor=None):
+    """
+    Fits k_b, B_0 and B_max of the logistic Model to a measured biofilm
+    curve, keeping the best of several local fits from different starting
+    points so a poor initial guess does not end in a local minimum.
+
+    Parameters
+    ----------
+        t : array_like
+            time points in hours
+        data : array_like
+            biofilm at every time point, nan for missing points
+        abx_mic : float
+            minimum inhibitory concentration of the antibiotic the biofilm was grown with
+        abx_conc : float
+            concentration of that antibiotic
+        starts : int
+            number of starting points, the first is initial_guess()
+        seed : int
+            seed for scattering the other starting points
+        executor : Executor
+            runs the starts in parallel, e.g. a ProcessPoolExecutor; in this process if None
+
+    Returns
+    -------
+        dict : fitted values
+            k_b, B_0, B_max : best-fit parameters
+            k_b_stderr, B_0_stderr, B_max_stderr : standard errors, from the Jacobian as in curve_fit
+            rss : residual sum of squares
+            r2 : coefficient of determination
+            n_points : number of points used
+            converged : True if the best fit converged
+            agreeing : number of starts that reached the best fit
+    """
+    t = np.asarray(t, dtype=float)
+    data = np.asarray(data, dtype=float)
+    usable = np.isfinite(t) & np.isfinite(data)
+    t, data = t[usable], data[usable]
+    points = start_points(initial_guess(t, data), starts, seed)
+    if executor is not None:
+        futures = [executor.submit(fit_from, t, data, start, abx_mic, abx_conc) for start in points]
+        fits = [future.result() for future in futures]
+    else:
+        fits = [fit_from(t, data, start, abx_mic, abx_conc) for start in points]
+
+    params, rss, success = min(fits, key=lambda fit: fit[1])
+    agreeing = sum(fit[1] <= rss * (1 + 1e-6) + 1e-15 for fit in fits)
+    result = dict(zip(PARAMETERS, params))
+
+    _, *derivatives = model.logistic_sensitivities(t, *params, abx_mic, abx_conc)
+    jac = np.column_stack(derivatives)
+    dof = t.size - len(PARAMETERS)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        try:
+            variance = np.diag(np.linalg.inv(jac.T @ jac)) * rss / dof if dof > 0 else np.full(3, np.inf)
+        except np.linalg.LinAlgError:
+            variance = np.full(3, np.inf)
+        r2 = 1 - rss / np.sum((data - data.mean()) ** 2)
+    for name, value in zip(PARAMETERS, variance):
+        result[f"{name}_stderr"] = np.sqrt(value) if np.isfinite(value) and value >= 0 else np.inf
+    result.update({'rss' : rss, 'r2' : r2, 'n_points' : t.size, 'converged' : success, 'agreeing' : agreeing})
+    return result
+
+def fit_rows(t, data, abx_mic=0.0, abx_conc=0.0, starts=8, seed=0):
+    """
+    Fits every row of data with fit_biofilm(). Runs in the worker processes of fit_plate().
+
+    Returns
+    -------
+        list : result of fit_biofilm() for every row, None for rows that could not be fit
+    """
+    results = []
+    for row in np.atleast_2d(data):
+        try:
+            results.append(fit_biofilm(t, row, abx_mic, abx_conc, starts, seed))
+        except ValueError:
+            results.append(None)
+    return results
+
+def fit_plate(t, data, abx_mic=0.0, abx_conc=0.0, starts=8, seed=0, max_workers=None, n_chunks=None):
+    """
+    Fits k_b, B_0 and B_max to every well of a plate, e.g. from
+    importer.read_plate(). The wells are split into chunks that are fit in
+    a process pool, each well with its own multi-start fit.
+
+    Parameters
+    ----------
+        t : array_like
+            time points in hours, shared by all wells
+        data : array_like
+            one biofilm curve per row
+        abx_mic : float
+            minimum inhibitory concentration of the antibiotic, shared by all wells
+        abx_conc : float
+            concentration of the antibiotic, shared by all wells
+        starts : int
+            number of starting points per well
+        seed : int
+            seed for scattering the starting points
+        max_workers : int
+            number of processes, 1 to fit in this process
+        n_chunks : int
+            number of chunks of wells, by default 4 per process
+
+    Returns
+    -------
+        dict : arrays with one value per well, with the keys of fit_biofilm(),
+        nan for wells that could not be fit
+    """
+    data = np.atleast_2d(np.asarray(data, dtype=float))
+    if max_workers == 1:
+        fits = fit_rows(t, data, abx_mic, abx_conc, starts, seed)
+    else:
+        if n_chunks is None:
+            n_chunks = 4 * (max_workers or os.cpu_count() or 1)
+        chunks = np.array_split(data, min(n_chunks, len(data)))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(fit_rows, t, chunk, abx_mic, abx_conc, starts, seed)
+                       for chunk in chunks]
+            fits = [fit for future in futures for fit in future.result()]
+
+    keys = next((list(fit) for fit in fits if fit is not None), list(PARAMETERS))
+    return {key : np.array([fit[key] if fit is not None else np.nan for fit in fits]) for key in keys}
+
+if __name__ == '__main__':
+    import time
+    rng = np.random.default_rng(1)
+    t = np.linspace(0, 24, 25)
+    truth = rng.uniform([0.4, 0.001, 1.0], [1.2, 0.01, 2.0], (96, 3))
+    plate = np.array([model.logistic_solution(t, k_b, B_0, B_max, 0, 0) for k_b, B_0, B_max in truth])
+    plate *= 1 + 0.03 * rng.standard_normal(plate.shape)
+    start = time.perf_counter()
+    fits = fit_plate(t, plate)
+    error = np.abs(np.column_stack([fits[name] for name in PARAMETERS]) / truth - 1)
+    print(f"96 wells in {time.perf_counter() - start:.3f} s, median relative error "
+          + ", ".join(f"{name} {value:.3f}" for name, value in zip(PARAMETERS, np.median(error, axis=0))))
@@ -0,0 +1,182 @@
+# figureview.py
+
+import numpy as np
+
+import downsample
+import profiling
+
+class FigureView:
+    """
+    A class that embeds one matplotlib Figure in a Tk frame for the lifetime
+    of a tab, and redraws its first line in place when the data changes.
+
+    The line is animated, so the rest of the figure is saved as a background
+    after every full draw. Updates that fit inside the current axes limits
+    only restore the background and blit the line; the axes are rescaled and
+    the figure fully redrawn only when the data leaves the limits or shrinks
+    to less than half of them. Lines longer than max_points are downsampled
+    with downsample.lttb() before they reach matplotlib.
+
+    Attributes
+    ----------
+    figure : Figure
+        the embedded figure, e.g. from Model.figure() or Plotter.figure()
+    canvas : FigureCanvasTkAgg
+        the one canvas showing the figure
+    axes : Axes
+        first axes of the figure
+    line : Line2D
+        first line of the axes, updated by update()
+    bands : list
+        filled areas drawn around the line by update(), e.g. uncertainty bands
+    max_points : int
+        largest number of points drawn for the line
+    background : object
+        saved pixels of the figure without the line, None before the first draw
+
+    Methods
+    -------
+    update():
+        replaces the data of the line and redraws it
+    append():
+        adds points to the end of the line
+    widget():
+        returns the Tk widget of the canvas
+    """
+
+    def __init__(self, figure, master):
+        """
+        Constructs all the necessary attributes for the FigureView object.
+
+        Parameters
+        ----------
+            figure : Figure
+                figure with at least one line in its first axes
+            master : tkinter widget
+                frame the canvas is placed in
+        """
+        # imported on first use, so the window can appear before matplotlib is loaded
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        self.figure = figure
+        self.canvas = FigureCanvasTkAgg(figure, master=master)
+        self.axes = figure.axes[0]
+        self.line = self.axes.lines[0]
+        self.line.set_animated(True)
+        self.bands = []
+        self.max_points = downsample.PLOT_POINTS
+        self.background = None
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        with profiling.profiler.span('canvas.draw'):
+            self.canvas.draw()
+
+    def widget(self):
+        """Returns the Tk widget of the canvas, for placing it with grid()."""
+        return self.canvas.get_tk_widget()
+
+    def on_draw(self, event):
+        """Saves the background after a full draw and draws the line on top of it."""
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_artists()
+
+    def draw_artists(self):
+        """Draws the bands and the line, which are left out of the background."""
+        for band in self.bands:
+            self.axes.draw_artist(band)
+        self.axes.draw_artist(self.line)
+
+    def update(self, x, y, bands=()):
+        """
+        Replaces the data of the line and the bands, blitting them over the
+        saved background or fully redrawing the figure when the axes need to
+        be rescaled.
+
+        Parameters
+        ----------
+            x : array_like
+                new x-values of the line
+            y : array_like
+                new y-values of the line
+            bands : list
+                (lower, upper) y-values of every band to fill around the line
+        """
+        if np.size(x) > self.max_points:
+            index = downsample.lttb(x, y, self.max_points)
+            x, y = np.asarray(x)[index], np.asarray(y)[index]
+            bands = [(np.asarray(lower)[index], np.asarray(upper)[index]) for lower, upper in bands]
+        self.line.set_data(x, y)
+        for band in self.bands:
+            band.remove()
+        self.bands = [self.axes.fill_between(x, lower, upper, alpha=0.2, linewidth=0,
+                                             color=self.line.get_color(), animated=True)
+                      for lower, upper in bands]
+        extent = np.concatenate([np.ravel(y)] + [np.ravel(band) for pair in bands for band in pair])
+        if self.background is None or self.needs_rescale(x, extent):
+            self.axes.relim()
+            # relim() leaves out the bands
+            x_all = np.tile(np.ravel(x), extent.size // max(np.size(x), 1))
+            self.axes.update_datalim(np.column_stack([x_all, extent]))
+            self.axes.autoscale_view()
+            with profiling.profiler.span('canvas.draw'):
+                self.canvas.draw()
+            return
+        with profiling.profiler.span('canvas.blit'):
+            self.canvas.restore_region(self.background)
+            self.draw_artists()
+            self.canvas.blit(self.axes.bbox)
+
+    def append(self, x, y):
+        """
+        Adds points to the end of the line, e.g. new readings of a running
+        experiment. Points inside the current axes limits are only blitted.
+        Otherwise the axes are rescaled with room for half as many points
+        again, so a growing line is fully redrawn only now and then.
+
+        Parameters
+        ----------
+            x : array_like
+                x-values of the new points
+            y : array_like
+                y-values of the new points
+        """
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        self.line.set_data(np.concatenate([self.line.get_xdata(), x]),
+                           np.concatenate([self.line.get_ydata(), y]))
+        (x_low, x_high), (y_low, y_high) = self.axes.get_xlim(), self.axes.get_ylim()
+        finite = np.isfinite(x) & np.isfinite(y)
+        inside = (np.all((x[finite] >= x_low) & (x[finite] <= x_high)) and
+                  np.all((y[finite] >= y_low) & (y[finite] <= y_high)))
+        if self.background is None or not inside:
+            self.axes.relim()
+            self.axes.autoscale_view()
+            (x_low, x_high), (y_low, y_high) = self.axes.get_xlim(), self.axes.get_ylim()
+            self.axes.set_xlim(x_low, x_high + (x_high - x_low) / 2)
+            self.axes.set_ylim(y_low, y_high + (y_high - y_low) / 2)
+            with profiling.profiler.span('canvas.draw'):
+                self.canvas.draw()
+            return
+        with profiling.profiler.span('canvas.blit'):
+            self.canvas.restore_region(self.background)
+            self.draw_artists()
+            self.canvas.blit(self.axes.bbox)
+
+    def needs_rescale(self, x, y):
+        """
+        Checks whether new data falls outside the current axes limits, or
+        covers less than half of them in either direction.
+
+        Returns
+        -------
+            bool : True if the axes should be rescaled
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if not (np.isfinite(x).any() and np.isfinite(y).any()):
+            return False
+        for values, (low, high) in ((x, self.axes.get_xlim()), (y, self.axes.get_ylim())):
+            data_low, data_high = np.nanmin(values), np.nanmax(values)
+            if data_low < low or data_high > high:
+                return True
+            if data_high - data_low < (high - low) / 2:
+                return True
+        return False
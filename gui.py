@@ -1,348 +1,1091 @@
-# Mandy Abernathy
-# GUI
-
-import tkinter
-from tkinter import ttk # themed widgets
-from tkinter import scrolledtext
-
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-import numpy as np
-
-import model
-import plotter
-
-class App(ttk.Frame):
-    """
-    Class for Biofilm Gui
-    """
-    def __init__ (self, master):
-        super().__init__(master)
-        self.master = master
-
-        self.growth_rates = {
-            'P. aeruginosa' : 0.957,
-            'L. plantarum' : 0.612,
-            'S. aereus' : 0.386
-        }
-
-        self.data = {
-            'P. aeruginosa' : [
-                [0, 1, 2, 3, 4, 5, 6, 7],
-                [0.002, 0.019, 0.024, 0.068, 0.085, 0.355, 0.979, 1.496]
-            ],
-            'L. plantarum' : [
-                [0, 1, 2, 3, 4, 5, 6, 7],
-                [0.001, 0.015, 0.02, 0.05, 0.07, 0.15, 0.6, 0.95]
-            ],
-            'S. aereus' : [
-                [0, 1, 2, 3, 4, 5, 6, 7],
-                [0.002, 0.007, 0.015, 0.025, 0.056, 0.09, 0.14, 0.345]
-            ]
-            
-        }
-        
-        button_style = ttk.Style()
-        button_style.configure('my.TButton', font=('Helvetica', 12))
-        label_style = ttk.Style()
-        label_style.configure('my.TLabel', font=('Helvetica', 12))
-            
-        self.create_tabs()
-        self.create_tab1()
-        self.create_tab2()
-        self.create_tab3()
-
-
-    def create_tabs(self):
-        """Creates tabs for biofilm model, bacteria growth plot, and data entry"""
-        tabControl = ttk.Notebook(root)
-
-        self.tab1 = ttk.Frame(tabControl) # biofilm graph
-        self.tab2 = ttk.Frame(tabControl) # bacteria plot
-        self.tab3 = ttk.Frame(tabControl) # input data
-
-
-        tabControl.add(self.tab1, text='Biofilm Model')
-        tabControl.add(self.tab2, text='Bacteria Growth')
-        tabControl.add(self.tab3, text='Data Input')
-        tabControl.pack(expand = 1, fill ="both")
-
-    def create_tab1(self):
-        """Creates tab for the biofilm model."""
-        # current parameters for biofilm model
-        self.selected_bacteria = tkinter.StringVar(self)
-        self.selected_initialstate = tkinter.StringVar(self, '0.002')
-        self.selected_maxvalue = tkinter.StringVar(self, '1.75')
-        self.antibiotic_MIC = tkinter.StringVar(self, '0')
-        self.antibiotic_conc = tkinter.StringVar(self, '0')
-
-        # create frames
-        self.top_frame = ttk.Frame(self.tab1)
-        self.top_frame.grid(row=0, column=0)
-        self.middle_frame = ttk.Frame(self.tab1)
-        self.middle_frame.grid(row=1, column=0)
-        self.bottom_frame = ttk.Frame(self.tab1)
-        self.bottom_frame.grid(row=2, column=0)
-            
-        # create widgets
-
-            # frame title
-        lbl_title1 = ttk.Label(self.top_frame, text="Bacterial Biofilm Growth", style='my.TLabel')
-        lbl_title1.grid(row=0, column=0, padx=0, pady=20)
-
-        #lbl_bacteria = ttk.Label(self.bottom_frame, width=10, text='Bacteria:')
-        #lbl_bacteria.grid(row=5, column=0, padx=40, pady=10, sticky=tkinter.W)
-
-            # bacteria selection menu
-        bacteria_options = list(self.growth_rates.keys())
-        self.selected_bacteria.set('P. aeruginosa') # set default to Pseudomonas
-        self.menu_bacteria = ttk.OptionMenu(self.middle_frame, self.selected_bacteria, bacteria_options[0], *bacteria_options, command=self.plot_biofilm)
-        self.menu_bacteria.grid(row=5, column=0, padx=40, pady=10, sticky=tkinter.W)
-
-            # initial state text box
-        lbl_initialstate = ttk.Label(self.bottom_frame, width=20, text="Initial Value: (OD)")
-        lbl_initialstate.grid(row=6, column=0, padx=40, pady=0, sticky=tkinter.W)
-        ent_initialstate = ttk.Entry(self.bottom_frame, width=20, textvariable=self.selected_initialstate)
-        ent_initialstate.grid(row=7, column=0, columnspan=1, padx=40, pady=5, sticky=tkinter.W)
-        ent_initialstate.bind('<Return>', self.plot_biofilm)
-
-            # maximum biofilm text box
-        lbl_maxvalue = ttk.Label(self.bottom_frame,  width=20, text="Maximum value: (OD)")
-        lbl_maxvalue.grid(row=10, column=0, padx=40, pady=0, sticky=tkinter.W)
-        ent_maxvalue = ttk.Entry(self.bottom_frame,  width=20, textvariable=self.selected_maxvalue)
-        ent_maxvalue.grid(row=11, column=0, padx=40, pady=5, sticky=tkinter.W)
-        ent_maxvalue.bind('<Return>', self.plot_biofilm)
-
-            # antibiotic MIC text box
-        lbl_antibiotic_MIC = ttk.Label(self.bottom_frame, width=28, text="Antibiotic MIC: (µg/ml)")
-        lbl_antibiotic_MIC.grid(row=6, column=3, columnspan=1, padx=0, pady=0, sticky=tkinter.W)
-        ent_MIC = ttk.Entry(self.bottom_frame, width=20, textvariable=self.antibiotic_MIC)
-        ent_MIC.grid(row=7, column=3, columnspan=1, padx=0, pady=5, sticky=tkinter.W)
-        ent_MIC.bind('<Return>', self.plot_biofilm)
-
-            # antibiotic concentration text box
-        lbl_concentration = ttk.Label(self.bottom_frame, width=28, text="Antibiotic conc: (µg/ml)")
-        lbl_concentration.grid(row=10, column=3, columnspan=1, padx=0, pady=0, sticky=tkinter.W)
-        ent_concentration = ttk.Entry(self.bottom_frame, width=20, textvariable=self.antibiotic_conc)
-        ent_concentration.grid(row=11, column=3, columnspan=1, padx=0, pady=5, sticky=tkinter.W)
-        ent_concentration.bind('<Return>', self.plot_biofilm)
-
-            # quit button
-        btn_quit = ttk.Button(self.bottom_frame, text="Quit", style='my.TButton', command=root.destroy)
-        btn_quit.grid(row=11, column=4, padx=40, pady=5, sticky=tkinter.E)
-       
-        # create plot
-        self.plot_biofilm()
-
-    def create_tab2(self):
-        """Creates tab for planktonic bacteria growth plot."""
-
-        # current parameters
-        self.plotted_bacteria = tkinter.StringVar(self, 'P. aeruginosa')
-
-        # create frames
-        self.tab2_top_frame = ttk.Frame(self.tab2)
-        self.tab2_top_frame.grid(row=0, column=0)
-        self.tab2_bottom_frame = ttk.Frame(self.tab2)
-        self.tab2_bottom_frame.grid(row=1, column=0)
-
-        # create widgets
-
-            # frame title
-        lbl_title2 = ttk.Label(self.tab2_top_frame, text="Planktonic Bacteria Growth", style='my.TLabel')
-        lbl_title2.grid(row=0, column=50, padx=0, pady=20)
-    
-            # panktonic bacteria menu
-        bacteria_options = list(self.growth_rates.keys())
-        self.menu_pltbacteria = ttk.OptionMenu(self.tab2_bottom_frame, self.plotted_bacteria, bacteria_options[0], *bacteria_options, command=self.plot_bacteria)
-        self.menu_pltbacteria.grid(row=3, column=0, padx=40, pady=10, sticky=tkinter.W)
-
-        # create plot
-        self.plot_bacteria()
-
-    def create_tab3(self):
-        """Creates tab for entering data for a new bacteria."""
-        
-        # current values
-        self.new_bacteria = tkinter.StringVar(self)
-        self.start_time = tkinter.StringVar(self, '0')
-        self.end_time = tkinter.StringVar(self, '8')
-        self.input_data = tkinter.StringVar(self)
-            
-        # create frames
-        self.tab3_frame = ttk.Frame(self.tab3)
-        self.tab3_frame.grid(row=5, column=0)
-
-        # create widgets
-
-            # frame title
-        lbl_title3 = ttk.Label(self.tab3_frame, text="Data Input for Bacteria Growth", style='my.TLabel')
-        lbl_title3.grid(row=0, column=0, columnspan=2, padx=40, pady=20)
-
-            # new bacteria information
-        lbl_newbacteria = ttk.Label(self.tab3_frame, text="New bacteria:") #, style='my.TLabel')
-        lbl_newbacteria.grid(row=1, column=0, padx=40, pady=0, sticky=tkinter.W)
-            # bacteria name
-        ent_newbacteria = ttk.Entry(self.tab3_frame, textvariable=self.new_bacteria)
-        ent_newbacteria.grid(row=2, column=0, padx=40, pady=5, sticky=tkinter.W)
-            # start time (hours)
-        lbl_starttime = ttk.Label(self.tab3_frame, text="Start time: (hour)")
-        lbl_starttime.grid(row=3, column=0, padx=40, pady=0, sticky=tkinter.W)
-        self.ent_starttime = ttk.Entry(self.tab3_frame, textvariable=self.start_time)
-        self.ent_starttime.grid(row=4, column=0, padx=40, pady=5, sticky=tkinter.W)
-            # end time
-        lbl_endtime = ttk.Label(self.tab3_frame, text="End time: (hour)")
-        lbl_endtime.grid(row=5, column=0, padx=40, pady=0, sticky=tkinter.W)
-        self.ent_endtime = ttk.Entry(self.tab3_frame, textvariable=self.end_time)
-        self.ent_endtime.grid(row=6, column=0, padx=40, pady=5, sticky=tkinter.W)
-            #data points
-        lbl_data = ttk.Label(self.tab3_frame, text="Data:")
-        lbl_data.grid(row=1, column=2, padx=40, pady=0, sticky=tkinter.W)
-        self.ent_data = scrolledtext.ScrolledText(self.tab3_frame, height=6, width=24, wrap=tkinter.WORD)
-        self.ent_data.grid(row=2, rowspan=4, column=2, padx=40, pady=10, sticky=tkinter.E)
-
-            # add bacteria button
-        btn_addbacteria = ttk.Button(self.tab3_frame, text="Add Bacteria", style='my.TButton', command=self.add_bacteria)
-        btn_addbacteria.grid(row=8, column=2, padx=40, pady=5, sticky=tkinter.E)
-
-            # help button for data entry syntax
-        self.button_showinfo = ttk.Button(self.tab3_frame, text="Help", command=self.popup_showinfo)
-        self.button_showinfo.grid(row=6, column=2, padx=40, pady=5, sticky=tkinter.E)        
-
-            # secret
-        self.button_bonus = ttk.Button(self.tab3_frame, text="Bonus", command=self.popup_bonus)
-        self.button_bonus.grid(row=50, column=2, padx=40, pady=(310, 0), sticky=tkinter.E)
-
-    def plot_biofilm(self, *args):
-        """
-        Plots biofilm growth using a Model object.
-        Called when any entry box on tab 1 is updated.
-        """
-        # get parameters, convert to floats
-        try:
-            bacteria = self.selected_bacteria.get()
-            growth_rate = self.growth_rates[bacteria]
-            init_conditions = float(self.selected_initialstate.get())
-            max_value = float(self.selected_maxvalue.get())
-            MIC = float(self.antibiotic_MIC.get())
-            conc = float(self.antibiotic_conc.get())
-        except ValueError:
-            tkinter.messagebox.showerror("Input Error", "Please enter digits.")
-            return
-
-        # create figure
-        m = model.Model(growth_rate, init_conditions, max_value, MIC, conc)
-        fig = m.figure()
-
-        # embed in frame
-        canvas = FigureCanvasTkAgg(fig, master=self.middle_frame)  # A tk.DrawingArea.
-        canvas.draw()
-        canvas.get_tk_widget().grid(row=1, column=0, columnspan=2, padx=40)
-
-    def plot_bacteria(self, *args):
-        """
-        Plots bacteria growth using a Plotter object.
-        Called when the selected bacteria on tab 2 is changed.
-        """
-        # get values to plot
-        bacteria = self.plotted_bacteria.get()
-        t_span = self.data[bacteria][0]
-        y_data = self.data[bacteria][1]
-
-        # create figure
-        p = plotter.Plotter(t_span, y_data)
-        fig = p.figure()
-
-        # embed in frame
-        canvas = FigureCanvasTkAgg(fig, master=self.tab2_bottom_frame) 
-        canvas.draw()
-        canvas.get_tk_widget().grid(row=1, column=0, columnspan=2, padx=40, pady=0)
-
-
-    def add_bacteria(self):
-        """
-        Takes bacteria, time points, and data entry from tab3, adds it to bacteria
-        data to the App class, and updates the options in the menus on tabs 1 and 2.
-        """
-        # get entered data
-        bacteria = self.new_bacteria.get()
-        if bacteria == '':
-            tkinter.messagebox.showwarning("Warning", "Please enter bacteria name." )
-            return
-
-        input_data = self.ent_data.get('1.0', tkinter.END)
-        
-        # add data and constants to data dictionaries
-        self.add_data(bacteria, input_data)
-
-        # update menus on tabs 1 and 2
-        new_options = list(self.data.keys())
-        self.menu_pltbacteria.set_menu(new_options[0], *new_options)
-        self.menu_bacteria.set_menu(new_options[0], *new_options)
-
-    def add_data(self, bacteria, input):
-        """
-        Creates lists of data entered in tab 3 and adds data to the dictionaries
-        saved in the App class.
-        """
-        # create list of time points from start and end time entries
-        try:
-            t_0 = int(self.ent_starttime.get())
-            t_n = int(self.ent_endtime.get())
-            t_points = list(np.linspace(t_0, t_n, t_n+1))
-        except ValueError:
-            tkinter.messagebox.showerror("Input Error", "Please enter digits for start and end times.")
-
-        # parse text from data text box
-        try:
-            y_data = []
-            for val in input.split():
-                y_data.append(float(val.strip(',')))
-        except ValueError:
-            tkinter.messagebox.showerror("Data Error", "Syntax error in data input.")
-            return
-
-        # save data to dictionary
-        data = [t_points, y_data]
-        self.data[bacteria] = data
-
-        # add growth rate to dictionary
-        try:
-            p = plotter.Plotter(t_points, y_data)
-            new_rate = p.fit()
-        except ValueError:
-            tkinter.messagebox.showerror("Data Error", "Not enough entries in data input.")
-            return
-
-        self.growth_rates[bacteria] = new_rate
-
-    def popup_showinfo(self):
-        """Displays help informations for data entry text box."""
-        help_text = (
-            "Please enter OD measurements of bacteria growth taken at "
-            "equally spaced intervals. Enter data points in the text box, "
-            "either one value per line, as a space-separated list, or as "
-            "a comma-separated list."
-        )
-        tkinter.messagebox.showinfo("Data information", help_text)
-
-    def popup_bonus(self):
-        """Christian made me do it."""
-        win = tkinter.Toplevel()
-        win.wm_title("Bonus")
-
-        l = tkinter.Label(win, text="(つ -‘ _ ‘- )つ")
-        l.grid(row=0, column=0)
-        b = ttk.Button(win, text="Okay", command=win.destroy)
-        b.grid(row=1, column=0)
-
-    #####################################
-
-if __name__ == "__main__":
-    root = tkinter.Tk()
-    root.title("Bacterial Biofilms")
-    app = App(root)
-    app.mainloop()
-    
-
+# Mandy Abernathy
+# GUI
+
+import time
+STARTED = time.perf_counter()
+
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import sys
+import tkinter
+from tkinter import ttk # themed widgets
+from tkinter import filedialog
+from tkinter import scrolledtext
+
+import numpy as np
+
+import cache
+import dosing
+from figureview import FigureView
+import importer
+import library
+import live
+import model
+from picker import StrainPicker
+import plotter
+from profiling import profiler
+import spatial
+import strains
+import sweep
+import uncertainty
+from worker import Worker
+
+# matplotlib and scipy are imported on first use, after the window is shown
+IMPORTED = time.perf_counter()
+
+# milliseconds between reads of a followed plate reader export
+LIVE_POLL_MS = 2000
+
+# strains added in the GUI are kept here between sessions
+LIBRARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'strains')
+
+class App(ttk.Frame):
+    """
+    Class for Biofilm Gui
+    """
+    def __init__ (self, master):
+        super().__init__(master)
+        self.master = master
+
+        # name, growth rate and data of every bacteria
+        self.strains = strains.StrainRegistry()
+        self.strains.extend([
+            ('P. aeruginosa', 0.957, [0, 1, 2, 3, 4, 5, 6, 7],
+                [0.002, 0.019, 0.024, 0.068, 0.085, 0.355, 0.979, 1.496]),
+            ('L. plantarum', 0.612, [0, 1, 2, 3, 4, 5, 6, 7],
+                [0.001, 0.015, 0.02, 0.05, 0.07, 0.15, 0.6, 0.95]),
+            ('S. aereus', 0.386, [0, 1, 2, 3, 4, 5, 6, 7],
+                [0.002, 0.007, 0.015, 0.025, 0.056, 0.09, 0.14, 0.345])
+        ])
+
+        self.open_library()
+        
+        button_style = ttk.Style()
+        button_style.configure('my.TButton', font=('Helvetica', 12))
+        label_style = ttk.Style()
+        label_style.configure('my.TLabel', font=('Helvetica', 12))
+            
+        # solves and fits run in background threads, the plots are updated on the main thread
+        self.worker = Worker(self, on_busy=self.show_busy)
+
+        self.create_tabs()
+        self.create_tab1()
+        self.create_tab2()
+        self.create_tab3()
+        self.create_tab4()
+        self.create_tab5()
+        self.create_tab6()
+
+        # seconds from the start of gui.py to the imports, first paint and first plot
+        self.timings = {'imports' : IMPORTED - STARTED}
+        self.after_idle(self.draw_plots)
+
+
+    def open_library(self):
+        """
+        Adds the strains saved in the strain library to the strain registry of
+        the App class. Their data is only read from disk when it is used.
+        """
+        try:
+            self.library = library.StrainLibrary(LIBRARY_PATH)
+        except (OSError, ValueError) as error:
+            self.library = None
+            tkinter.messagebox.showwarning("Library Error", f"Strains will not be saved: {error}")
+            return
+        self.strains.link(self.library)
+
+    def create_tabs(self):
+        """Creates tabs for biofilm model, bacteria growth plot, and data entry"""
+        tabControl = ttk.Notebook(root)
+
+        self.tab1 = ttk.Frame(tabControl) # biofilm graph
+        self.tab2 = ttk.Frame(tabControl) # bacteria plot
+        self.tab3 = ttk.Frame(tabControl) # input data
+        self.tab4 = ttk.Frame(tabControl) # dose response heatmap
+        self.tab5 = ttk.Frame(tabControl) # dosing schedule comparison
+        self.tab6 = ttk.Frame(tabControl) # depth profiles
+
+
+        tabControl.add(self.tab1, text='Biofilm Model')
+        tabControl.add(self.tab2, text='Bacteria Growth')
+        tabControl.add(self.tab3, text='Data Input')
+        tabControl.add(self.tab4, text='Dose Response')
+        tabControl.add(self.tab5, text='Dosing')
+        tabControl.add(self.tab6, text='Depth Profile')
+        tabControl.pack(expand = 1, fill ="both")
+
+        # busy indicator for background computations
+        self.busy_text = tkinter.StringVar(self, '')
+        lbl_busy = ttk.Label(root, textvariable=self.busy_text)
+        lbl_busy.pack(anchor=tkinter.W, padx=40, pady=(0, 5))
+
+    def create_tab1(self):
+        """Creates tab for the biofilm model."""
+        # current parameters for biofilm model
+        self.selected_bacteria = tkinter.StringVar(self)
+        self.selected_initialstate = tkinter.StringVar(self, '0.002')
+        self.selected_maxvalue = tkinter.StringVar(self, '1.75')
+        self.antibiotic_MIC = tkinter.StringVar(self, '0')
+        self.antibiotic_conc = tkinter.StringVar(self, '0')
+        self.horizon = tkinter.StringVar(self, '24')
+        self.resolution = tkinter.StringVar(self, '60')
+        self.show_uncertainty = tkinter.BooleanVar(self, False)
+
+        # create frames
+        self.top_frame = ttk.Frame(self.tab1)
+        self.top_frame.grid(row=0, column=0)
+        self.middle_frame = ttk.Frame(self.tab1)
+        self.middle_frame.grid(row=1, column=0)
+        self.bottom_frame = ttk.Frame(self.tab1)
+        self.bottom_frame.grid(row=2, column=0)
+            
+        # create widgets
+
+            # frame title
+        lbl_title1 = ttk.Label(self.top_frame, text="Bacterial Biofilm Growth", style='my.TLabel')
+        lbl_title1.grid(row=0, column=0, padx=0, pady=20)
+
+        #lbl_bacteria = ttk.Label(self.bottom_frame, width=10, text='Bacteria:')
+        #lbl_bacteria.grid(row=5, column=0, padx=40, pady=10, sticky=tkinter.W)
+
+            # bacteria selection menu
+        self.selected_bacteria.set('P. aeruginosa') # set default to Pseudomonas
+        self.menu_bacteria = StrainPicker(self.middle_frame, self.strains, self.selected_bacteria, command=self.plot_biofilm)
+        self.menu_bacteria.grid(row=5, column=0, padx=40, pady=10, sticky=tkinter.W)
+
+            # initial state text box
+        lbl_initialstate = ttk.Label(self.bottom_frame, width=20, text="Initial Value: (OD)")
+        lbl_initialstate.grid(row=6, column=0, padx=40, pady=0, sticky=tkinter.W)
+        ent_initialstate = ttk.Entry(self.bottom_frame, width=20, textvariable=self.selected_initialstate)
+        ent_initialstate.grid(row=7, column=0, columnspan=1, padx=40, pady=5, sticky=tkinter.W)
+        ent_initialstate.bind('<Return>', self.plot_biofilm)
+
+            # maximum biofilm text box
+        lbl_maxvalue = ttk.Label(self.bottom_frame,  width=20, text="Maximum value: (OD)")
+        lbl_maxvalue.grid(row=10, column=0, padx=40, pady=0, sticky=tkinter.W)
+        ent_maxvalue = ttk.Entry(self.bottom_frame,  width=20, textvariable=self.selected_maxvalue)
+        ent_maxvalue.grid(row=11, column=0, padx=40, pady=5, sticky=tkinter.W)
+        ent_maxvalue.bind('<Return>', self.plot_biofilm)
+
+            # antibiotic MIC text box
+        lbl_antibiotic_MIC = ttk.Label(self.bottom_frame, width=28, text="Antibiotic MIC: (µg/ml)")
+        lbl_antibiotic_MIC.grid(row=6, column=3, columnspan=1, padx=0, pady=0, sticky=tkinter.W)
+        ent_MIC = ttk.Entry(self.bottom_frame, width=20, textvariable=self.antibiotic_MIC)
+        ent_MIC.grid(row=7, column=3, columnspan=1, padx=0, pady=5, sticky=tkinter.W)
+        ent_MIC.bind('<Return>', self.plot_biofilm)
+
+            # antibiotic concentration text box
+        lbl_concentration = ttk.Label(self.bottom_frame, width=28, text="Antibiotic conc: (µg/ml)")
+        lbl_concentration.grid(row=10, column=3, columnspan=1, padx=0, pady=0, sticky=tkinter.W)
+        ent_concentration = ttk.Entry(self.bottom_frame, width=20, textvariable=self.antibiotic_conc)
+        ent_concentration.grid(row=11, column=3, columnspan=1, padx=0, pady=5, sticky=tkinter.W)
+        ent_concentration.bind('<Return>', self.plot_biofilm)
+
+            # simulation length text box
+        lbl_horizon = ttk.Label(self.bottom_frame, width=20, text="Duration: (hours)")
+        lbl_horizon.grid(row=12, column=0, padx=40, pady=0, sticky=tkinter.W)
+        ent_horizon = ttk.Entry(self.bottom_frame, width=20, textvariable=self.horizon)
+        ent_horizon.grid(row=13, column=0, padx=40, pady=5, sticky=tkinter.W)
+        ent_horizon.bind('<Return>', self.plot_biofilm)
+
+            # time step text box
+        lbl_resolution = ttk.Label(self.bottom_frame, width=28, text="Time step: (minutes)")
+        lbl_resolution.grid(row=12, column=3, columnspan=1, padx=0, pady=0, sticky=tkinter.W)
+        ent_resolution = ttk.Entry(self.bottom_frame, width=20, textvariable=self.resolution)
+        ent_resolution.grid(row=13, column=3, columnspan=1, padx=0, pady=5, sticky=tkinter.W)
+        ent_resolution.bind('<Return>', self.plot_biofilm)
+
+            # quit button
+        btn_quit = ttk.Button(self.bottom_frame, text="Quit", style='my.TButton', command=root.destroy)
+        btn_quit.grid(row=11, column=4, padx=40, pady=5, sticky=tkinter.E)
+
+            # diagnostics button
+        btn_diagnostics = ttk.Button(self.bottom_frame, text="Diagnostics", command=self.popup_diagnostics)
+        btn_diagnostics.grid(row=10, column=4, padx=40, pady=5, sticky=tkinter.E)
+
+            # uncertainty band check box
+        chk_uncertainty = ttk.Checkbutton(self.bottom_frame, text="Uncertainty bands", variable=self.show_uncertainty, command=self.plot_biofilm)
+        chk_uncertainty.grid(row=7, column=4, padx=40, pady=5, sticky=tkinter.E)
+       
+        # create plot
+        self.biofilm_view = None
+
+    def create_tab2(self):
+        """Creates tab for planktonic bacteria growth plot."""
+
+        # current parameters
+        self.plotted_bacteria = tkinter.StringVar(self, 'P. aeruginosa')
+
+        # create frames
+        self.tab2_top_frame = ttk.Frame(self.tab2)
+        self.tab2_top_frame.grid(row=0, column=0)
+        self.tab2_bottom_frame = ttk.Frame(self.tab2)
+        self.tab2_bottom_frame.grid(row=1, column=0)
+
+        # create widgets
+
+            # frame title
+        lbl_title2 = ttk.Label(self.tab2_top_frame, text="Planktonic Bacteria Growth", style='my.TLabel')
+        lbl_title2.grid(row=0, column=50, padx=0, pady=20)
+    
+            # panktonic bacteria menu
+        self.menu_pltbacteria = StrainPicker(self.tab2_bottom_frame, self.strains, self.plotted_bacteria, command=self.plot_bacteria)
+        self.menu_pltbacteria.grid(row=3, column=0, padx=40, pady=10, sticky=tkinter.W)
+
+        # create plot
+        self.bacteria_view = None
+
+    def create_tab3(self):
+        """Creates tab for entering data for a new bacteria."""
+        
+        # current values
+        self.new_bacteria = tkinter.StringVar(self)
+        self.start_time = tkinter.StringVar(self, '0')
+        self.end_time = tkinter.StringVar(self, '8')
+        self.input_data = tkinter.StringVar(self)
+        self.live_text = tkinter.StringVar(self, '')
+        self.live = None
+            
+        # create frames
+        self.tab3_frame = ttk.Frame(self.tab3)
+        self.tab3_frame.grid(row=5, column=0)
+
+        # create widgets
+
+            # frame title
+        lbl_title3 = ttk.Label(self.tab3_frame, text="Data Input for Bacteria Growth", style='my.TLabel')
+        lbl_title3.grid(row=0, column=0, columnspan=2, padx=40, pady=20)
+
+            # new bacteria information
+        lbl_newbacteria = ttk.Label(self.tab3_frame, text="New bacteria:") #, style='my.TLabel')
+        lbl_newbacteria.grid(row=1, column=0, padx=40, pady=0, sticky=tkinter.W)
+            # bacteria name
+        ent_newbacteria = ttk.Entry(self.tab3_frame, textvariable=self.new_bacteria)
+        ent_newbacteria.grid(row=2, column=0, padx=40, pady=5, sticky=tkinter.W)
+            # start time (hours)
+        lbl_starttime = ttk.Label(self.tab3_frame, text="Start time: (hour)")
+        lbl_starttime.grid(row=3, column=0, padx=40, pady=0, sticky=tkinter.W)
+        self.ent_starttime = ttk.Entry(self.tab3_frame, textvariable=self.start_time)
+        self.ent_starttime.grid(row=4, column=0, padx=40, pady=5, sticky=tkinter.W)
+            # end time
+        lbl_endtime = ttk.Label(self.tab3_frame, text="End time: (hour)")
+        lbl_endtime.grid(row=5, column=0, padx=40, pady=0, sticky=tkinter.W)
+        self.ent_endtime = ttk.Entry(self.tab3_frame, textvariable=self.end_time)
+        self.ent_endtime.grid(row=6, column=0, padx=40, pady=5, sticky=tkinter.W)
+            #data points
+        lbl_data = ttk.Label(self.tab3_frame, text="Data:")
+        lbl_data.grid(row=1, column=2, padx=40, pady=0, sticky=tkinter.W)
+        self.ent_data = scrolledtext.ScrolledText(self.tab3_frame, height=6, width=24, wrap=tkinter.WORD)
+        self.ent_data.grid(row=2, rowspan=4, column=2, padx=40, pady=10, sticky=tkinter.E)
+
+            # add bacteria button
+        btn_addbacteria = ttk.Button(self.tab3_frame, text="Add Bacteria", style='my.TButton', command=self.add_bacteria)
+        btn_addbacteria.grid(row=8, column=2, padx=40, pady=5, sticky=tkinter.E)
+
+            # import plate reader export button
+        btn_import = ttk.Button(self.tab3_frame, text="Import File", style='my.TButton', command=self.import_plate)
+        btn_import.grid(row=8, column=0, padx=40, pady=5, sticky=tkinter.W)
+
+            # follow a file that a plate reader is still writing
+        self.btn_follow = ttk.Button(self.tab3_frame, text="Follow File", command=self.follow_plate)
+        self.btn_follow.grid(row=9, column=0, padx=40, pady=5, sticky=tkinter.W)
+        lbl_live = ttk.Label(self.tab3_frame, textvariable=self.live_text)
+        lbl_live.grid(row=10, column=0, columnspan=3, padx=40, pady=0, sticky=tkinter.W)
+
+            # help button for data entry syntax
+        self.button_showinfo = ttk.Button(self.tab3_frame, text="Help", command=self.popup_showinfo)
+        self.button_showinfo.grid(row=6, column=2, padx=40, pady=5, sticky=tkinter.E)        
+
+            # secret
+        self.button_bonus = ttk.Button(self.tab3_frame, text="Bonus", command=self.popup_bonus)
+        self.button_bonus.grid(row=50, column=2, padx=40, pady=(310, 0), sticky=tkinter.E)
+
+    def create_tab4(self):
+        """Creates tab for the dose response sweep over concentrations and MICs."""
+
+        # current parameters
+        self.sweep_bacteria = tkinter.StringVar(self, 'P. aeruginosa')
+        self.sweep_metric = tkinter.StringVar(self, 'final')
+        self.sweep_maxconc = tkinter.StringVar(self, '10')
+        self.sweep_maxMIC = tkinter.StringVar(self, '10')
+        self.sweep_points = tkinter.StringVar(self, '200')
+        self.sweep = None
+        self.sweep_futures = {}
+        self.sweep_executor = None
+        self.sweep_canvas = None
+
+        # create frames
+        self.tab4_top_frame = ttk.Frame(self.tab4)
+        self.tab4_top_frame.grid(row=0, column=0)
+        self.tab4_middle_frame = ttk.Frame(self.tab4)
+        self.tab4_middle_frame.grid(row=1, column=0)
+        self.tab4_bottom_frame = ttk.Frame(self.tab4)
+        self.tab4_bottom_frame.grid(row=2, column=0)
+
+        # create widgets
+
+            # frame title
+        lbl_title4 = ttk.Label(self.tab4_top_frame, text="Antibiotic Dose Response", style='my.TLabel')
+        lbl_title4.grid(row=0, column=0, padx=0, pady=20)
+
+            # bacteria and metric menus
+        self.menu_sweepbacteria = StrainPicker(self.tab4_middle_frame, self.strains, self.sweep_bacteria, command=self.plot_sweep)
+        self.menu_sweepbacteria.grid(row=5, column=0, padx=40, pady=10, sticky=tkinter.W)
+        metric_options = list(sweep.METRICS.keys())
+        menu_metric = ttk.OptionMenu(self.tab4_middle_frame, self.sweep_metric, metric_options[0], *metric_options, command=self.plot_sweep)
+        menu_metric.grid(row=5, column=1, padx=40, pady=10, sticky=tkinter.E)
+
+            # grid text boxes
+        lbl_maxconc = ttk.Label(self.tab4_bottom_frame, width=28, text="Max antibiotic conc: (µg/ml)")
+        lbl_maxconc.grid(row=6, column=0, padx=40, pady=0, sticky=tkinter.W)
+        ent_maxconc = ttk.Entry(self.tab4_bottom_frame, width=20, textvariable=self.sweep_maxconc)
+        ent_maxconc.grid(row=7, column=0, padx=40, pady=5, sticky=tkinter.W)
+        lbl_maxMIC = ttk.Label(self.tab4_bottom_frame, width=28, text="Max antibiotic MIC: (µg/ml)")
+        lbl_maxMIC.grid(row=6, column=3, padx=0, pady=0, sticky=tkinter.W)
+        ent_maxMIC = ttk.Entry(self.tab4_bottom_frame, width=20, textvariable=self.sweep_maxMIC)
+        ent_maxMIC.grid(row=7, column=3, padx=0, pady=5, sticky=tkinter.W)
+        lbl_points = ttk.Label(self.tab4_bottom_frame, width=20, text="Grid size:")
+        lbl_points.grid(row=10, column=0, padx=40, pady=0, sticky=tkinter.W)
+        ent_points = ttk.Entry(self.tab4_bottom_frame, width=20, textvariable=self.sweep_points)
+        ent_points.grid(row=11, column=0, padx=40, pady=5, sticky=tkinter.W)
+
+            # run button
+        btn_sweep = ttk.Button(self.tab4_bottom_frame, text="Run Sweep", style='my.TButton', command=self.run_sweep)
+        btn_sweep.grid(row=11, column=3, padx=0, pady=5, sticky=tkinter.W)
+
+    def create_tab5(self):
+        """Creates tab for comparing dosing schedules."""
+
+        # current parameters
+        self.dosing_bacteria = tkinter.StringVar(self, 'P. aeruginosa')
+        self.dosing_metric = tkinter.StringVar(self, 'auc')
+        self.dosing_amounts = tkinter.StringVar(self, '0.5, 1, 2, 4')
+        self.dosing_intervals = tkinter.StringVar(self, '6, 8, 12, 24')
+        self.dosing_halflife = tkinter.StringVar(self, '4')
+        self.dosing_infusion = tkinter.StringVar(self, '0')
+        self.comparison = None
+        self.dosing_futures = {}
+        self.dosing_canvas = None
+
+        # create frames
+        self.tab5_top_frame = ttk.Frame(self.tab5)
+        self.tab5_top_frame.grid(row=0, column=0)
+        self.tab5_middle_frame = ttk.Frame(self.tab5)
+        self.tab5_middle_frame.grid(row=1, column=0)
+        self.tab5_bottom_frame = ttk.Frame(self.tab5)
+        self.tab5_bottom_frame.grid(row=2, column=0)
+
+        # create widgets
+
+            # frame title
+        lbl_title5 = ttk.Label(self.tab5_top_frame, text="Dosing Schedules", style='my.TLabel')
+        lbl_title5.grid(row=0, column=0, padx=0, pady=20)
+
+            # bacteria and metric menus
+        self.menu_dosebacteria = StrainPicker(self.tab5_middle_frame, self.strains, self.dosing_bacteria)
+        self.menu_dosebacteria.grid(row=5, column=0, padx=40, pady=10, sticky=tkinter.W)
+        metric_options = list(dosing.METRICS.keys())
+        menu_metric = ttk.OptionMenu(self.tab5_middle_frame, self.dosing_metric, 'auc', *metric_options, command=self.update_dosing)
+        menu_metric.grid(row=5, column=1, padx=40, pady=10, sticky=tkinter.E)
+
+            # schedule text boxes
+        lbl_amounts = ttk.Label(self.tab5_bottom_frame, width=28, text="Doses: (µg/ml)")
+        lbl_amounts.grid(row=6, column=0, padx=40, pady=0, sticky=tkinter.W)
+        ent_amounts = ttk.Entry(self.tab5_bottom_frame, width=20, textvariable=self.dosing_amounts)
+        ent_amounts.grid(row=7, column=0, padx=40, pady=5, sticky=tkinter.W)
+        lbl_intervals = ttk.Label(self.tab5_bottom_frame, width=28, text="Dosing intervals: (hours)")
+        lbl_intervals.grid(row=6, column=3, padx=0, pady=0, sticky=tkinter.W)
+        ent_intervals = ttk.Entry(self.tab5_bottom_frame, width=20, textvariable=self.dosing_intervals)
+        ent_intervals.grid(row=7, column=3, padx=0, pady=5, sticky=tkinter.W)
+        lbl_halflife = ttk.Label(self.tab5_bottom_frame, width=28, text="Half-life: (hours)")
+        lbl_halflife.grid(row=10, column=0, padx=40, pady=0, sticky=tkinter.W)
+        ent_halflife = ttk.Entry(self.tab5_bottom_frame, width=20, textvariable=self.dosing_halflife)
+        ent_halflife.grid(row=11, column=0, padx=40, pady=5, sticky=tkinter.W)
+        lbl_infusion = ttk.Label(self.tab5_bottom_frame, width=28, text="Infusion time: (hours)")
+        lbl_infusion.grid(row=10, column=3, padx=0, pady=0, sticky=tkinter.W)
+        ent_infusion = ttk.Entry(self.tab5_bottom_frame, width=20, textvariable=self.dosing_infusion)
+        ent_infusion.grid(row=11, column=3, padx=0, pady=5, sticky=tkinter.W)
+
+            # run button
+        btn_compare = ttk.Button(self.tab5_bottom_frame, text="Compare", style='my.TButton', command=self.run_dosing)
+        btn_compare.grid(row=11, column=4, padx=40, pady=5, sticky=tkinter.W)
+
+    def create_tab6(self):
+        """Creates tab for depth profiles of biofilm and antibiotic."""
+
+        # current parameters
+        self.depth_bacteria = tkinter.StringVar(self, 'P. aeruginosa')
+        self.depth_initialstate = tkinter.StringVar(self, '1.0')
+        self.depth_thickness = tkinter.StringVar(self, '100')
+        self.depth_cells = tkinter.StringVar(self, '200')
+        self.depth_diffusion = tkinter.StringVar(self, '100')
+        self.depth_binding = tkinter.StringVar(self, '500')
+        self.depth_text = tkinter.StringVar(self, '')
+        self.depth_canvas = None
+
+        # create frames
+        self.tab6_top_frame = ttk.Frame(self.tab6)
+        self.tab6_top_frame.grid(row=0, column=0)
+        self.tab6_middle_frame = ttk.Frame(self.tab6)
+        self.tab6_middle_frame.grid(row=1, column=0)
+        self.tab6_bottom_frame = ttk.Frame(self.tab6)
+        self.tab6_bottom_frame.grid(row=2, column=0)
+
+        # create widgets
+
+            # frame title
+        lbl_title6 = ttk.Label(self.tab6_top_frame, text="Antibiotic Penetration", style='my.TLabel')
+        lbl_title6.grid(row=0, column=0, padx=0, pady=20)
+
+            # bacteria menu and result summary
+        self.menu_depthbacteria = StrainPicker(self.tab6_middle_frame, self.strains, self.depth_bacteria)
+        self.menu_depthbacteria.grid(row=5, column=0, padx=40, pady=10, sticky=tkinter.W)
+        lbl_summary = ttk.Label(self.tab6_middle_frame, textvariable=self.depth_text)
+        lbl_summary.grid(row=5, column=1, padx=40, pady=10, sticky=tkinter.E)
+
+            # biofilm text boxes
+        lbl_initialstate = ttk.Label(self.tab6_bottom_frame, width=28, text="Initial biofilm: (OD)")
+        lbl_initialstate.grid(row=6, column=0, padx=40, pady=0, sticky=tkinter.W)
+        ent_initialstate = ttk.Entry(self.tab6_bottom_frame, width=20, textvariable=self.depth_initialstate)
+        ent_initialstate.grid(row=7, column=0, padx=40, pady=5, sticky=tkinter.W)
+        lbl_thickness = ttk.Label(self.tab6_bottom_frame, width=28, text="Thickness: (µm)")
+        lbl_thickness.grid(row=6, column=3, padx=0, pady=0, sticky=tkinter.W)
+        ent_thickness = ttk.Entry(self.tab6_bottom_frame, width=20, textvariable=self.depth_thickness)
+        ent_thickness.grid(row=7, column=3, padx=0, pady=5, sticky=tkinter.W)
+        lbl_cells = ttk.Label(self.tab6_bottom_frame, width=28, text="Grid cells:")
+        lbl_cells.grid(row=6, column=4, padx=0, pady=0, sticky=tkinter.W)
+        ent_cells = ttk.Entry(self.tab6_bottom_frame, width=20, textvariable=self.depth_cells)
+        ent_cells.grid(row=7, column=4, padx=0, pady=5, sticky=tkinter.W)
+
+            # antibiotic text boxes
+        lbl_diffusion = ttk.Label(self.tab6_bottom_frame, width=28, text="Antibiotic diffusion: (µm²/s)")
+        lbl_diffusion.grid(row=10, column=0, padx=40, pady=0, sticky=tkinter.W)
+        ent_diffusion = ttk.Entry(self.tab6_bottom_frame, width=20, textvariable=self.depth_diffusion)
+        ent_diffusion.grid(row=11, column=0, padx=40, pady=5, sticky=tkinter.W)
+        lbl_binding = ttk.Label(self.tab6_bottom_frame, width=28, text="Binding rate: (1/hour/OD)")
+        lbl_binding.grid(row=10, column=3, padx=0, pady=0, sticky=tkinter.W)
+        ent_binding = ttk.Entry(self.tab6_bottom_frame, width=20, textvariable=self.depth_binding)
+        ent_binding.grid(row=11, column=3, padx=0, pady=5, sticky=tkinter.W)
+
+            # run button
+        btn_depth = ttk.Button(self.tab6_bottom_frame, text="Run", style='my.TButton', command=self.run_depth)
+        btn_depth.grid(row=11, column=4, padx=0, pady=5, sticky=tkinter.W)
+
+    def process_pool(self):
+        """Returns the process pool shared by sweeps and schedule comparisons, creating it on first use."""
+        if self.sweep_executor is None:
+            self.sweep_executor = ProcessPoolExecutor()
+        return self.sweep_executor
+
+    def draw_plots(self):
+        """
+        Creates the plots on tabs 1 and 2 once the window has been drawn,
+        so the window appears before the first solve and plot finish.
+        """
+        self.update_idletasks()
+        self.timings['first_paint'] = time.perf_counter() - STARTED
+        self.plot_biofilm()
+        self.plot_bacteria()
+
+    def plot_biofilm(self, *args):
+        """
+        Plots biofilm growth using a Model object.
+        Called when any entry box on tab 1 is updated.
+        """
+        # get parameters, convert to floats
+        try:
+            bacteria = self.selected_bacteria.get()
+            growth_rate = self.strains.rate(bacteria)
+            init_conditions = float(self.selected_initialstate.get())
+            max_value = float(self.selected_maxvalue.get())
+            MIC = float(self.antibiotic_MIC.get())
+            conc = float(self.antibiotic_conc.get())
+            horizon = float(self.horizon.get())
+            resolution = float(self.resolution.get()) / 60
+        except ValueError:
+            tkinter.messagebox.showerror("Input Error", "Please enter digits.")
+            return
+        if not (horizon > 0 and resolution > 0):
+            tkinter.messagebox.showerror("Input Error", "The duration and time step must be positive.")
+            return
+
+        uncertain = self.show_uncertainty.get()
+        t_points, y_data = self.strains.series(bacteria) if uncertain else (None, None)
+
+        def solve():
+            m = model.Model(growth_rate, init_conditions, max_value, MIC, conc, solver='analytic',
+                            horizon=horizon, resolution=resolution)
+            if not uncertain:
+                return m, None
+            # standard error of the growth rate from the fit to the bacteria data
+            p = plotter.Plotter(t_points, y_data)
+            p.fit()
+            # at most about 200 time points for the bands, they are interpolated onto the line
+            return m, uncertainty.Uncertainty(growth_rate, p.stderr(), init_conditions, max_value, MIC, conc,
+                                              horizon=horizon, resolution=max(resolution, horizon / 200))
+
+        # solve in the background, a newer request replaces this one
+        self.worker.submit('biofilm', solve, self.show_biofilm)
+
+    def show_biofilm(self, result):
+        """
+        Shows the solution of a Model object on tab 1, with the percentile
+        bands of an Uncertainty object if one was computed.
+        """
+        m, u = result
+        bands = u.band_pairs() if u is not None else ()
+        if bands and u.t.size != m.t.size:
+            bands = [(np.interp(m.t, u.t, lower), np.interp(m.t, u.t, upper)) for lower, upper in bands]
+
+        # update the line in place, creating the figure on the first call
+        if self.biofilm_view is not None:
+            self.biofilm_view.update(m.t, m.y, bands)
+            return
+        self.biofilm_view = FigureView(m.figure(), self.middle_frame)
+        if bands:
+            self.biofilm_view.update(m.t, m.y, bands)
+        with profiler.span('tk.layout'):
+            self.biofilm_view.widget().grid(row=1, column=0, columnspan=2, padx=40)
+            if profiler.enabled:
+                self.update_idletasks()
+        self.timings['first_plot'] = time.perf_counter() - STARTED
+
+    def plot_bacteria(self, *args):
+        """
+        Plots bacteria growth using a Plotter object.
+        Called when the selected bacteria on tab 2 is changed.
+        """
+        # get values to plot
+        t_span, y_data = self.strains.series(self.plotted_bacteria.get())
+
+        self.worker.submit('bacteria', lambda: plotter.Plotter(t_span, y_data), self.show_bacteria)
+
+    def show_bacteria(self, p):
+        """Shows the data of a Plotter object on tab 2."""
+        # update the points in place, creating the figure on the first call
+        if self.bacteria_view is not None:
+            self.bacteria_view.update(p.t, p.datapoints)
+            return
+        self.bacteria_view = FigureView(p.figure(), self.tab2_bottom_frame)
+        with profiler.span('tk.layout'):
+            self.bacteria_view.widget().grid(row=1, column=0, columnspan=2, padx=40, pady=0)
+            if profiler.enabled:
+                self.update_idletasks()
+
+
+    def run_sweep(self):
+        """
+        Starts a dose response sweep over all bacteria in a process pool.
+        Called when the run button on tab 4 is pressed.
+        """
+        # get parameters, convert to numbers
+        try:
+            init_conditions = float(self.selected_initialstate.get())
+            max_value = float(self.selected_maxvalue.get())
+            max_conc = float(self.sweep_maxconc.get())
+            max_MIC = float(self.sweep_maxMIC.get())
+            points = int(self.sweep_points.get())
+        except ValueError:
+            tkinter.messagebox.showerror("Input Error", "Please enter digits.")
+            return
+
+        # drop chunks of a sweep that is still running
+        for future in self.sweep_futures:
+            future.cancel()
+        self.sweep = sweep.Sweep(self.strains.growth_rates(), np.linspace(0, max_conc, points),
+                                 np.linspace(0, max_MIC, points), init_conditions, max_value)
+        self.sweep_futures = self.sweep.submit(self.process_pool())
+        self.plot_sweep()
+        self.after(50, self.poll_sweep, self.sweep)
+
+    def poll_sweep(self, current):
+        """
+        Stores the chunks of the sweep that have finished and updates the
+        heatmap, until every chunk is done.
+        """
+        if current is not self.sweep:
+            return
+        done = [future for future in self.sweep_futures if future.done()]
+        for future in done:
+            bacteria, rows = self.sweep_futures.pop(future)
+            self.sweep.store(bacteria, rows, future.result())
+        if done:
+            self.update_sweep()
+        if self.sweep_futures:
+            self.after(50, self.poll_sweep, current)
+
+    def plot_sweep(self, *args):
+        """
+        Plots a heatmap of the selected metric using the current Sweep object.
+        Called when the bacteria or metric on tab 4 is changed.
+        """
+        if self.sweep is None or self.sweep_bacteria.get() not in self.sweep.results:
+            return
+
+        # create the figure on the first call, afterwards reuse its canvas
+        if self.sweep_canvas is None:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            fig = self.sweep.figure(self.sweep_bacteria.get(), self.sweep_metric.get())
+            self.sweep_canvas = FigureCanvasTkAgg(fig, master=self.tab4_middle_frame)
+            self.sweep_canvas.get_tk_widget().grid(row=1, column=0, columnspan=2, padx=40)
+        image = self.sweep_canvas.figure.axes[0].images[0]
+        image.set_extent((self.sweep.mics[0], self.sweep.mics[-1],
+                          self.sweep.concs[0], self.sweep.concs[-1]))
+        image.colorbar.set_label(sweep.METRICS[self.sweep_metric.get()])
+        self.update_sweep()
+
+    def update_sweep(self):
+        """Updates the heatmap on tab 4 in place with the results computed so far."""
+        if self.sweep_canvas is None or self.sweep_bacteria.get() not in self.sweep.results:
+            return
+        values = self.sweep.results[self.sweep_bacteria.get()][self.sweep_metric.get()]
+        image = self.sweep_canvas.figure.axes[0].images[0]
+        image.set_data(values)
+        if np.isfinite(values).any():
+            image.set_clim(np.nanmin(values), np.nanmax(values))
+        self.sweep_canvas.draw_idle()
+
+    def run_dosing(self):
+        """
+        Starts comparing every combination of the entered doses and dosing
+        intervals in a process pool, using the biofilm parameters of tab 1.
+        Called when the compare button on tab 5 is pressed.
+        """
+        # get parameters, convert to numbers
+        try:
+            growth_rate = self.strains.rate(self.dosing_bacteria.get())
+            init_conditions = float(self.selected_initialstate.get())
+            max_value = float(self.selected_maxvalue.get())
+            MIC = float(self.antibiotic_MIC.get())
+            horizon = float(self.horizon.get())
+            resolution = float(self.resolution.get()) / 60
+            amounts = [float(value) for value in self.dosing_amounts.get().split(',')]
+            intervals = [float(value) for value in self.dosing_intervals.get().split(',')]
+            half_life = float(self.dosing_halflife.get())
+            infusion = float(self.dosing_infusion.get())
+            schedules = [dosing.Schedule.repeated(amount, interval, horizon, half_life, infusion)
+                         for amount in amounts for interval in intervals]
+        except ValueError:
+            tkinter.messagebox.showerror("Input Error", "Please enter digits, separating doses and intervals with commas.")
+            return
+        if not (horizon > 0 and resolution > 0):
+            tkinter.messagebox.showerror("Input Error", "The duration and time step must be positive.")
+            return
+
+        # drop schedules of a comparison that is still running
+        for future in self.dosing_futures:
+            future.cancel()
+        # at most about 2000 time points per schedule
+        self.comparison = dosing.Comparison(schedules, growth_rate, init_conditions, max_value, MIC,
+                                            horizon, max(resolution, horizon / 2000))
+        self.dosing_futures = self.comparison.submit(self.process_pool())
+        self.after(50, self.poll_dosing, self.comparison)
+
+    def poll_dosing(self, current):
+        """
+        Stores the schedules of the comparison that have finished and updates
+        the plot, until every schedule is done.
+        """
+        if current is not self.comparison:
+            return
+        done = [future for future in self.dosing_futures if future.done()]
+        for future in done:
+            i = self.dosing_futures.pop(future)
+            self.comparison.store(i, future.result())
+        if done:
+            self.update_dosing()
+        if self.dosing_futures:
+            self.after(100, self.poll_dosing, current)
+
+    def update_dosing(self, *args):
+        """
+        Plots the schedules compared so far on tab 5, highlighting the best
+        one for the selected metric.
+        """
+        if self.comparison is None:
+            return
+        # create the canvas on the first call, afterwards redraw its figure
+        if self.dosing_canvas is None:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.dosing_canvas = FigureCanvasTkAgg(self.comparison.figure(), master=self.tab5_middle_frame)
+            self.dosing_canvas.get_tk_widget().grid(row=1, column=0, columnspan=2, padx=40)
+        self.comparison.figure(self.dosing_canvas.figure, self.dosing_metric.get())
+        self.dosing_canvas.draw_idle()
+
+    def run_depth(self):
+        """
+        Solves a DepthModel in the background with the MIC, concentration,
+        maximum value and duration of tab 1.
+        Called when the run button on tab 6 is pressed.
+        """
+        # get parameters, convert to numbers
+        try:
+            growth_rate = self.strains.rate(self.depth_bacteria.get())
+            init_conditions = float(self.depth_initialstate.get())
+            max_value = float(self.selected_maxvalue.get())
+            MIC = float(self.antibiotic_MIC.get())
+            conc = float(self.antibiotic_conc.get())
+            horizon = float(self.horizon.get())
+            thickness = float(self.depth_thickness.get())
+            cells = int(self.depth_cells.get())
+            # entered per second, the model uses hours
+            diffusion = float(self.depth_diffusion.get()) * 3600
+            binding = float(self.depth_binding.get())
+        except ValueError:
+            tkinter.messagebox.showerror("Input Error", "Please enter digits.")
+            return
+
+        def solve():
+            return spatial.DepthModel(growth_rate, init_conditions, max_value, MIC, conc, thickness, cells,
+                                      diffusion, binding, horizon=horizon, resolution=horizon / 100)
+
+        def depth_error(error):
+            self.depth_text.set('')
+            tkinter.messagebox.showerror("Input Error", str(error))
+
+        self.depth_text.set('Solving...')
+        self.worker.submit('depth', solve, self.show_depth, depth_error)
+
+    def show_depth(self, m):
+        """Shows the depth profiles of a DepthModel object on tab 6."""
+        self.depth_text.set(f"After {m.t[-1]:g} h: biofilm {m.total()[-1]:.3g} OD, "
+                            f"antibiotic at the bottom {m.penetration()[-1]:.1%} of the bulk")
+        # create the canvas on the first call, afterwards redraw its figure
+        if self.depth_canvas is None:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.depth_canvas = FigureCanvasTkAgg(m.figure(), master=self.tab6_middle_frame)
+            self.depth_canvas.get_tk_widget().grid(row=1, column=0, columnspan=2, padx=40)
+            return
+        m.figure(self.depth_canvas.figure)
+        self.depth_canvas.draw_idle()
+
+    def add_bacteria(self):
+        """
+        Takes bacteria, time points, and data entry from tab3, and adds it to the
+        strain registry of the App class, which the bacteria menus choose from.
+        """
+        # get entered data
+        bacteria = self.new_bacteria.get()
+        if bacteria == '':
+            tkinter.messagebox.showwarning("Warning", "Please enter bacteria name." )
+            return
+
+        input_data = self.ent_data.get('1.0', tkinter.END)
+        
+        # add data and growth rate to the strain registry
+        self.add_data(bacteria, input_data)
+
+    def update_menus(self):
+        """
+        Shows bacteria added to the strain registry in a bacteria menu that is
+        open. Closed menus read the registry when they are opened.
+        """
+        for menu in (self.menu_pltbacteria, self.menu_bacteria, self.menu_sweepbacteria,
+                     self.menu_dosebacteria, self.menu_depthbacteria):
+            menu.refresh()
+
+    def add_data(self, bacteria, input):
+        """
+        Parses the data entered in tab 3 and adds it to the strain registry of
+        the App class once its growth rate has been fit in the background.
+        """
+        # create time points from start and end time entries
+        try:
+            t_0 = int(self.ent_starttime.get())
+            t_n = int(self.ent_endtime.get())
+            t_points = np.linspace(t_0, t_n, t_n+1)
+        except ValueError:
+            tkinter.messagebox.showerror("Input Error", "Please enter digits for start and end times.")
+            return
+
+        # parse text from data text box
+        try:
+            y_data = importer.parse_values(input)
+        except ValueError:
+            tkinter.messagebox.showerror("Data Error", "Syntax error in data input.")
+            return
+
+        def fit_error(error):
+            if not isinstance(error, ValueError):
+                raise error
+            tkinter.messagebox.showerror("Data Error", "Not enough entries in data input.")
+
+        def save(new_rate):
+            # save data and growth rate to the strain registry
+            self.strains.add(bacteria, new_rate, t_points, y_data)
+            if self.library is not None:
+                self.library.append(bacteria, new_rate, t_points, y_data)
+            self.update_menus()
+
+        # fit growth rate in the background
+        p = plotter.Plotter(t_points, y_data)
+        self.worker.submit('fit ' + bacteria, p.fit, save, fit_error)
+
+    def import_plate(self):
+        """
+        Imports a CSV or TSV export of a plate reader chosen in a file dialog,
+        fits the growth rate of every well in the background and adds each
+        well as a bacteria named after the file and the well.
+        """
+        path = filedialog.askopenfilename(title="Import plate reader export", filetypes=[
+            ("Plate reader exports", "*.csv *.tsv *.txt"), ("All files", "*.*")])
+        if not path:
+            return
+        prefix = os.path.splitext(os.path.basename(path))[0]
+
+        def read_and_fit():
+            with profiler.span('read_plate'):
+                t, wells, data = importer.read_plate(path)
+            with profiler.span('fit_growth_rates'):
+                return t, wells, data, plotter.fit_growth_rates(t, data)
+
+        def import_error(error):
+            if not isinstance(error, (OSError, ValueError)):
+                raise error
+            tkinter.messagebox.showerror("Import Error", str(error))
+
+        self.worker.submit('import', read_and_fit, lambda result: self.add_plate(prefix, *result), import_error)
+
+    def add_plate(self, prefix, t, wells, data, fits):
+        """
+        Adds every well of an imported plate whose growth rate could be fit to
+        the strain registry of the App class, and updates the menus once.
+        """
+        added = []
+        for well, y_data, k_b, rss in zip(wells, data, fits['k_b'], fits['rss']):
+            if not np.isfinite(rss):
+                continue
+            added.append((f"{prefix} {well}", k_b, t, y_data))
+        self.strains.extend(added)
+        if self.library is not None:
+            self.library.extend(added)
+        self.update_menus()
+        tkinter.messagebox.showinfo("Import", f"Added {len(added)} of {len(wells)} wells from {prefix}.")
+
+    def follow_plate(self):
+        """
+        Follows a plate reader export chosen in a file dialog while the
+        reader appends to it, adding every well as a bacteria whose data and
+        growth rate are updated with every new reading. Pressing the button
+        again stops following and saves the wells to the strain library.
+        """
+        if self.live is not None:
+            self.stop_live()
+            return
+        path = filedialog.askopenfilename(title="Follow plate reader export", filetypes=[
+            ("Plate reader exports", "*.csv *.tsv *.txt"), ("All files", "*.*")])
+        if not path:
+            return
+        self.live = live.LivePlate(path)
+        self.live_prefix = os.path.splitext(os.path.basename(path))[0]
+        self.btn_follow.config(text="Stop Following")
+        self.poll_live(self.live)
+
+    def poll_live(self, current):
+        """Reads new readings of the followed file in the background, then polls again after a while."""
+        if current is not self.live:
+            return
+
+        def live_error(error):
+            if not isinstance(error, (OSError, ValueError)):
+                raise error
+            self.stop_live()
+            tkinter.messagebox.showerror("Follow Error", str(error))
+
+        def done(count):
+            self.show_live(current, count)
+            self.after(LIVE_POLL_MS, self.poll_live, current)
+
+        self.worker.submit('live', current.poll, done, live_error)
+
+    def show_live(self, current, count):
+        """
+        Updates the data and growth rates of the followed wells, and appends
+        the new readings to the plot on tab 2 if it shows one of them.
+        """
+        if current is not self.live or not current.wells:
+            return
+        t, data = current.readings()
+        new_wells = f"{self.live_prefix} {current.wells[0]}" not in self.strains
+        shown = self.plotted_bacteria.get()
+        for i, well in enumerate(current.wells):
+            bacteria = f"{self.live_prefix} {well}"
+            # keep the last growth rate while there are too few readings for a new one
+            k_b = current.k_b[i]
+            if not np.isfinite(k_b) and bacteria in self.strains:
+                k_b = self.strains.rate(bacteria)
+            self.strains.add(bacteria, k_b, t, data[i])
+            if bacteria == shown and count and self.bacteria_view is not None:
+                self.bacteria_view.append(t[-count:], data[i, -count:])
+        if new_wells:
+            self.update_menus()
+        self.live_text.set(f"Following {self.live_prefix}: {len(current.wells)} wells, {t.size} readings")
+
+    def stop_live(self):
+        """Stops following the plate reader export and saves the wells with a growth rate to the library."""
+        current, self.live = self.live, None
+        self.btn_follow.config(text="Follow File")
+        self.live_text.set('')
+        if current is None or self.library is None or not current.wells:
+            return
+        t, data = current.readings()
+        self.library.extend((f"{self.live_prefix} {well}", float(k_b), t.copy(), data[i].copy())
+                            for i, (well, k_b) in enumerate(zip(current.wells, current.k_b)) if np.isfinite(k_b))
+
+    def show_busy(self, busy):
+        """
+        Shows the busy indicator when background computations take longer than
+        100 ms, and hides it when they are done.
+        """
+        if not busy:
+            self.busy_text.set('')
+            return
+        self.after(100, lambda: self.busy_text.set('Computing...') if self.worker.busy() else None)
+
+    def popup_showinfo(self):
+        """Displays help informations for data entry text box."""
+        help_text = (
+            "Please enter OD measurements of bacteria growth taken at "
+            "equally spaced intervals. Enter data points in the text box, "
+            "either one value per line, as a space-separated list, or as "
+            "a comma-separated list."
+        )
+        tkinter.messagebox.showinfo("Data information", help_text)
+
+    def popup_diagnostics(self):
+        """
+        Opens a window with timing percentiles of the solves, fits, figure
+        builds, draws and parsing, and the counters of the result cache and
+        the background worker. Profiling can be switched on and off there,
+        and the recorded spans exported.
+        """
+        win = tkinter.Toplevel()
+        win.wm_title("Diagnostics")
+
+        enabled = tkinter.BooleanVar(win, profiler.enabled)
+        def toggle():
+            profiler.enabled = enabled.get()
+        chk = ttk.Checkbutton(win, text="Enable profiling", variable=enabled, command=toggle)
+        chk.grid(row=0, column=0, padx=10, pady=5, sticky=tkinter.W)
+
+        stats_text = tkinter.StringVar(win)
+        lbl = ttk.Label(win, textvariable=stats_text, font=('Courier', 10), justify=tkinter.LEFT)
+        lbl.grid(row=1, column=0, columnspan=3, padx=10, pady=5, sticky=tkinter.W)
+
+        def export(method, extension):
+            path = filedialog.asksaveasfilename(parent=win, defaultextension=extension)
+            if path:
+                method(path)
+        b = ttk.Button(win, text="Export JSON lines", command=lambda: export(profiler.export_jsonl, '.jsonl'))
+        b.grid(row=2, column=0, padx=10, pady=5)
+        b = ttk.Button(win, text="Export Chrome trace", command=lambda: export(profiler.export_chrome, '.json'))
+        b.grid(row=2, column=1, padx=10, pady=5)
+        b = ttk.Button(win, text="Reset", command=profiler.reset)
+        b.grid(row=2, column=2, padx=10, pady=5)
+
+        def refresh():
+            if not win.winfo_exists():
+                return
+            lines = [f"{'span':18}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+            for name, s in sorted(profiler.stats().items()):
+                lines.append(f"{name:18}{s['count']:7d}{s['p50']:10.3f}{s['p95']:10.3f}{s['p99']:10.3f}")
+            if not profiler.enabled:
+                lines.append("(profiling is off)")
+            c = cache.results.stats()
+            lines.append("")
+            lines.append(f"cache: {c['hits']} hits, {c['misses']} misses, {c['evictions']} evictions, "
+                         f"{c['entries']} entries, {c['nbytes'] / 1024:.0f} kB")
+            w = self.worker.stats()
+            lines.append(f"worker: latency p95 {w['latency_p95']:.1f} ms, UI lag p95 {w['lag_p95']:.1f} ms, "
+                         f"{w['dropped']} dropped")
+            stats_text.set("\n".join(lines))
+            win.after(500, refresh)
+        refresh()
+
+    def popup_bonus(self):
+        """Christian made me do it."""
+        win = tkinter.Toplevel()
+        win.wm_title("Bonus")
+
+        l = tkinter.Label(win, text="(つ -‘ _ ‘- )つ")
+        l.grid(row=0, column=0)
+        b = ttk.Button(win, text="Okay", command=win.destroy)
+        b.grid(row=1, column=0)
+
+    #####################################
+
+def count_widgets(widget):
+    """Counts a Tk widget and all of its descendants."""
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+def max_rss():
+    """Returns the peak resident memory of the process in kilobytes, or None if unknown."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes instead of kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def wait(app):
+    """Processes Tk events until the background computations of the App are done."""
+    while app.worker.busy():
+        app.update()
+
+def soak(app, replots, warmup=100, max_growth=10 * 1024):
+    """
+    Replots tabs 1 and 2 many times with changing parameters, and checks
+    that the peak memory of the process and the number of Tk widgets stay
+    flat after a warmup.
+
+    Returns
+    -------
+        bool : True if memory grew by less than max_growth kilobytes and no
+        widgets were added
+    """
+    bacteria = app.strains.names()
+    for i in range(warmup + replots):
+        if i == warmup:
+            wait(app)
+            rss, widgets = max_rss(), count_widgets(app.master)
+        app.antibiotic_conc.set(str(i % 50 / 10))
+        app.selected_maxvalue.set(str(1 + i % 7 / 4))
+        app.plot_biofilm()
+        app.plotted_bacteria.set(bacteria[i % len(bacteria)])
+        app.plot_bacteria()
+        app.update()
+    wait(app)
+    growth = max_rss() - rss if rss is not None else 0
+    added = count_widgets(app.master) - widgets
+    print(f"{replots} replots: peak memory grew by {growth} kB, {added} widgets added")
+    print("worker: " + ", ".join(f"{key} {value:.3g}" for key, value in app.worker.stats().items()))
+    return growth < max_growth and added == 0
+
+def report_startup(app):
+    """
+    Prints the startup timings of the App as a line of JSON, in milliseconds,
+    and closes the window once the first plot is shown.
+    """
+    if 'first_plot' not in app.timings:
+        app.after(10, report_startup, app)
+        return
+    print(json.dumps({name : round(seconds * 1000, 1) for name, seconds in app.timings.items()}))
+    app.master.destroy()
+
+if __name__ == "__main__":
+    root = tkinter.Tk()
+    root.title("Bacterial Biofilms")
+    app = App(root)
+    # python gui.py --soak [replots] checks that replotting does not leak
+    if len(sys.argv) > 1 and sys.argv[1] == '--soak':
+        replots = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+        sys.exit(0 if soak(app, replots) else 1)
+    # python gui.py --startup prints the startup timings, see coldstart.py
+    if len(sys.argv) > 1 and sys.argv[1] == '--startup':
+        report_startup(app)
+    app.mainloop()
+    
+
     
\ No newline at end of file
@@ -0,0 +1,181 @@
+# importer.py
+
+from itertools import dropwhile, islice
+import os
+import re
+
+import numpy as np
+
+import profiling
+
+# factors converting numeric time columns to hours
+TIME_UNITS = {'h' : 1.0, 'min' : 1 / 60, 's' : 1 / 3600}
+
+DURATION = re.compile(r'^(?:(\d+)\.)?(\d+):(\d{1,2})(?::(\d{1,2}(?:\.\d*)?))?$')
+
+def parse_time(text, unit='h'):
+    """
+    Converts the text of a time stamp from a plate reader export to hours.
+
+    Accepts plain numbers in the given unit, durations such as 1:05:00 or
+    1.02:30:00 (days.hours:minutes:seconds), and dates such as
+    2024-05-01 12:00:00, which are returned as hours since 1970.
+
+    Returns
+    -------
+        float : time in hours, nan if the text is not a time stamp
+    """
+    text = text.strip().strip('"')
+    try:
+        return float(text) * TIME_UNITS[unit]
+    except ValueError:
+        pass
+    match = DURATION.match(text)
+    if match:
+        days, hours, minutes, seconds = match.groups()
+        return (int(days or 0) * 24 + int(hours) + int(minutes) / 60
+                + float(seconds or 0) / 3600)
+    try:
+        return np.datetime64(text.replace(' ', 'T'), 'ms').astype(float) / 3.6e6
+    except ValueError:
+        return np.nan
+
+def parse_values(text):
+    """
+    Parses OD values typed into the data text box on tab 3, one value per
+    line, or as a space- or comma-separated list.
+
+    Returns
+    -------
+        array : the values, raises ValueError if one is not a number
+    """
+    with profiling.profiler.span('parse_values'):
+        return np.array(text.replace(',', ' ').split(), dtype=float)
+
+def read_plate(path, delimiter=None, time_unit='h', chunk_lines=65536):
+    """
+    Reads a CSV or TSV export of a plate reader, with one row per reading and
+    a time column followed by one column of OD values per well.
+
+    The file is read in chunks of lines that are parsed by numpy.loadtxt
+    straight into a growing array, so no list of values is built. Lines
+    before the header row, which is the first line starting with 'Time'
+    (or else the first line of the file), are skipped, as are temperature columns; reading stops at the first
+    blank line after the data. Values that are not numbers, e.g. OVRFLW,
+    become nan.
+
+    Parameters
+    ----------
+        path : str
+            path of the exported file
+        delimiter : str
+            column separator, by default a tab for .tsv and .txt files or
+            headers that contain tabs, and a comma otherwise
+        time_unit : str
+            unit of a numeric time column, 'h', 'min' or 's'
+        chunk_lines : int
+            number of lines parsed at once
+
+    Returns
+    -------
+        t : array
+            time points in hours, shifted so the first reading is at 0
+        wells : list
+            name of every well
+        data : array
+            OD values with one row per well and one column per time point
+    """
+    if time_unit not in TIME_UNITS:
+        raise ValueError(f"Unknown time unit {time_unit!r}, expected one of {list(TIME_UNITS)}.")
+
+    with open(path, encoding='utf-8-sig', errors='replace') as file:
+        # find the header row within the first lines, or use the first line
+        header = None
+        for line in islice(file, 100):
+            if line.lstrip().lower().startswith('time'):
+                header = line
+                break
+        if header is None:
+            file.seek(0)
+            header = file.readline()
+            if not header.strip():
+                raise ValueError(f"No header row found in {path}.")
+
+        delimiter, wells, usecols = parse_header(header, path, delimiter)
+        converters = {0 : lambda text: parse_time(text, time_unit)}
+        buffer = np.empty((1024, len(usecols)))
+        size = 0
+        done = False
+        while not done:
+            lines = list(islice(file, chunk_lines))
+            if not lines:
+                break
+            if not size:
+                # skip blank lines between the header and the data
+                lines = list(dropwhile(lambda line: not line.strip(), lines))
+            blank = next((i for i, line in enumerate(lines) if not line.strip()), None)
+            if blank is not None:
+                lines = lines[:blank]
+                done = True
+            if not lines:
+                continue
+            chunk = parse_chunk(lines, delimiter, usecols, converters)
+            while size + len(chunk) > len(buffer):
+                buffer = np.resize(buffer, (2 * len(buffer), len(usecols)))
+            buffer[size:size + len(chunk)] = chunk
+            size += len(chunk)
+
+    t = buffer[:size, 0] - buffer[0, 0] if size else np.empty(0)
+    data = np.ascontiguousarray(buffer[:size, 1:].T)
+    return t, wells, data
+
+def parse_header(header, path, delimiter=None):
+    """
+    Finds the well columns in the header row of a plate reader export,
+    leaving out the time column and temperature columns.
+
+    Parameters
+    ----------
+        header : str
+            the header row
+        path : str
+            path of the exported file, its extension decides the default delimiter
+        delimiter : str
+            column separator, chosen as in read_plate() if None
+
+    Returns
+    -------
+        delimiter : str
+            column separator
+        wells : list
+            name of every well
+        usecols : list
+            index of the time column followed by the index of every well column
+    """
+    if delimiter is None:
+        extension = os.path.splitext(path)[1].lower()
+        delimiter = '\t' if extension in ('.tsv', '.txt') or '\t' in header else ','
+    names = [name.strip().strip('"') for name in header.rstrip('\r\n').split(delimiter)]
+    columns = [i for i, name in enumerate(names[1:], 1)
+               if name and not name.lower().startswith(('temp', 't°', 't\ufffd'))]
+    wells = [names[i] for i in columns]
+    if not wells:
+        raise ValueError(f"No well columns found in {path}.")
+    return delimiter, wells, [0] + columns
+
+def parse_chunk(lines, delimiter, usecols, converters):
+    """
+    Parses lines of a plate reader export into a 2-D array, using the fast
+    numpy.loadtxt and falling back to numpy.genfromtxt, which turns invalid
+    values into nan, only for chunks that need it.
+
+    Returns
+    -------
+        array : one row per line, one column per used column
+    """
+    try:
+        return np.loadtxt(lines, delimiter=delimiter, usecols=usecols,
+                          converters=converters, ndmin=2)
+    except ValueError:
+        return np.genfromtxt(lines, delimiter=delimiter, usecols=usecols,
+                             converters=converters, invalid_raise=False, ndmin=2)
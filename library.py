@@ -0,0 +1,157 @@
+# library.py
+
+import os
+
+import numpy as np
+
+MAGIC = b'BIOFLIB1'
+
+# one record of the index file per strain, the data of a strain is stored in
+# the data file as its time points followed by its OD values
+RECORD = np.dtype([
+    ('name', 'S128'),
+    ('growth_rate', '<f8'),
+    ('offset', '<i8'),
+    ('length', '<i8')
+])
+
+class StrainLibrary:
+    """
+    A class for keeping bacteria data on disk between sessions.
+
+    The library is stored in two append-only files: path.idx, a header
+    followed by one fixed-size RECORD per strain, and path.dat, the time
+    points and OD values of every strain as float64 columns. Both are
+    memory-mapped when the library is opened, so opening takes the same
+    short time however many strains there are, and the data of a strain is
+    only read from disk when it is used. Adding a strain appends to both
+    files; a strain added again under the same name replaces the old one.
+
+    Attributes
+    ----------
+    path : str
+        path of the library without the .idx and .dat extensions
+    index : dict
+        maps the name of every strain to its position in the index file
+
+    Methods
+    -------
+    names():
+        returns the names of all strains
+    load():
+        returns the growth rate and data of a strain
+    append():
+        adds a strain to the library
+    extend():
+        adds many strains to the library at once
+    """
+
+    def __init__(self, path):
+        """
+        Constructs all the necessary attributes for the StrainLibrary object,
+        creating empty library files if they do not exist.
+
+        Parameters
+        ----------
+            path : str
+                path of the library without the .idx and .dat extensions
+        """
+        self.path = path
+        self.index_path = path + '.idx'
+        self.data_path = path + '.dat'
+        if not os.path.exists(self.index_path):
+            directory = os.path.dirname(self.index_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.index_path, 'wb') as file:
+                file.write(MAGIC)
+            open(self.data_path, 'ab').close()
+        with open(self.index_path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.index_path} is not a strain library.")
+        self.refresh()
+
+    def refresh(self):
+        """Memory-maps the library files again, e.g. after strains were appended."""
+        count = (os.path.getsize(self.index_path) - len(MAGIC)) // RECORD.itemsize
+        self.records = np.memmap(self.index_path, dtype=RECORD, mode='r', offset=len(MAGIC),
+                                 shape=(count,)) if count else np.empty(0, dtype=RECORD)
+        size = os.path.getsize(self.data_path) // 8
+        self.values = np.memmap(self.data_path, dtype='<f8', mode='r',
+                                shape=(size,)) if size else np.empty(0)
+        # later records replace earlier ones with the same name
+        self.index = {name.decode('utf-8') : i for i, name in enumerate(self.records['name'])}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def names(self):
+        """Returns the names of all strains, in the order they were first added."""
+        return list(self.index)
+
+    def growth_rates(self):
+        """Returns a dictionary of the growth rate of every strain."""
+        rates = self.records['growth_rate']
+        return {name : float(rates[i]) for name, i in self.index.items()}
+
+    def load(self, name):
+        """
+        Returns the growth rate and data of a strain. The data are read-only
+        views of the memory-mapped data file.
+
+        Returns
+        -------
+            growth_rate : float
+            t : array
+                time points
+            y : array
+                OD values
+        """
+        record = self.records[self.index[name]]
+        offset, length = int(record['offset']), int(record['length'])
+        t = self.values[offset:offset + length]
+        y = self.values[offset + length:offset + 2 * length]
+        return float(record['growth_rate']), t, y
+
+    def append(self, name, growth_rate, t, y):
+        """Adds a strain to the library, see extend()."""
+        self.extend([(name, growth_rate, t, y)])
+
+    def extend(self, strains):
+        """
+        Adds strains to the end of the library files without rewriting them.
+        The data are written before the index, so an interrupted write never
+        leaves an index record pointing at missing data.
+
+        Parameters
+        ----------
+            strains : iterable
+                (name, growth_rate, t, y) for every strain, t and y of equal length
+        """
+        records = []
+        offset = os.path.getsize(self.data_path) // 8
+        with open(self.data_path, 'r+b') as file:
+            # drop a partial value left by an interrupted write
+            file.seek(offset * 8)
+            file.truncate()
+            for name, growth_rate, t, y in strains:
+                t = np.asarray(t, dtype='<f8').ravel()
+                y = np.asarray(y, dtype='<f8').ravel()
+                if t.shape != y.shape:
+                    raise ValueError(f"Time points and data of {name} differ in length.")
+                encoded = name.encode('utf-8')
+                if len(encoded) > RECORD['name'].itemsize:
+                    raise ValueError(f"Name of {name} is too long for the library.")
+                file.write(t.tobytes())
+                file.write(y.tobytes())
+                records.append((encoded, float(np.asarray(growth_rate).item()), offset, t.size))
+                offset += 2 * t.size
+        with open(self.index_path, 'r+b') as file:
+            # drop a partial record left by an interrupted write
+            file.seek(len(MAGIC) + len(self.records) * RECORD.itemsize)
+            file.truncate()
+            file.write(np.array(records, dtype=RECORD).tobytes())
+        self.refresh()
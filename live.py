@@ -0,0 +1,336 @@
+# live.py
+
+from itertools import dropwhile
+import os
+
+import numpy as np
+
+import importer
+import plotter
+
+class PlateTail:
+    """
+    A class that follows a plate reader export while the reader is still
+    appending readings to it, like tail -f.
+
+    Every poll() reads only the bytes added since the previous one, and a
+    line is only parsed once it is complete, so a reading that is half
+    written is picked up by the next poll. The header is found as in
+    importer.read_plate().
+
+    Attributes
+    ----------
+    path : str
+        path of the followed file
+    offset : int
+        number of bytes read and parsed so far
+    wells : list
+        name of every well, None until the header has been read
+    t_0 : float
+        time of the first reading, subtracted from all times
+
+    Methods
+    -------
+    poll():
+        returns the readings appended since the last call
+    """
+
+    def __init__(self, path, delimiter=None, time_unit='h'):
+        """
+        Constructs all the necessary attributes for the PlateTail object.
+
+        Parameters
+        ----------
+            path : str
+                path of the exported file, which may not have a header yet
+            delimiter : str
+                column separator, chosen as in importer.read_plate() if None
+            time_unit : str
+                unit of a numeric time column, 'h', 'min' or 's'
+        """
+        if time_unit not in importer.TIME_UNITS:
+            raise ValueError(f"Unknown time unit {time_unit!r}, expected one of {list(importer.TIME_UNITS)}.")
+        self.path = path
+        self.delimiter = delimiter
+        self.converters = {0 : lambda text: importer.parse_time(text, time_unit)}
+        self.reset()
+
+    def reset(self):
+        """Starts reading the file from the beginning again, e.g. after it was replaced."""
+        self.offset = 0
+        self.preamble = []
+        self.wells = None
+        self.usecols = None
+        self.t_0 = None
+
+    def poll(self):
+        """
+        Reads the complete lines appended since the last call.
+
+        Returns
+        -------
+            t : array
+                times of the new readings in hours, relative to the first reading
+            data : array
+                OD values of the new readings, one row per well and one column per reading
+        """
+        if os.path.getsize(self.path) < self.offset:
+            # the file was truncated or replaced by a new export
+            self.reset()
+        with open(self.path, 'rb') as file:
+            file.seek(self.offset)
+            added = file.read()
+        end = added.rfind(b'\n') + 1
+        self.offset += end
+        lines = added[:end].decode('utf-8-sig' if self.offset == end else 'utf-8', errors='replace').splitlines()
+
+        if self.wells is None:
+            lines = self.find_header(lines)
+        lines = [line for line in lines if line.strip()]
+        if self.wells is None or not lines:
+            return np.empty(0), np.empty((len(self.wells or ()), 0))
+
+        values = importer.parse_chunk(lines, self.delimiter, self.usecols, self.converters)
+        if self.t_0 is None:
+            self.t_0 = values[0, 0]
+        return values[:, 0] - self.t_0, np.ascontiguousarray(values[:, 1:].T)
+
+    def find_header(self, lines):
+        """
+        Looks for the header row in new lines, the first line starting with
+        'Time' within the first 100 lines, or else the first line.
+
+        Returns
+        -------
+            list : the lines after the header, all lines if it was not found yet
+        """
+        self.preamble += lines
+        header = next((i for i, line in enumerate(self.preamble[:100])
+                       if line.lstrip().lower().startswith('time')), None)
+        if header is None:
+            if len(self.preamble) < 100:
+                return []
+            header = 0
+        self.delimiter, self.wells, self.usecols = importer.parse_header(
+            self.preamble[header], self.path, self.delimiter)
+        rest = list(dropwhile(lambda line: not line.strip(), self.preamble[header + 1:]))
+        self.preamble = []
+        return rest
+
+class RecursiveGrowth:
+    """
+    A class estimating the growth rate of many series at once by recursive
+    least squares on the logarithm of the data,
+
+        log(b(t)) = log(b_0) + (k_b)(t)
+
+    Each new reading updates the estimate of every series in constant time,
+    without refitting the earlier readings. Readings that are not positive
+    are skipped.
+
+    Attributes
+    ----------
+    params : array
+        log(b_0) and k_b of every series, one row per series
+    covariance : array
+        2x2 matrix P of every series
+    count : array
+        number of readings used for every series
+    forgetting : float
+        factor below 1 that lets old readings fade, 1 to weigh all readings equally
+
+    Methods
+    -------
+    update():
+        adds one reading of every series
+    rates():
+        returns the current growth rate of every series
+    """
+
+    def __init__(self, n_series, forgetting=1.0, prior=1e6):
+        """
+        Constructs all the necessary attributes for the RecursiveGrowth object.
+
+        Parameters
+        ----------
+            n_series : int
+                number of series, e.g. wells
+            forgetting : float
+                forgetting factor between 0 and 1
+            prior : float
+                initial variance of the parameters, large for no prior knowledge
+        """
+        self.params = np.zeros((n_series, 2))
+        self.covariance = np.tile(np.eye(2) * prior, (n_series, 1, 1))
+        self.count = np.zeros(n_series, dtype=int)
+        self.forgetting = forgetting
+
+    def update(self, t, values):
+        """
+        Adds one reading of every series at time t.
+
+        Parameters
+        ----------
+            t : float
+                time of the reading in hours
+            values : array
+                OD of every series, nan or values <= 0 are skipped
+        """
+        values = np.asarray(values, dtype=float)
+        usable = np.isfinite(values) & (values > 0)
+        if not usable.any():
+            return
+        x = np.array([1.0, t])
+        Px = self.covariance @ x
+        gain = Px / (self.forgetting + Px @ x)[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            error = np.where(usable, np.log(values), 0.0) - self.params @ x
+        self.params += np.where(usable[:, None], gain * error[:, None], 0.0)
+        updated = (self.covariance - gain[:, :, None] * Px[:, None, :]) / self.forgetting
+        self.covariance = np.where(usable[:, None, None], updated, self.covariance)
+        self.count += usable
+
+    def rates(self):
+        """Returns the growth rate of every series, nan for series with fewer than 2 readings."""
+        return np.where(self.count >= 2, self.params[:, 1], np.nan)
+
+class LivePlate:
+    """
+    A class for following a plate reader export during an experiment and
+    keeping an up-to-date growth rate for every well.
+
+    Every poll() reads the new readings with a PlateTail, adds them to the
+    growing arrays of all readings and updates a RecursiveGrowth estimate.
+    Every refit_every readings all readings are refit with
+    plotter.fit_growth_rates(), the same exponential fit as an import. The
+    log-linear RLS estimate is biased against that fit, so the difference
+    at the last refit is added to it until the next refit.
+
+    Attributes
+    ----------
+    tail : PlateTail
+        reader of the followed file
+    wells : list
+        name of every well, empty until the header has been read
+    k_b : array
+        current growth rate of every well
+    fits : dict
+        result of the last full refit, None before the first
+    refit_every : int
+        number of readings between full refits
+
+    Methods
+    -------
+    poll():
+        reads new readings and updates the growth rates
+    refit():
+        refits the growth rates to all readings
+    readings():
+        returns the times and OD values read so far
+    """
+
+    def __init__(self, path, refit_every=10, time_unit='h'):
+        """
+        Constructs all the necessary attributes for the LivePlate object.
+
+        Parameters
+        ----------
+            path : str
+                path of the followed export
+            refit_every : int
+                number of readings between full refits
+            time_unit : str
+                unit of a numeric time column, 'h', 'min' or 's'
+        """
+        self.tail = PlateTail(path, time_unit=time_unit)
+        self.refit_every = refit_every
+        self.wells = []
+        self.rls = None
+        self.k_b = np.empty(0)
+        self.correction = 0.0
+        self.fits = None
+        self.since_refit = 0
+        self.size = 0
+        self.t = np.empty(64)
+        self.data = np.empty((0, 64))
+
+    def readings(self):
+        """
+        Returns the readings so far as views of the growing arrays. Later
+        readings do not change the returned arrays.
+
+        Returns
+        -------
+            t : array
+                time of every reading in hours
+            data : array
+                OD values, one row per well and one column per reading
+        """
+        return self.t[:self.size], self.data[:, :self.size]
+
+    def poll(self):
+        """
+        Reads the readings appended to the file since the last call and
+        updates the growth rates, refitting all readings every refit_every
+        readings.
+
+        Returns
+        -------
+            int : number of new readings
+        """
+        t, data = self.tail.poll()
+        if self.rls is None and self.tail.wells is not None:
+            self.wells = list(self.tail.wells)
+            self.rls = RecursiveGrowth(len(self.wells))
+            self.data = np.empty((len(self.wells), self.t.size))
+            self.k_b = np.full(len(self.wells), np.nan)
+        if not t.size:
+            return 0
+
+        # grow the arrays by doubling, so appending stays cheap
+        while self.size + t.size > self.t.size:
+            self.t = np.resize(self.t, 2 * self.t.size)
+            self.data = np.concatenate([self.data, np.empty_like(self.data)], axis=1)
+        self.t[self.size:self.size + t.size] = t
+        self.data[:, self.size:self.size + t.size] = data
+        self.size += t.size
+
+        for time, values in zip(t, data.T):
+            self.rls.update(time, values)
+        self.since_refit += t.size
+        if (self.fits is None and self.size >= 3) or self.since_refit >= self.refit_every:
+            self.refit()
+        self.k_b = self.rls.rates() + self.correction
+        return t.size
+
+    def refit(self):
+        """Refits the growth rate of every well to all readings so far, see plotter.fit_growth_rates()."""
+        t, data = self.readings()
+        self.fits = plotter.fit_growth_rates(t, data)
+        good = self.fits['converged'] & np.isfinite(self.fits['rss'])
+        self.correction = np.where(good, self.fits['k_b'] - self.rls.rates(), 0.0)
+        self.correction = np.nan_to_num(self.correction)
+        self.since_refit = 0
+
+if __name__ == '__main__':
+    import tempfile
+    import time
+    rng = np.random.default_rng(0)
+    wells = [f"{row}{column}" for row in 'ABCDEFGH' for column in range(1, 13)]
+    rates = rng.uniform(0.3, 1.0, len(wells))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'plate.csv')
+        with open(path, 'w') as file:
+            file.write('Time,' + ','.join(wells) + '\n')
+        live = LivePlate(path)
+        elapsed = 0.0
+        for i in range(100):
+            t = i / 12
+            values = 0.002 * np.exp(rates * t) * (1 + 0.02 * rng.standard_normal(len(wells)))
+            with open(path, 'a') as file:
+                file.write(f"{t:g}," + ','.join(f"{value:.5f}" for value in values) + '\n')
+            start = time.perf_counter()
+            live.poll()
+            elapsed += time.perf_counter() - start
+        print(f"{len(wells)} wells, {live.size} readings, {elapsed / 100 * 1000:.2f} ms per poll, "
+              f"median error of k_b {np.median(np.abs(live.k_b / rates - 1)):.4f}")
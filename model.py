@@ -1,133 +1,446 @@
-# Mandy Abernathy
-# model.py
-
-import matplotlib.pyplot as plt
-from matplotlib.figure import Figure
-from scipy.integrate import solve_ivp
-import numpy as np
-
-class Model:
-    """
-    A class for modeling bacterial biofilm growth according to a logistic
-    equation that also describes inhibitory treatments.
-
-    Attributes
-    ----------
-    t : array
-        time points
-    t_span : list
-        contains the time span of the model, [t0, t24]
-    k_b : float
-        bacteria growth rate
-    initial_state : list 
-        initial amount of biofilm, [B_0]
-    B_max : float
-        maximum amount of biofilm that can grow
-    agent_MIC : float
-        minimum inhibitory concentration of antibiotic
-    agent_conc : float
-        concentration of antibiotic treatment
-
-    Methods
-    -------
-    solve():
-        solves initial value problem for differential equation for biofilm growth
-    figure():
-        creates a figure plotting biofilm growth
-    """
-
-    def __init__(self, growthrate, initcond, maxvalue, abx_mic, abx_conc):
-        """
-        Constructs all the necessary attributes for the Model object.
-
-        Parameters
-        ----------
-            growthrate : float
-                describes the growth rate of bacteria
-            initcond : float
-                initial amount of biofilm 
-            maxvalue : float
-                maximum amount of biofilm that can be reached
-            abx_mic : int
-                minimum inhibitory concentration of antibiotic which describes
-                the lowest concentration of antibiotic that will inhibit bacteria
-                growth, expressed in micrograms per ml
-            abx_conc : int
-                concentration of antibiotic applied to the biofilm,
-                expressed in micrograms per ml
-        """
-        self.t = np.linspace(0, 24, 25)
-        self.t_span = [0, 24]
-        self.k_b = growthrate
-        self.initial_state = [initcond]
-        self.B_max = maxvalue
-        self.agent_MIC = abx_mic
-        self.agent_conc = abx_conc
-        self.y = self.solve()
-
-    def solve(self):
-        """
-        Solves an initial value problem for a differential equation describing
-        logistic biofilm growth, given values saved in the Model object.
-
-        Uses the scipy.integrate.solve_ivp function which integrations a DE
-        given an initial value:
-            dy / dt = f(t, y)
-            y(t0) = y0
-
-        Returns
-        -------
-            List of y-values which are the solution to the DE at each time point.
-        """
-        solution = solve_ivp(self.logistic_growth, self.t_span, self.initial_state, t_eval=self.t)
-        return solution.y[0]
-
-    def figure(self):
-        """
-        Creates a matplotlib Figure, which contains a plot of biofilm growth 
-        versus time, using data stored in the Model class.
-
-        Returns
-        -------
-            figure (Figure) : plot of biofilm growth versus time
-        """
-        figure = Figure(figsize=(5, 4), dpi=100)
-        ax = figure.add_subplot(111)
-        ax.plot(self.t, self.y)
-        ax.set_xlabel('Time (hours)')
-        ax.set_ylabel('Biofilm (OD)')
-        return figure
-
-    def logistic_growth(self, t, B):
-        """
-        Callable function required by solve() that describes various stages of biofilm
-        growth and takes into account the decrease in growth due to nutrient and 
-        environmental limitations. [1]
-
-        The component describing agent interaction assumes that the action of the
-        agent is proportional to the product agent and biofilm. This interaction
-        depends on the antibiotic's MIC and concentration.
-
-            g(t, B) = (k_b)(B)(1 - B/B_max) - (theta)(C)(B)
-            where: theta = k_b / MIC
-
-        Returns
-        -------
-            float : value of g(t,B) given t, B, and biofilm constants saved in Model object.
-        
-        References
-        ----------
-        [1] D. Verotta, J. Haagensen, A. Spormann, K. Yang, "Mathematical Modeling
-        of Biofilm Structures Using COMSTAT Data", Computational and Mathematical 
-        Methods in Medicine, Article ID 7246286, 2017.
-        """
-        theta = 0.0 # constant that describes agent interaction with biofilm
-        if self.agent_MIC != 0:
-            theta = self.k_b / float(self.agent_MIC)
-        return (self.k_b * B) * (1 - (B / self.B_max)) - (theta * self.agent_conc * B)
-
-if __name__ == '__main__':
-    m = Model(0.957, 0.002, 1.75, 0, 0)
-    plt.plot(m.t, m.y)
-    plt.show()
-
+# Mandy Abernathy
+# model.py
+
+import numpy as np
+
+import cache
+import downsample
+import profiling
+
+SOLVERS = ('numeric', 'analytic')
+
+def time_points(horizon, resolution):
+    """
+    Returns evenly spaced time points from 0 to horizon hours, resolution
+    hours apart. The last step is shortened or stretched slightly when the
+    horizon is not a multiple of the resolution.
+
+    Parameters
+    ----------
+        horizon : float
+            length of the simulation in hours
+        resolution : float
+            time between points in hours, e.g. 1/60 for minutes
+
+    Returns
+    -------
+        array : time points in hours
+    """
+    if not horizon > 0 or not resolution > 0:
+        raise ValueError(f"The horizon and resolution must be positive, got {horizon} and {resolution}.")
+    return np.linspace(0, horizon, max(int(round(horizon / resolution)), 1) + 1)
+
+def logistic_solution(t, k_b, B_0, B_max, theta, conc):
+    """
+    Evaluates the exact solution of the biofilm growth equation described in
+    Model.logistic_growth() at the time points t.
+
+    Collecting the terms of the equation gives a logistic equation with the
+    net rate r = k_b - theta*C,
+
+        dB/dt = (r)(B) - (k_b / B_max)(B^2)
+
+    whose solution is
+
+        B(t) = B_0 / (e^(-r*t) + (k_b / B_max)(B_0)(1 - e^(-r*t)) / r)
+
+    When the kill term beats growth r is negative and the biofilm decays
+    towards 0; when r is 0 the last term becomes (k_b / B_max)(B_0)(t).
+    All arguments are broadcast against each other.
+
+    Returns
+    -------
+        array : value of B(t) at every time point.
+    """
+    t = np.asarray(t, dtype=float)
+    r = np.asarray(k_b - theta * conc, dtype=float)
+    rt = r * t
+    with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+        # (1 - e^(-r*t)) / r, which tends to t as r goes to 0
+        phi = np.where(r == 0, t, -np.expm1(-rt) / np.where(r == 0, 1.0, r))
+        return B_0 / (np.exp(-rt) + (k_b / B_max) * B_0 * phi)
+
+def logistic_sensitivities(t, k_b, B_0, B_max, MIC=0.0, conc=0.0):
+    """
+    Evaluates logistic_solution() and its derivatives with respect to k_b,
+    B_0 and B_max, with theta = k_b / MIC as in Model, so the net rate is
+    r = (k_b)(s) with s = 1 - C/MIC, or s = 1 without an MIC.
+
+    Writing B(t) = B_0 / D with D = e^(-r*t) + (k_b / B_max)(B_0)(phi) and
+    phi = (1 - e^(-r*t)) / r,
+
+        dB/dB_0   = e^(-r*t) / D^2
+        dB/dB_max = (B^2)(k_b)(phi) / B_max^2
+        dB/dk_b   = -(B / D)(-(s)(t)e^(-r*t) + (B_0)(phi) / B_max + (k_b / B_max)(B_0)(s)(dphi/dr))
+
+    where dphi/dr = (t*e^(-r*t) - phi) / r, or -t^2 / 2 when r is 0. These
+    are exact, so fits do not need finite differences.
+
+    Returns
+    -------
+        B : array
+            value of B(t) at every time point
+        dB_dk_b, dB_dB_0, dB_dB_max : array
+            derivatives of B(t) at every time point
+    """
+    t = np.asarray(t, dtype=float)
+    MIC = np.asarray(MIC, dtype=float)
+    s = 1 - np.divide(conc, MIC, out=np.zeros(MIC.shape), where=MIC != 0)
+    r = np.asarray(k_b * s, dtype=float)
+    rt = r * t
+    with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+        E = np.exp(-rt)
+        safe_r = np.where(r == 0, 1.0, r)
+        phi = np.where(r == 0, t, -np.expm1(-rt) / safe_r)
+        dphi = np.where(r == 0, -t * t / 2, (t * E - phi) / safe_r)
+        D = E + (k_b / B_max) * B_0 * phi
+        B = B_0 / D
+        dB_dk_b = -(B / D) * (-s * t * E + B_0 * phi / B_max + (k_b / B_max) * B_0 * s * dphi)
+        dB_dB_0 = E / (D * D)
+        dB_dB_max = B * B * k_b * phi / (B_max * B_max)
+    return B, dB_dk_b, dB_dB_0, dB_dB_max
+
+class Model:
+    """
+    A class for modeling bacterial biofilm growth according to a logistic
+    equation that also describes inhibitory treatments.
+
+    Attributes
+    ----------
+    t : array
+        time points
+    t_span : list
+        contains the time span of the model, [0, horizon]
+    k_b : float
+        bacteria growth rate
+    initial_state : list 
+        initial amount of biofilm, [B_0]
+    B_max : float
+        maximum amount of biofilm that can grow
+    agent_MIC : float
+        minimum inhibitory concentration of antibiotic
+    agent_conc : float
+        concentration of antibiotic treatment
+    solver : str
+        'numeric' to integrate with solve_ivp, 'analytic' to use the exact solution
+
+    Methods
+    -------
+    solve():
+        solves initial value problem for differential equation for biofilm growth
+    dense():
+        returns the solution as a function that can be evaluated at any time
+    validate():
+        checks the analytic solution against solve_ivp
+    figure():
+        creates a figure plotting biofilm growth
+    """
+
+    def __init__(self, growthrate, initcond, maxvalue, abx_mic, abx_conc, solver='numeric',
+                 horizon=24, resolution=1):
+        """
+        Constructs all the necessary attributes for the Model object.
+
+        Parameters
+        ----------
+            growthrate : float
+                describes the growth rate of bacteria
+            initcond : float
+                initial amount of biofilm 
+            maxvalue : float
+                maximum amount of biofilm that can be reached
+            abx_mic : int
+                minimum inhibitory concentration of antibiotic which describes
+                the lowest concentration of antibiotic that will inhibit bacteria
+                growth, expressed in micrograms per ml
+            abx_conc : int
+                concentration of antibiotic applied to the biofilm,
+                expressed in micrograms per ml
+            solver : str
+                'numeric' (default) or 'analytic'
+            horizon : float
+                length of the simulation in hours, 24 by default
+            resolution : float
+                time between the points of the solution in hours, 1 by default
+        """
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver {solver!r}, expected one of {SOLVERS}.")
+        self.t = time_points(horizon, resolution)
+        self.t_span = [0, self.t[-1]]
+        self.k_b = growthrate
+        self.initial_state = [initcond]
+        self.B_max = maxvalue
+        self.agent_MIC = abx_mic
+        self.agent_conc = abx_conc
+        self.solver = solver
+        self.y = self.solve()
+
+    def solve(self):
+        """
+        Solves an initial value problem for a differential equation describing
+        logistic biofilm growth, given values saved in the Model object.
+
+        Uses the scipy.integrate.solve_ivp function which integrations a DE
+        given an initial value:
+            dy / dt = f(t, y)
+            y(t0) = y0
+
+        With the 'analytic' solver the exact solution is evaluated directly
+        on the time points instead, see logistic_solution().
+
+        Solutions are kept in the shared cache.results, so solving the same
+        parameters again returns the cached, read-only solution.
+
+        Returns
+        -------
+            List of y-values which are the solution to the DE at each time point.
+        """
+        with profiling.profiler.span('Model.solve'):
+            return cache.results.fetch(self.cache_key(), self.integrate)
+
+    def cache_key(self):
+        """
+        Describes the inputs of solve() by a tuple of plain floats. The
+        concentration does not matter without an MIC, so it is left out then.
+
+        Returns
+        -------
+            tuple : key for the solution in cache.results
+        """
+        k_b, B_0, B_max, MIC, conc = (np.asarray(value, dtype=float).item() for value in
+            (self.k_b, self.initial_state[0], self.B_max, self.agent_MIC, self.agent_conc))
+        if MIC == 0:
+            conc = 0.0
+        # the time points are evenly spaced, so the span and count describe them
+        t = (float(self.t[0]), float(self.t[-1]), self.t.size)
+        return ('Model.solve', self.solver, t, k_b, B_0, B_max, MIC, conc)
+
+    def integrate(self):
+        """
+        Computes the solution for solve() with the selected solver, bypassing the cache.
+
+        Returns
+        -------
+            List of y-values which are the solution to the DE at each time point.
+        """
+        return self.dense()(self.t)
+
+    def dense(self):
+        """
+        Returns the solution as a function of time. With the 'numeric' solver
+        solve_ivp chooses its own steps and its dense output interpolates
+        between them, so the cost of a solve does not grow with the number of
+        time points, and long horizons at fine resolution stay cheap.
+
+        Returns
+        -------
+            callable : takes an array of times within t_span, returns the biofilm at every time
+        """
+        if self.solver == 'analytic':
+            k_b, B_0, B_max, theta, conc = (self.k_b, self.initial_state[0], self.B_max,
+                                            self.theta(), self.agent_conc)
+            return lambda t: logistic_solution(t, k_b, B_0, B_max, theta, conc)
+        # imported on first use, the analytic solver does not need scipy
+        from scipy.integrate import solve_ivp
+
+        solution = solve_ivp(self.logistic_growth, self.t_span, self.initial_state, dense_output=True)
+        return lambda t: solution.sol(t)[0]
+
+    def validate(self, rtol=1e-2, atol=1e-4):
+        """
+        Checks the analytic solution against the numeric solution from
+        solve_ivp, using the tolerances of numpy.allclose.
+
+        Returns
+        -------
+            bool : True if both solutions agree at every time point.
+        """
+        from scipy.integrate import solve_ivp
+
+        analytic = logistic_solution(self.t, self.k_b, self.initial_state[0],
+                                     self.B_max, self.theta(), self.agent_conc)
+        solution = solve_ivp(self.logistic_growth, self.t_span, self.initial_state,
+                             t_eval=self.t, rtol=rtol * 1e-2, atol=atol * 1e-2)
+        return bool(np.allclose(analytic, solution.y[0], rtol=rtol, atol=atol))
+
+    def theta(self):
+        """
+        Returns the constant that describes agent interaction with biofilm,
+        k_b / MIC, or 0 if no MIC is given.
+        """
+        if self.agent_MIC != 0:
+            return self.k_b / float(self.agent_MIC)
+        return 0.0
+
+    def figure(self):
+        """
+        Creates a matplotlib Figure, which contains a plot of biofilm growth 
+        versus time, using data stored in the Model class. Long solutions
+        are downsampled with downsample.lttb() before they are plotted.
+
+        Returns
+        -------
+            figure (Figure) : plot of biofilm growth versus time
+        """
+        # imported here so solving and fitting work without matplotlib
+        from matplotlib.figure import Figure
+
+        with profiling.profiler.span('Model.figure'):
+            figure = Figure(figsize=(5, 4), dpi=100)
+            ax = figure.add_subplot(111)
+            index = downsample.lttb(self.t, self.y)
+            ax.plot(self.t[index], self.y[index])
+            ax.set_xlabel('Time (hours)')
+            ax.set_ylabel('Biofilm (OD)')
+        return figure
+
+    def logistic_growth(self, t, B):
+        """
+        Callable function required by solve() that describes various stages of biofilm
+        growth and takes into account the decrease in growth due to nutrient and 
+        environmental limitations. [1]
+
+        The component describing agent interaction assumes that the action of the
+        agent is proportional to the product agent and biofilm. This interaction
+        depends on the antibiotic's MIC and concentration.
+
+            g(t, B) = (k_b)(B)(1 - B/B_max) - (theta)(C)(B)
+            where: theta = k_b / MIC
+
+        Returns
+        -------
+            float : value of g(t,B) given t, B, and biofilm constants saved in Model object.
+        
+        References
+        ----------
+        [1] D. Verotta, J. Haagensen, A. Spormann, K. Yang, "Mathematical Modeling
+        of Biofilm Structures Using COMSTAT Data", Computational and Mathematical 
+        Methods in Medicine, Article ID 7246286, 2017.
+        """
+        theta = self.theta() # constant that describes agent interaction with biofilm
+        return (self.k_b * B) * (1 - (B / self.B_max)) - (theta * self.agent_conc * B)
+
+class Ensemble:
+    """
+    A class for modeling many biofilm growth curves at once, one for every
+    set of parameters, using the same logistic equation as Model.
+
+    All trajectories are integrated together as a single system whose
+    right-hand side is evaluated with NumPy, so the cost of the Python
+    interpreter is paid once per step instead of once per parameter set.
+
+    Attributes
+    ----------
+    t : array
+        time points
+    t_span : list
+        contains the time span of the model, [0, horizon]
+    k_b : array
+        bacteria growth rate for every parameter set
+    initial_state : array
+        initial amount of biofilm for every parameter set
+    B_max : array
+        maximum amount of biofilm for every parameter set
+    agent_MIC : array
+        minimum inhibitory concentration of antibiotic for every parameter set
+    agent_conc : array
+        concentration of antibiotic treatment for every parameter set
+    theta : array
+        constant that describes agent interaction with biofilm, k_b / MIC
+    solver : str
+        'numeric' to integrate with solve_ivp, 'analytic' to use the exact solution
+    y : array
+        biofilm growth, one row per parameter set and one column per time point
+
+    Methods
+    -------
+    solve():
+        solves the initial value problems for all parameter sets together
+    """
+
+    def __init__(self, growthrates, initconds, maxvalues, abx_mics, abx_concs, solver='numeric',
+                 horizon=24, resolution=1):
+        """
+        Constructs all the necessary attributes for the Ensemble object.
+
+        The parameters take the same meaning as in Model, but may be given as
+        arrays. They are broadcast against each other, so a single value can
+        be shared by every parameter set.
+
+        Parameters
+        ----------
+            growthrates : array_like
+                growth rates of bacteria
+            initconds : array_like
+                initial amounts of biofilm
+            maxvalues : array_like
+                maximum amounts of biofilm that can be reached
+            abx_mics : array_like
+                minimum inhibitory concentrations of antibiotic, in micrograms per ml
+            abx_concs : array_like
+                concentrations of antibiotic applied, in micrograms per ml
+            solver : str
+                'numeric' (default) or 'analytic'
+            horizon : float
+                length of the simulation in hours, 24 by default
+            resolution : float
+                time between the points of the solution in hours, 1 by default
+        """
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver {solver!r}, expected one of {SOLVERS}.")
+        self.t = time_points(horizon, resolution)
+        self.t_span = [0, self.t[-1]]
+        (self.k_b, self.initial_state, self.B_max,
+         self.agent_MIC, self.agent_conc) = (
+            np.ravel(a).astype(float) for a in np.broadcast_arrays(
+                growthrates, initconds, maxvalues, abx_mics, abx_concs))
+        # constant that describes agent interaction with biofilm, 0 where MIC is 0
+        self.theta = np.divide(self.k_b, self.agent_MIC,
+                               out=np.zeros_like(self.k_b), where=self.agent_MIC != 0)
+        self.solver = solver
+        with profiling.profiler.span('Ensemble.solve'):
+            self.y = self.solve()
+
+    def solve(self):
+        """
+        Solves the initial value problems for every parameter set at once.
+
+        solve_ivp measures the error of a step as the RMS over all components,
+        so the tolerances are tightened by sqrt(n) to keep the error of each
+        single trajectory within the tolerances used by Model.solve().
+
+        Returns
+        -------
+            2-D array of y-values, shape (number of parameter sets, number of time points).
+        """
+        n = self.initial_state.size
+        if n == 0:
+            return np.empty((0, self.t.size))
+        if self.solver == 'analytic':
+            return logistic_solution(self.t, self.k_b[:, None], self.initial_state[:, None],
+                                     self.B_max[:, None], self.theta[:, None],
+                                     self.agent_conc[:, None])
+        from scipy.integrate import solve_ivp
+
+        scale = np.sqrt(n)
+        solution = solve_ivp(self.logistic_growth, self.t_span, self.initial_state,
+                             dense_output=True, rtol=1e-3 / scale, atol=1e-6 / scale)
+        return solution.sol(self.t)
+
+    def logistic_growth(self, t, B):
+        """
+        Callable function required by solve(), the right-hand side of the
+        equation described in Model.logistic_growth() for every parameter set.
+
+        Returns
+        -------
+            array : value of g(t,B) for every parameter set.
+        """
+        return self.k_b * B * (1 - B / self.B_max) - self.theta * self.agent_conc * B
+
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+    m = Model(0.957, 0.002, 1.75, 0, 0)
+    plt.plot(m.t, m.y)
+    plt.show()
+
@@ -0,0 +1,208 @@
+# picker.py
+
+import tkinter
+from tkinter import ttk
+
+class StrainPicker(ttk.Frame):
+    """
+    A drop-down for choosing a strain of a strains.StrainRegistry, used in
+    place of a ttk.OptionMenu, which needs a menu entry for every strain and
+    has to be rebuilt whenever one is added.
+
+    Pressing the button opens a list below it with a search box. Typing
+    shows only the strains whose names start with the text, found by
+    bisection in the registry. The list is virtual: its Listbox only holds
+    the rows that are visible, refilled from the registry when it scrolls,
+    so opening, searching and scrolling take the same time for ten strains
+    or ten thousand, and adding strains costs nothing until the list is
+    opened.
+
+    Attributes
+    ----------
+    registry : strains.StrainRegistry
+        strains to choose from
+    variable : StringVar
+        name of the chosen strain
+    command : callable
+        called with the name of a strain when it is chosen
+    rows : int
+        number of visible rows of the list
+
+    Methods
+    -------
+    open():
+        opens the list, or closes it if it is open
+    refresh():
+        shows strains added since the list was opened
+    """
+
+    def __init__(self, master, registry, variable, command=None, rows=12, width=28):
+        """
+        Constructs all the necessary attributes for the StrainPicker object.
+
+        Parameters
+        ----------
+            master : widget
+                parent widget
+            registry : strains.StrainRegistry
+                strains to choose from
+            variable : StringVar
+                name of the chosen strain, shown on the button
+            command : callable
+                called with the name of a strain when it is chosen
+            rows : int
+                number of visible rows of the list
+            width : int
+                width of the button and the list in characters
+        """
+        super().__init__(master)
+        self.registry = registry
+        self.variable = variable
+        self.command = command
+        self.rows = rows
+        self.width = width
+        self.popup = None
+        # position of the top row and of the highlighted row among the matches
+        self.first = 0
+        self.cursor = 0
+        self.total = 0
+        self.query = tkinter.StringVar(self)
+        self.query.trace_add('write', lambda *args: self.search())
+
+        # create widgets
+
+            # button showing the chosen strain, opening the list instead of a menu
+        self.button = ttk.Menubutton(self, textvariable=variable, width=width)
+        self.button.grid(row=0, column=0, sticky=tkinter.W)
+        self.button.bind('<ButtonPress-1>', self.open)
+        self.button.bind('<space>', self.open)
+
+    def open(self, *args):
+        """Opens the list below the button, starting at the chosen strain, or closes it if it is open."""
+        if self.popup is not None:
+            self.close()
+            return 'break'
+        self.popup = tkinter.Toplevel(self)
+        self.popup.wm_overrideredirect(True)
+        self.popup.geometry(f"+{self.button.winfo_rootx()}+{self.button.winfo_rooty() + self.button.winfo_height()}")
+
+            # search box
+        entry = ttk.Entry(self.popup, textvariable=self.query, width=self.width)
+        entry.grid(row=0, column=0, columnspan=2, sticky=tkinter.EW)
+        entry.bind('<Down>', lambda event: self.move(1))
+        entry.bind('<Up>', lambda event: self.move(-1))
+        entry.bind('<Next>', lambda event: self.move(self.rows))
+        entry.bind('<Prior>', lambda event: self.move(-self.rows))
+        entry.bind('<Return>', lambda event: self.choose())
+        entry.bind('<Escape>', lambda event: self.close())
+
+            # visible rows and scroll bar
+        self.listbox = tkinter.Listbox(self.popup, height=self.rows, width=self.width,
+                                       exportselection=False, activestyle='none')
+        self.listbox.grid(row=1, column=0, sticky=tkinter.NSEW)
+        self.listbox.bind('<ButtonRelease-1>', self.click)
+        self.scrollbar = ttk.Scrollbar(self.popup, orient=tkinter.VERTICAL, command=self.scroll)
+        self.scrollbar.grid(row=1, column=1, sticky=tkinter.NS)
+        for widget in (self.listbox, entry):
+            widget.bind('<MouseWheel>', lambda event: self.scroll('scroll', -3 if event.delta > 0 else 3, 'units'))
+            widget.bind('<Button-4>', lambda event: self.scroll('scroll', -3, 'units'))
+            widget.bind('<Button-5>', lambda event: self.scroll('scroll', 3, 'units'))
+
+        # clicks outside the list close it
+        self.popup.bind('<ButtonPress-1>', self.click_outside)
+        self.query.set('')
+        self.show(self.variable.get())
+        entry.focus_set()
+        self.popup.grab_set()
+        return 'break'
+
+    def close(self):
+        """Closes the list without changing the chosen strain."""
+        if self.popup is None:
+            return
+        self.popup.grab_release()
+        self.popup.destroy()
+        self.popup = None
+
+    def search(self):
+        """Shows the strains starting with the text in the search box, from the first one."""
+        if self.popup is None:
+            return
+        self.total = self.registry.count(self.query.get())
+        self.first = self.cursor = 0
+        self.fill()
+
+    def show(self, name):
+        """Scrolls the list to a strain and highlights it, if it matches the search."""
+        start, _ = self.registry.bounds(self.query.get())
+        low, _ = self.registry.bounds(name)
+        if name in self.registry and low >= start:
+            self.cursor = min(low - start, max(self.total - 1, 0))
+            self.first = max(min(self.cursor - self.rows // 2, self.total - self.rows), 0)
+            self.fill()
+
+    def refresh(self):
+        """Shows strains added to the registry since the list was opened."""
+        if self.popup is None:
+            return
+        self.total = self.registry.count(self.query.get())
+        self.fill()
+
+    def fill(self):
+        """Fills the Listbox with the visible rows and updates the scroll bar."""
+        self.first = max(min(self.first, self.total - self.rows), 0)
+        names = self.registry.search(self.query.get(), self.first, self.rows)
+        self.listbox.delete(0, tkinter.END)
+        if names:
+            self.listbox.insert(tkinter.END, *names)
+        if self.first <= self.cursor < self.first + len(names):
+            self.listbox.selection_set(self.cursor - self.first)
+        if self.total > self.rows:
+            self.scrollbar.set(self.first / self.total, (self.first + self.rows) / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll(self, action, amount, unit=None):
+        """Scrolls the visible rows, called by the scroll bar and the mouse wheel."""
+        if action == 'moveto':
+            self.first = int(float(amount) * self.total)
+        elif action == 'scroll':
+            self.first += int(amount) * (self.rows if unit == 'pages' else 1)
+        self.fill()
+        return 'break'
+
+    def move(self, step):
+        """Moves the highlighted row, scrolling to keep it visible."""
+        if not self.total:
+            return 'break'
+        self.cursor = max(min(self.cursor + step, self.total - 1), 0)
+        if self.cursor < self.first:
+            self.first = self.cursor
+        elif self.cursor >= self.first + self.rows:
+            self.first = self.cursor - self.rows + 1
+        self.fill()
+        return 'break'
+
+    def click(self, event):
+        """Chooses the strain of the clicked row."""
+        row = self.listbox.nearest(event.y)
+        if 0 <= row < self.listbox.size():
+            self.cursor = self.first + row
+            self.choose()
+
+    def click_outside(self, event):
+        """Closes the list when a click lands outside of it, which the grab sends here."""
+        x, y = event.x_root - self.popup.winfo_rootx(), event.y_root - self.popup.winfo_rooty()
+        if not (0 <= x < self.popup.winfo_width() and 0 <= y < self.popup.winfo_height()):
+            self.close()
+
+    def choose(self):
+        """Chooses the highlighted strain, closes the list and calls command."""
+        names = self.registry.search(self.query.get(), self.cursor, 1)
+        self.close()
+        if not names:
+            return 'break'
+        self.variable.set(names[0])
+        if self.command is not None:
+            self.command(names[0])
+        return 'break'
@@ -1,94 +1,270 @@
-# Mandy Abernathy
-# plotter.py
-
-import matplotlib.pyplot as plt
-from matplotlib.figure import Figure
-import numpy as np
-from scipy.optimize import curve_fit
-
-class Plotter:
-    """
-    A class for plotting planktonic bacteria growth, and finding the growth
-    rate of a bacteria given a series of data points.
-
-    Attributes
-    ----------
-    t : list
-        time points
-    y : list
-        y-values for every time point
-
-    Methods
-    -------
-    fit():
-        fits exponential curve to the class data
-    figure():
-        creates a figure plotting the class data
-    """
-
-    def __init__(self, t, data):
-        """
-        Constructs all the necessary attributes for the Plotter object.
-
-        Parameters
-        ----------
-            t : list
-                t-values to be plotted on the x-axis
-            data : list
-                y-values to be plotted on the y-axis
-        """
-        self.t = t
-        self.datapoints = data
-
-    def fit(self):
-        """
-        Fits an exponential curve to the data saved in the Plotter object.
-
-        Uses the scipy.optimize.curve_fit function to find a value for k_b
-        in the following equation given the saved data points:
-
-            b(t) = (b_0)(e^(k_b*t))
-
-        Returns
-        -------
-            k_b (float) : best-fit parameter for bacteria growth rate
-        """
-        k_b, pcov = curve_fit(self.exponential_growth, self.t, self.datapoints)
-        return k_b
-
-    def figure(self):
-        """
-        Creates a matplotlib Figure, which contains a plot of bacteria growth
-        versus time, using data stored in the Plotter class.
-
-        Returns
-        -------
-            figure (Figure) : plot of bacteria growth versus time
-        """
-        figure = Figure(figsize=(5, 4), dpi=100)
-        ax = figure.add_subplot(111)
-        ax.plot(self.t, self.datapoints, 'ro')
-        ax.set_xlabel('Time (hours)')
-        ax.set_ylabel('Bacteria Density (OD)')
-        return figure
-
-    def exponential_growth(self, t, k_b):
-        """
-        Callable function required by fit() that describes exponential growth
-        of planktonic bacteria.
-
-            b(t) = (b_0)(e^(k_b*t))
-
-        Returns
-        -------
-            float : value of b(t) given t.
-        """
-        # e is declared like this because e from math library raises TypeError in curve_fit
-        e = 2.7182818284
-        return self.datapoints[0] * pow(e, k_b*t)
-
-if __name__ == '__main__':
-    p = Plotter()
-    plt.plot(p.t, p.y, 'ro')
-    plt.plot(p.t, p.exponential_growth(p.t,0.957))
-    plt.show()
\ No newline at end of file
+# Mandy Abernathy
+# plotter.py
+
+import numpy as np
+
+import cache
+import profiling
+
+class Plotter:
+    """
+    A class for plotting planktonic bacteria growth, and finding the growth
+    rate of a bacteria given a series of data points.
+
+    Attributes
+    ----------
+    t : list
+        time points
+    y : list
+        y-values for every time point
+    pcov : array
+        covariance of the growth rate from the last fit(), None before fitting
+
+    Methods
+    -------
+    fit():
+        fits exponential curve to the class data, using cached fits
+    stderr():
+        standard error of the fitted growth rate
+    figure():
+        creates a figure plotting the class data
+    """
+
+    def __init__(self, t, data):
+        """
+        Constructs all the necessary attributes for the Plotter object.
+
+        Parameters
+        ----------
+            t : list
+                t-values to be plotted on the x-axis
+            data : list
+                y-values to be plotted on the y-axis
+        """
+        self.t = t
+        self.datapoints = data
+        self.pcov = None
+
+    def fit(self):
+        """
+        Fits an exponential curve to the data saved in the Plotter object.
+
+        Uses the scipy.optimize.curve_fit function to find a value for k_b
+        in the following equation given the saved data points:
+
+            b(t) = (b_0)(e^(k_b*t))
+
+        Returns
+        -------
+            k_b (float) : best-fit parameter for bacteria growth rate
+
+        Fits are kept in the shared cache.results, keyed on a hash of the
+        time points and data, so fitting the same data again is instant.
+        The covariance of k_b is saved in the Plotter object as pcov.
+        """
+        key = ('Plotter.fit', cache.array_key(self.t, self.datapoints))
+        with profiling.profiler.span('Plotter.fit'):
+            k_b, self.pcov = cache.results.fetch(key, self.compute_fit)
+        return k_b
+
+    def compute_fit(self):
+        """
+        Computes the fit for fit() with scipy.optimize.curve_fit, bypassing the cache.
+
+        The fit starts from the log-linear estimate of loglinear_rate() and
+        uses the analytic Jacobian of exponential_growth().
+
+        Returns
+        -------
+            k_b (array) : best-fit parameter for bacteria growth rate
+            pcov (array) : covariance of k_b
+        """
+        # imported on first use, so starting the GUI does not wait for scipy
+        from scipy.optimize import curve_fit
+
+        t = np.asarray(self.t, dtype=float)
+        y = np.asarray(self.datapoints, dtype=float)
+        p0 = [loglinear_rate(t, y)] if t.shape == y.shape and y.size else None
+        k_b, pcov = curve_fit(self.exponential_growth, t, y, p0=p0, jac=self.growth_jacobian)
+        return k_b, pcov
+
+    def stderr(self):
+        """
+        Returns the standard error of the growth rate found by fit().
+
+        Returns
+        -------
+            float : square root of the variance of k_b
+        """
+        if self.pcov is None:
+            self.fit()
+        return float(np.sqrt(self.pcov[0, 0]))
+
+    def figure(self):
+        """
+        Creates a matplotlib Figure, which contains a plot of bacteria growth
+        versus time, using data stored in the Plotter class.
+
+        Returns
+        -------
+            figure (Figure) : plot of bacteria growth versus time
+        """
+        # imported here so solving and fitting work without matplotlib
+        from matplotlib.figure import Figure
+
+        with profiling.profiler.span('Plotter.figure'):
+            figure = Figure(figsize=(5, 4), dpi=100)
+            ax = figure.add_subplot(111)
+            ax.plot(self.t, self.datapoints, 'ro')
+            ax.set_xlabel('Time (hours)')
+            ax.set_ylabel('Bacteria Density (OD)')
+        return figure
+
+    def exponential_growth(self, t, k_b):
+        """
+        Callable function required by fit() that describes exponential growth
+        of planktonic bacteria.
+
+            b(t) = (b_0)(e^(k_b*t))
+
+        Returns
+        -------
+            float : value of b(t) given t.
+        """
+        return self.datapoints[0] * np.exp(k_b * np.asarray(t, dtype=float))
+
+    def growth_jacobian(self, t, k_b):
+        """
+        Callable function required by fit(), the derivative of exponential_growth()
+        with respect to k_b.
+
+            db/dk_b = (b_0)(t)(e^(k_b*t))
+
+        Returns
+        -------
+            array : one row per time point, one column for k_b.
+        """
+        t = np.asarray(t, dtype=float)
+        return (self.datapoints[0] * t * np.exp(k_b * t))[:, None]
+
+def loglinear_rate(t, data):
+    """
+    Estimates the growth rate by least squares on the logarithm of the data,
+
+        log(b(t) / b_0) = (k_b)(t)
+
+    which is used as the starting point of the nonlinear fits. Points that
+    are not positive are ignored. Works on a single series or on one series
+    per row, with t shared by all rows or given per row.
+
+    Returns
+    -------
+        float or array : estimated growth rate of every series, 0 where there
+        are no usable points
+    """
+    t = np.asarray(t, dtype=float)
+    data = np.asarray(data, dtype=float)
+    t = np.broadcast_to(t, data.shape)
+    b_0 = data[..., :1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.log(data / b_0)
+    usable = np.isfinite(z) & np.isfinite(t)
+    t = np.where(usable, t, 0.0)
+    sxz = np.sum(t * np.where(usable, z, 0.0), axis=-1)
+    sxx = np.sum(t * t, axis=-1)
+    return np.divide(sxz, sxx, out=np.zeros_like(sxz), where=sxx > 0)
+
+def fit_growth_rates(t, data, max_iter=100, rtol=1e-10):
+    """
+    Fits the exponential growth curve of Plotter.exponential_growth() to
+    many series at once, e.g. every well of a plate.
+
+    All series are fit together by a Levenberg-Marquardt iteration on
+    arrays, with the analytic Jacobian and the log-linear starting point of
+    loglinear_rate(), so there is no Python loop over the series. The
+    standard errors are computed the same way as curve_fit's covariance.
+
+    Parameters
+    ----------
+        t : array_like
+            time points, shared by all series or one row per series
+        data : array_like
+            one series per row, series of different length are padded with nan
+        max_iter : int
+            maximum number of iterations
+        rtol : float
+            relative change of k_b at which a series has converged
+
+    Returns
+    -------
+        dict : arrays with one value per series
+            k_b : best-fit growth rate
+            stderr : standard error of k_b
+            rss : residual sum of squares
+            r2 : coefficient of determination
+            n_points : number of points used
+            iterations : number of iterations until convergence
+            converged : True if the series converged within max_iter
+    """
+    data = np.atleast_2d(np.asarray(data, dtype=float))
+    t = np.broadcast_to(np.asarray(t, dtype=float), data.shape)
+    usable = np.isfinite(data) & np.isfinite(t)
+    y = np.where(usable, data, 0.0)
+    t = np.where(usable, t, 0.0)
+    b_0 = data[:, :1]
+    n_points = usable.sum(axis=1)
+
+    def residuals(k_b):
+        with np.errstate(over='ignore', invalid='ignore'):
+            growth = np.exp(k_b[:, None] * t)
+            r = np.where(usable, y - b_0 * growth, 0.0)
+            return r, np.where(usable, b_0 * t * growth, 0.0), np.sum(r * r, axis=1)
+
+    k_b = loglinear_rate(t, np.where(usable, data, np.nan))
+    damping = np.full(k_b.shape, 1e-3)
+    iterations = np.zeros(k_b.shape, dtype=int)
+    converged = np.zeros(k_b.shape, dtype=bool)
+    r, jac, rss = residuals(k_b)
+    for _ in range(max_iter):
+        active = ~converged
+        if not active.any():
+            break
+        grad = np.sum(jac * r, axis=1)
+        hess = np.sum(jac * jac, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = np.where(hess > 0, grad / (hess * (1 + damping)), 0.0)
+        trial = np.where(active, k_b + step, k_b)
+        r_trial, jac_trial, rss_trial = residuals(trial)
+        accept = active & np.isfinite(rss_trial) & (rss_trial <= rss)
+        k_b = np.where(accept, trial, k_b)
+        r = np.where(accept[:, None], r_trial, r)
+        jac = np.where(accept[:, None], jac_trial, jac)
+        rss = np.where(accept, rss_trial, rss)
+        damping = np.where(accept, damping / 10, damping * 10)
+        iterations += active
+        converged |= (accept & (np.abs(step) <= rtol * (np.abs(k_b) + rtol))) | (active & (step == 0))
+
+    hess = np.sum(jac * jac, axis=1)
+    dof = n_points - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = np.where((dof > 0) & (hess > 0), rss / dof / hess, np.inf)
+        mean = np.sum(y, axis=1) / n_points
+        total = np.sum(np.where(usable, y - mean[:, None], 0.0) ** 2, axis=1)
+        r2 = 1 - rss / total
+    return {
+        'k_b' : k_b,
+        'stderr' : np.sqrt(variance),
+        'rss' : rss,
+        'r2' : r2,
+        'n_points' : n_points,
+        'iterations' : iterations,
+        'converged' : converged
+    }
+
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+    t = np.arange(8)
+    p = Plotter(t, [0.002, 0.019, 0.024, 0.068, 0.085, 0.355, 0.979, 1.496])
+    plt.plot(p.t, p.datapoints, 'ro')
+    plt.plot(p.t, p.exponential_growth(p.t, p.fit()))
+    plt.show()
@@ -0,0 +1,146 @@
+# profiling.py
+
+from collections import deque
+from contextlib import nullcontext
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+# returned by Profiler.span() while profiling is off, so a disabled span
+# costs one attribute lookup and a call
+NULL_SPAN = nullcontext()
+
+class Span:
+    """Context manager timing one span for a Profiler."""
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+class Profiler:
+    """
+    A class for timing the hot paths of the GUI, such as Model solves,
+    Plotter fits, figure building, canvas draws and data parsing.
+
+    Code marks a span with "with profiling.profiler.span('name'):". While
+    the profiler is disabled span() returns a shared no-op context manager.
+    While it is enabled the duration of every span is kept in a rolling
+    window per name for percentiles, and every span is kept as an event that
+    can be exported as JSON lines or as a Chrome trace (chrome://tracing).
+
+    Attributes
+    ----------
+    enabled : bool
+        whether spans are timed
+    window : int
+        number of recent durations kept per name for the percentiles
+    durations : dict
+        deque of recent durations in seconds for every span name
+    events : deque
+        (name, start ns, end ns, thread id) of the most recent spans
+
+    Methods
+    -------
+    span():
+        returns a context manager timing a span
+    stats():
+        returns the count and percentiles of every span name
+    export_jsonl():
+        writes the events as JSON lines
+    export_chrome():
+        writes the events as a Chrome trace
+    """
+
+    def __init__(self, enabled=False, window=1000, max_events=100000):
+        """
+        Constructs all the necessary attributes for the Profiler object.
+
+        Parameters
+        ----------
+            enabled : bool
+                whether spans are timed from the start
+            window : int
+                number of recent durations kept per name for the percentiles
+            max_events : int
+                number of most recent spans kept for exporting
+        """
+        self.enabled = enabled
+        self.window = window
+        self.durations = {}
+        self.counts = {}
+        self.events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        """Returns a context manager timing the code inside it under name."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def record(self, name, start, end):
+        """Records a span that ran from start to end, in perf_counter_ns() nanoseconds."""
+        durations = self.durations.get(name)
+        if durations is None:
+            with self._lock:
+                durations = self.durations.setdefault(name, deque(maxlen=self.window))
+        durations.append((end - start) / 1e9)
+        self.counts[name] = self.counts.get(name, 0) + 1
+        self.events.append((name, start, end, threading.get_ident()))
+
+    def stats(self):
+        """
+        Returns the number of spans and the percentiles of the recent
+        durations of every span name, in milliseconds.
+
+        Returns
+        -------
+            dict : count, p50, p95, p99 and max for every name
+        """
+        result = {}
+        for name, durations in list(self.durations.items()):
+            values = np.fromiter(list(durations), dtype=float) * 1000
+            if not values.size:
+                continue
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            result[name] = {'count' : self.counts.get(name, 0), 'p50' : p50, 'p95' : p95,
+                            'p99' : p99, 'max' : values.max()}
+        return result
+
+    def reset(self):
+        """Removes all recorded spans."""
+        with self._lock:
+            self.durations.clear()
+            self.counts.clear()
+            self.events.clear()
+
+    def export_jsonl(self, path):
+        """Writes every kept span as a line of JSON with its name, thread, start and duration in seconds."""
+        with open(path, 'w') as file:
+            for name, start, end, thread in list(self.events):
+                file.write(json.dumps({'name' : name, 'thread' : thread, 'start' : start / 1e9,
+                                       'duration' : (end - start) / 1e9}) + '\n')
+
+    def export_chrome(self, path):
+        """Writes every kept span as a complete event of the Chrome trace event format."""
+        pid = os.getpid()
+        events = [{'name' : name, 'ph' : 'X', 'pid' : pid, 'tid' : thread,
+                   'ts' : start / 1000, 'dur' : (end - start) / 1000}
+                  for name, start, end, thread in list(self.events)]
+        with open(path, 'w') as file:
+            json.dump({'traceEvents' : events, 'displayTimeUnit' : 'ms'}, file)
+
+# profiler shared by the GUI, models and plotters, enabled by BIOFILM_PROFILE=1
+profiler = Profiler(enabled=os.environ.get('BIOFILM_PROFILE', '') not in ('', '0'))
@@ -0,0 +1,490 @@
+# service.py
+#
+# Local HTTP/JSON service for biofilm solves and growth rate fits, for tools
+# that cannot use the GUI. Concurrent requests are coalesced into batches
+# that are solved or fit with one vectorized call in a process pool.
+#
+#   python service.py [--port 8765] [--workers 4]
+#   curl -d '{"growth_rate": 0.957, "mic": 1, "conc": 0.5}' localhost:8765/solve
+#   curl -d '{"t": [0, 1, 2, 3], "data": [0.002, 0.005, 0.013, 0.035]}' localhost:8765/fit
+#   curl localhost:8765/stats
+#   python service.py --load-test 20000     # serve and measure throughput
+
+import argparse
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+import model
+import plotter
+import profiling
+
+# parameters of a solve request and their defaults, None for parameters that
+# must be given, the other defaults are the defaults of the GUI
+SOLVE_FIELDS = {
+    'growth_rate' : None,
+    'initial' : 0.002,
+    'max' : 1.75,
+    'mic' : 0.0,
+    'conc' : 0.0
+}
+
+class Overloaded(Exception):
+    """Raised when a request arrives while the queue of the Batcher is full."""
+
+def solve_batch(params, horizon, resolution):
+    """
+    Solves many biofilm models at once with the analytic model.Ensemble.
+    Runs in the worker processes of a Batcher.
+
+    Returns
+    -------
+        t : array
+            time points shared by all solutions
+        y : array
+            one solution per row
+    """
+    ensemble = model.Ensemble(params['growth_rate'], params['initial'], params['max'],
+                              params['mic'], params['conc'], solver='analytic',
+                              horizon=horizon, resolution=resolution)
+    return ensemble.t, ensemble.y
+
+def fit_batch(series):
+    """
+    Fits the growth rate of many series at once with plotter.fit_growth_rates(),
+    padding shorter series with nan. Runs in the worker processes of a Batcher.
+
+    Returns
+    -------
+        dict : arrays with one value per series
+    """
+    length = max(len(t) for t, _ in series)
+    t = np.full((len(series), length), np.nan)
+    data = np.full((len(series), length), np.nan)
+    for i, (times, values) in enumerate(series):
+        t[i, :len(times)] = times
+        data[i, :len(values)] = values
+    return plotter.fit_growth_rates(t, data)
+
+class Batcher:
+    """
+    A class that coalesces requests arriving from many threads into batches
+    that are computed with one vectorized call in a process pool.
+
+    A dispatcher thread takes the first waiting request, collects more until
+    max_batch have arrived or max_wait has passed, groups them by the kind
+    of request and by the parameters that must be shared within a batch,
+    and submits every group. At most max_inflight batches run at once, and
+    at most max_pending requests wait; further requests raise Overloaded, so
+    a client sending faster than the pool can compute is told to back off
+    instead of filling memory.
+
+    Attributes
+    ----------
+    executor : Executor
+        computes the batches, e.g. a ProcessPoolExecutor
+    max_batch : int
+        largest number of requests in one batch
+    max_wait : float
+        seconds to wait for more requests before submitting a batch
+    batches : int
+        number of batches submitted
+    batched : int
+        number of requests submitted in batches
+
+    Methods
+    -------
+    submit():
+        queues a request and returns a future for its result
+    close():
+        stops the dispatcher thread
+    """
+
+    def __init__(self, executor, max_batch=512, max_wait=0.002, max_pending=20000, max_inflight=8):
+        """
+        Constructs all the necessary attributes for the Batcher object and
+        starts its dispatcher thread.
+
+        Parameters
+        ----------
+            executor : Executor
+                computes the batches
+            max_batch : int
+                largest number of requests in one batch
+            max_wait : float
+                seconds to wait for more requests before submitting a batch
+            max_pending : int
+                largest number of requests waiting to be batched
+            max_inflight : int
+                largest number of batches computed at once
+        """
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.batched = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._inflight = threading.BoundedSemaphore(max_inflight)
+        self._thread = threading.Thread(target=self.dispatch, daemon=True)
+        self._thread.start()
+
+    def pending(self):
+        """Returns the number of requests waiting to be batched."""
+        return self._queue.qsize()
+
+    def submit(self, kind, key, payload):
+        """
+        Queues a request.
+
+        Parameters
+        ----------
+            kind : str
+                'solve' or 'fit'
+            key : tuple
+                parameters that must be the same for every request of a batch
+            payload : object
+                the request, a dict of solve parameters or a (t, data) pair
+
+        Returns
+        -------
+            Future : set to the result of the request
+        """
+        future = Future()
+        try:
+            self._queue.put_nowait((kind, key, payload, future))
+        except queue.Full:
+            raise Overloaded(f"More than {self._queue.maxsize} requests are waiting.") from None
+        return future
+
+    def close(self):
+        """Stops the dispatcher thread after the queued requests have been submitted."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def dispatch(self):
+        """Runs in the dispatcher thread, collecting requests into batches until close()."""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            requests = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(requests) < self.max_batch:
+                try:
+                    request = self._queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._queue.put(None)
+                    break
+                requests.append(request)
+
+            groups = {}
+            for kind, key, payload, future in requests:
+                groups.setdefault((kind, key), []).append((payload, future))
+            for (kind, key), group in groups.items():
+                # wait for a free slot, the queue fills up meanwhile and pushes back on clients
+                self._inflight.acquire()
+                self.batches += 1
+                self.batched += len(group)
+                self.run_batch(kind, key, group)
+
+    def run_batch(self, kind, key, group):
+        """Submits one group of requests of the same kind and key to the executor."""
+        payloads = [payload for payload, _ in group]
+        futures = [future for _, future in group]
+        try:
+            if kind == 'solve':
+                params = {name : np.array([payload[name] for payload in payloads], dtype=float)
+                          for name in SOLVE_FIELDS}
+                batch = self.executor.submit(solve_batch, params, *key)
+            else:
+                batch = self.executor.submit(fit_batch, payloads)
+        except Exception as error:
+            self._inflight.release()
+            for future in futures:
+                future.set_exception(error)
+            return
+        batch.add_done_callback(lambda batch: self.finish(kind, batch, futures))
+
+    def finish(self, kind, batch, futures):
+        """Hands the results of a finished batch to the futures of its requests."""
+        self._inflight.release()
+        error = batch.exception()
+        if error is not None:
+            for future in futures:
+                future.set_exception(error)
+            return
+        if kind == 'solve':
+            t, y = batch.result()
+            t = t.tolist()
+            for future, row in zip(futures, y):
+                future.set_result({'t' : t, 'y' : row.tolist()})
+        else:
+            fits = batch.result()
+            for i, future in enumerate(futures):
+                future.set_result({name : values[i].item() for name, values in fits.items()})
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Handles the requests of a Service: POST /solve and POST /fit with one
+    JSON job or {"jobs": [...]}, GET /stats and GET /health.
+    """
+
+    # keep connections open, so clients do not pay for a new connection per request
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        """Leaves out the log line of every request, which would cost more than the request."""
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.reply(200, {'status' : 'ok'})
+        elif self.path == '/stats':
+            self.reply(200, self.server.service.stats())
+        else:
+            self.reply(404, {'error' : f"Unknown path {self.path}."})
+
+    def do_POST(self):
+        start = time.perf_counter_ns()
+        endpoint = self.path.strip('/')
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            jobs = body['jobs'] if isinstance(body, dict) and 'jobs' in body else [body]
+            futures = [self.server.service.submit(endpoint, job) for job in jobs]
+            results = [future.result(timeout=self.server.service.timeout) for future in futures]
+        except Overloaded as error:
+            self.server.service.rejected += 1
+            self.reply(503, {'error' : str(error)}, {'Retry-After' : '1'})
+            return
+        except (ValueError, KeyError, TypeError) as error:
+            self.reply(400, {'error' : f"Bad request: {error}"})
+            return
+        except Exception as error:
+            self.reply(500, {'error' : f"{type(error).__name__}: {error}"})
+            return
+        self.reply(200, results[0] if len(jobs) == 1 and 'jobs' not in body else {'results' : results})
+        self.server.service.profiler.record(endpoint, start, time.perf_counter_ns())
+
+    def reply(self, status, content, headers=None):
+        data = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+class Server(ThreadingHTTPServer):
+    """A ThreadingHTTPServer with room for many clients connecting at once."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+class Service:
+    """
+    A class serving Model solves and Plotter fits over HTTP on the local
+    machine, with the requests of all connections coalesced by a Batcher.
+
+    Attributes
+    ----------
+    address : tuple
+        host and port the service listens on
+    batcher : Batcher
+        coalesces the requests into batches
+    profiler : profiling.Profiler
+        latency of every answered request, by endpoint
+    rejected : int
+        number of requests turned away with 503 because the queue was full
+    timeout : float
+        seconds a request may wait for its result
+
+    Methods
+    -------
+    serve_forever():
+        answers requests until shutdown()
+    submit():
+        validates a job and queues it
+    stats():
+        returns latency percentiles and counters
+    """
+
+    def __init__(self, host='127.0.0.1', port=8765, workers=None, timeout=30, **batching):
+        """
+        Constructs all the necessary attributes for the Service object and
+        opens its socket.
+
+        Parameters
+        ----------
+            host : str
+                address to listen on, the local machine by default
+            port : int
+                port to listen on, 0 for any free port
+            workers : int
+                number of processes computing batches
+            timeout : float
+                seconds a request may wait for its result
+            batching : dict
+                max_batch, max_wait, max_pending and max_inflight of the Batcher
+        """
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.batcher = Batcher(self.executor, **batching)
+        self.profiler = profiling.Profiler(enabled=True, window=10000)
+        self.rejected = 0
+        self.timeout = timeout
+        self.server = Server((host, port), Handler)
+        self.server.service = self
+        self.address = self.server.server_address
+
+    def serve_forever(self):
+        """Answers requests until shutdown() is called from another thread."""
+        self.server.serve_forever()
+
+    def shutdown(self):
+        """Stops answering requests and stops the batcher and the process pool."""
+        self.server.shutdown()
+        self.server.server_close()
+        self.batcher.close()
+        self.executor.shutdown()
+
+    def submit(self, endpoint, job):
+        """
+        Validates one job and queues it with the batcher.
+
+        Parameters
+        ----------
+            endpoint : str
+                'solve' or 'fit'
+            job : dict
+                parameters of SOLVE_FIELDS, with optional horizon and resolution
+                in hours, for 'solve'; t and data lists for 'fit'
+
+        Returns
+        -------
+            Future : set to the result of the job
+        """
+        if not isinstance(job, dict):
+            raise ValueError("Every job must be a JSON object.")
+        if endpoint == 'solve':
+            params = {}
+            for name, default in SOLVE_FIELDS.items():
+                if default is None and name not in job:
+                    raise KeyError(name)
+                params[name] = float(job.get(name, default))
+            horizon, resolution = float(job.get('horizon', 24)), float(job.get('resolution', 1))
+            # validated here, so a bad job cannot fail the batch it would join
+            if model.time_points(horizon, resolution).size > 100000:
+                raise ValueError("A solve may have at most 100000 time points.")
+            return self.batcher.submit('solve', (horizon, resolution), params)
+        if endpoint == 'fit':
+            t = np.asarray(job['t'], dtype=float)
+            data = np.asarray(job['data'], dtype=float)
+            if t.ndim != 1 or t.shape != data.shape:
+                raise ValueError("t and data must be lists of the same length.")
+            return self.batcher.submit('fit', (), (t, data))
+        raise ValueError(f"Unknown endpoint /{endpoint}, expected /solve or /fit.")
+
+    def stats(self):
+        """
+        Returns the latency percentiles of every endpoint in milliseconds,
+        the number of waiting requests, batches and rejected requests.
+
+        Returns
+        -------
+            dict : statistics of the service
+        """
+        return {
+            'latency_ms' : {name : {key : float(value) for key, value in stats.items()}
+                            for name, stats in self.profiler.stats().items()},
+            'pending' : self.batcher.pending(),
+            'batches' : self.batcher.batches,
+            'mean_batch' : self.batcher.batched / max(self.batcher.batches, 1),
+            'rejected' : self.rejected
+        }
+
+def load_test(address, requests, clients=32):
+    """
+    Sends small solve requests from many threads, each over its own
+    keep-alive connection, and prints the throughput and latencies.
+
+    Returns
+    -------
+        dict : requests per second, count of every status and latency percentiles in milliseconds
+    """
+    import http.client
+
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def client(count, seed):
+        rng = np.random.default_rng(seed)
+        connection = http.client.HTTPConnection(*address)
+        mine = []
+        for _ in range(count):
+            body = json.dumps({'growth_rate' : rng.uniform(0.3, 1.0), 'mic' : 1.0, 'conc' : rng.uniform(0, 2)})
+            start = time.perf_counter()
+            connection.request('POST', '/solve', body, {'Content-Type' : 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            mine.append(time.perf_counter() - start)
+            with lock:
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+        connection.close()
+        with lock:
+            latencies.extend(mine)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(requests // clients + (i < requests % clients), i))
+               for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {'per_second' : requests / elapsed, 'statuses' : statuses, 'p50' : p50, 'p95' : p95, 'p99' : p99}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON service for biofilm solves and fits.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help="number of processes")
+    parser.add_argument('--max-batch', type=int, default=512, help="largest batch, default 512")
+    parser.add_argument('--max-wait-ms', type=float, default=2, help="wait for more requests, default 2 ms")
+    parser.add_argument('--max-pending', type=int, default=20000,
+                        help="waiting requests before answering 503, default 20000")
+    parser.add_argument('--load-test', type=int, metavar='N', help="send N requests to the service and exit")
+    parser.add_argument('--clients', type=int, default=32, help="concurrent clients of the load test")
+    args = parser.parse_args(argv)
+
+    service = Service(args.host, 0 if args.load_test else args.port, args.workers, max_batch=args.max_batch,
+                      max_wait=args.max_wait_ms / 1000, max_pending=args.max_pending)
+    if not args.load_test:
+        print(f"Serving on http://{service.address[0]}:{service.address[1]}", file=sys.stderr)
+        try:
+            service.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        service.shutdown()
+        return 0
+
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    result = load_test(service.address, args.load_test, args.clients)
+    stats = service.stats()
+    service.shutdown()
+    print(f"{args.load_test} requests, {result['per_second']:.0f} per second, statuses {result['statuses']}, "
+          f"client latency p50 {result['p50']:.1f} ms, p95 {result['p95']:.1f} ms, p99 {result['p99']:.1f} ms, "
+          f"mean batch {stats['mean_batch']:.1f}", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
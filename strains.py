@@ -0,0 +1,305 @@
+# strains.py
+
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+class Strain:
+    """
+    The record of one strain in a StrainRegistry. Its data are not kept in
+    the record but in a float array of the registry, at offset: the time
+    points followed by the OD values.
+
+    Attributes
+    ----------
+    name : str
+        name of the strain
+    index : int
+        position of the strain in the growth rate array of the registry
+    store : int
+        which array of the registry holds the data, 0 for its own buffer
+    offset : int
+        position of the first time point in that array
+    length : int
+        number of time points
+    """
+
+    __slots__ = ('name', 'index', 'store', 'offset', 'length')
+
+    def __init__(self, name, index, store, offset, length):
+        self.name = name
+        self.index = index
+        self.store = store
+        self.offset = offset
+        self.length = length
+
+class StrainRegistry:
+    """
+    A class keeping the name, growth rate and data of every strain in the
+    App in a few contiguous arrays instead of dictionaries of lists.
+
+    The data of all strains are stored back to back in one float64 buffer,
+    which grows by doubling, and the growth rates in one float64 array, so a
+    strain costs one small Strain record plus its values. Strains of a
+    StrainLibrary are linked instead of copied, their data stay in the
+    memory-mapped library file until they are used. A strain added again
+    replaces the old one; its old values are left unused in the buffer and
+    dropped when more than half of the buffer is unused. The buffer is never
+    written where values were already stored, so the arrays returned by
+    series() stay valid after later additions.
+
+    Names are also kept sorted by their case-folded form, so all strains
+    starting with a prefix are found by bisection, e.g. for a search box.
+
+    Attributes
+    ----------
+    rates : array
+        growth rate of every strain, in the order the strains were first added
+    values : array
+        buffer holding the data of the strains that are not linked
+
+    Methods
+    -------
+    add():
+        adds or replaces a strain
+    extend():
+        adds or replaces many strains at once
+    link():
+        adds the strains of a StrainLibrary without reading their data
+    rate():
+        returns the growth rate of a strain
+    series():
+        returns the time points and OD values of a strain
+    search():
+        returns the names starting with a prefix
+    count():
+        returns the number of names starting with a prefix
+    """
+
+    def __init__(self, capacity=1024):
+        """
+        Constructs all the necessary attributes for the StrainRegistry object.
+
+        Parameters
+        ----------
+            capacity : int
+                number of values the buffer holds before it first grows
+        """
+        self.records = {}
+        self.rates = np.empty(16)
+        self.values = np.empty(capacity)
+        self.size = 0
+        self.unused = 0
+        # linked library files, store 0 is always the buffer above
+        self.stores = [self.values]
+        self._sorted = []
+        self._keys = []
+        self._unsorted = []
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, name):
+        return name in self.records
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def names(self):
+        """Returns the names of all strains, in the order they were first added."""
+        return list(self.records)
+
+    def rate(self, name):
+        """Returns the growth rate of a strain, raises KeyError for an unknown strain."""
+        return float(self.rates[self.records[name].index])
+
+    def set_rate(self, name, growth_rate):
+        """Changes the growth rate of a strain without changing its data."""
+        self.rates[self.records[name].index] = growth_rate
+
+    def growth_rates(self):
+        """Returns a dictionary of the growth rate of every strain, e.g. for sweep.Sweep."""
+        return {name : float(self.rates[record.index]) for name, record in self.records.items()}
+
+    def series(self, name):
+        """
+        Returns the data of a strain as read-only views of the array that
+        holds them. Later additions do not change the returned arrays.
+
+        Returns
+        -------
+            t : array
+                time points
+            y : array
+                OD values
+        """
+        record = self.records[name]
+        values = self.stores[record.store]
+        t = values[record.offset:record.offset + record.length]
+        y = values[record.offset + record.length:record.offset + 2 * record.length]
+        t.flags.writeable = y.flags.writeable = False
+        return t, y
+
+    def add(self, name, growth_rate, t, y):
+        """Adds a strain, or replaces the strain of the same name, see extend()."""
+        self.extend([(name, growth_rate, t, y)])
+
+    def extend(self, strains):
+        """
+        Adds strains, or replaces the strains of the same names, copying
+        their data into the buffer.
+
+        Parameters
+        ----------
+            strains : iterable
+                (name, growth_rate, t, y) for every strain, t and y of equal length
+        """
+        for name, growth_rate, t, y in strains:
+            t = np.asarray(t, dtype=float).ravel()
+            y = np.asarray(y, dtype=float).ravel()
+            if t.shape != y.shape:
+                raise ValueError(f"Time points and data of {name} differ in length.")
+            offset = self.reserve(2 * t.size)
+            self.values[offset:offset + t.size] = t
+            self.values[offset + t.size:offset + 2 * t.size] = y
+            self.size += 2 * t.size
+            self.store(name, growth_rate, 0, offset, t.size)
+
+    def link(self, library):
+        """
+        Adds the strains of a StrainLibrary, pointing at their data in the
+        memory-mapped library file instead of copying them.
+
+        Parameters
+        ----------
+            library : library.StrainLibrary
+                an open strain library
+        """
+        self.stores.append(library.values)
+        store = len(self.stores) - 1
+        records = library.records
+        for name, i in library.index.items():
+            record = records[i]
+            self.store(name, record['growth_rate'], store, int(record['offset']), int(record['length']))
+
+    def store(self, name, growth_rate, store, offset, length):
+        """Writes the record of a strain, adding it to the name index if it is new."""
+        record = self.records.get(name)
+        if record is None:
+            index = len(self.records)
+            if index == self.rates.size:
+                self.rates = np.resize(self.rates, 2 * self.rates.size)
+            self.records[name] = Strain(name, index, store, offset, length)
+            self._unsorted.append(name)
+        else:
+            if record.store == 0:
+                self.unused += 2 * record.length
+            record.store, record.offset, record.length = store, offset, length
+            index = record.index
+        self.rates[index] = growth_rate
+
+    def reserve(self, count):
+        """
+        Makes room for count more values at the end of the buffer, dropping
+        unused values or doubling the buffer if needed.
+
+        Returns
+        -------
+            int : offset of the room in the buffer
+        """
+        if self.size + count <= self.values.size:
+            return self.size
+        used = self.size - self.unused
+        if self.unused > used:
+            # copy the values still in use into a new buffer, the old one may be shared by series()
+            values = np.empty(max(2 * (used + count), self.values.size // 2))
+            size = 0
+            for record in self.records.values():
+                if record.store == 0:
+                    n = 2 * record.length
+                    values[size:size + n] = self.values[record.offset:record.offset + n]
+                    record.offset = size
+                    size += n
+            self.size, self.unused = size, 0
+        else:
+            values = np.empty(max(2 * self.values.size, self.size + count))
+            values[:self.size] = self.values[:self.size]
+        self.values = self.stores[0] = values
+        return self.size
+
+    def nbytes(self):
+        """Returns the memory held by the arrays of the registry, without linked library files."""
+        return self.values.nbytes + self.rates.nbytes
+
+    def sort(self):
+        """Adds the names added since the last search to the sorted name index."""
+        if not self._unsorted:
+            return
+        # the old names are one sorted run, which list.sort merges in linear time
+        pairs = list(zip(self._keys, self._sorted))
+        pairs += ((name.casefold(), name) for name in self._unsorted)
+        pairs.sort()
+        self._keys = [key for key, _ in pairs]
+        self._sorted = [name for _, name in pairs]
+        self._unsorted = []
+
+    def bounds(self, prefix):
+        """Returns the first and last position in the sorted names of the names starting with prefix."""
+        self.sort()
+        prefix = prefix.casefold()
+        low = bisect_left(self._keys, prefix)
+        high = bisect_right(self._keys, prefix + '\U0010ffff', low) if prefix else len(self._keys)
+        return low, high
+
+    def count(self, prefix=''):
+        """Returns the number of names starting with prefix, ignoring case."""
+        low, high = self.bounds(prefix)
+        return high - low
+
+    def search(self, prefix='', start=0, limit=None):
+        """
+        Returns the names starting with prefix, ignoring case, in
+        alphabetical order. With start and limit only a window of them is
+        returned, e.g. the rows of a list that are visible.
+
+        Parameters
+        ----------
+            prefix : str
+                beginning of the names, every name if empty
+            start : int
+                number of matching names to skip
+            limit : int
+                largest number of names returned, all if None
+
+        Returns
+        -------
+            list : matching names
+        """
+        low, high = self.bounds(prefix)
+        low = min(low + start, high)
+        if limit is not None:
+            high = min(high, low + limit)
+        return self._sorted[low:high]
+
+if __name__ == '__main__':
+    import time
+    import tracemalloc
+    rng = np.random.default_rng(0)
+    t = np.arange(97) / 4
+    plates = [(f"plate{p:03d} {row}{column}", rng.uniform(0.2, 1.0), t, rng.uniform(0, 2, t.size))
+              for p in range(100) for row in 'ABCDEFGH' for column in range(1, 13)]
+    tracemalloc.start()
+    start = time.perf_counter()
+    registry = StrainRegistry()
+    registry.extend(plates)
+    added = time.perf_counter() - start
+    start = time.perf_counter()
+    matches = registry.search('PLATE042 a', limit=20)
+    searched = time.perf_counter() - start
+    start = time.perf_counter()
+    matches = registry.search('plate05', start=30, limit=20)
+    searched_again = time.perf_counter() - start
+    print(f"{len(registry)} strains added in {added * 1000:.1f} ms, {registry.nbytes() / 2**20:.1f} MB of arrays, "
+          f"{tracemalloc.get_traced_memory()[0] / 2**20:.1f} MB in total")
+    print(f"first search {searched * 1000:.2f} ms, later searches {searched_again * 1000:.3f} ms, "
+          f"{registry.count('plate05')} matches of plate05")
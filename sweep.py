@@ -0,0 +1,208 @@
+# sweep.py
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+
+import numpy as np
+
+import model
+
+METRICS = {
+    'final' : 'Biofilm at 24 h (OD)',
+    't_half' : 'Time to half of max (hours)',
+    'auc' : 'Area under curve (OD hours)'
+}
+
+def sweep_metrics(t, growthrate, initcond, maxvalue, mics, concs):
+    """
+    Reduces the biofilm growth curve for every combination of concentration
+    and MIC to summary metrics. Runs in the worker processes of a Sweep.
+
+    Parameters
+    ----------
+        t : array
+            time points the growth curves are evaluated at
+        growthrate : float
+            growth rate of the bacteria
+        initcond : float
+            initial amount of biofilm
+        maxvalue : float
+            maximum amount of biofilm that can be reached
+        mics : array
+            minimum inhibitory concentrations, the columns of the grid
+        concs : array
+            antibiotic concentrations, the rows of the grid
+
+    Returns
+    -------
+        array : metrics with shape (len(METRICS), len(concs), len(mics)), in
+        the order of METRICS. The time to half of B_max is nan if it is not
+        reached within the time span.
+    """
+    mics = np.asarray(mics, dtype=float)[None, :, None]
+    concs = np.asarray(concs, dtype=float)[:, None, None]
+    theta = np.divide(growthrate, mics, out=np.zeros_like(mics), where=mics != 0)
+    y = model.logistic_solution(t, growthrate, initcond, maxvalue, theta, concs)
+
+    final = y[..., -1]
+    auc = np.sum((y[..., 1:] + y[..., :-1]) * np.diff(t) / 2, axis=-1)
+
+    # first crossing of B_max / 2, linearly interpolated between time points
+    half = maxvalue / 2
+    above = y >= half
+    reached = above.any(axis=-1)
+    i = np.argmax(above, axis=-1)
+    before = np.maximum(i - 1, 0)
+    y0 = np.take_along_axis(y, before[..., None], axis=-1)[..., 0]
+    y1 = np.take_along_axis(y, i[..., None], axis=-1)[..., 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frac = np.where(y1 > y0, (half - y0) / (y1 - y0), 0.0)
+    t_half = np.where(i == 0, t[0], t[before] + frac * (t[i] - t[before]))
+    t_half = np.where(reached, t_half, np.nan)
+
+    return np.stack([final, t_half, auc])
+
+class Sweep:
+    """
+    A class for studying the effect of antibiotics on biofilm growth over a
+    grid of concentrations and MICs, for one or more bacteria.
+
+    The grid is split into chunks of rows which are evaluated in a process
+    pool, so results can be shown while the remaining chunks are computed.
+
+    Attributes
+    ----------
+    t : array
+        time points the growth curves are evaluated at
+    growth_rates : dict
+        growth rate of every bacteria in the sweep
+    concs : array
+        antibiotic concentrations, the rows of the grid
+    mics : array
+        minimum inhibitory concentrations, the columns of the grid
+    B_0 : float
+        initial amount of biofilm
+    B_max : float
+        maximum amount of biofilm that can grow
+    results : dict
+        array of shape (len(concs), len(mics)) for every bacteria and metric,
+        results[bacteria][metric], nan until the chunk is computed
+
+    Methods
+    -------
+    run():
+        computes the grid, yielding chunks as they finish
+    figure():
+        creates a figure with a heatmap of one metric
+    """
+
+    def __init__(self, growth_rates, concs, mics, initcond=0.002, maxvalue=1.75, points=241):
+        """
+        Constructs all the necessary attributes for the Sweep object.
+
+        Parameters
+        ----------
+            growth_rates : dict
+                maps the name of each bacteria to its growth rate
+            concs : array_like
+                antibiotic concentrations, expressed in micrograms per ml
+            mics : array_like
+                minimum inhibitory concentrations, expressed in micrograms per ml
+            initcond : float
+                initial amount of biofilm
+            maxvalue : float
+                maximum amount of biofilm that can be reached
+            points : int
+                number of time points between 0 and 24 hours
+        """
+        self.t = np.linspace(0, 24, points)
+        self.growth_rates = dict(growth_rates)
+        self.concs = np.asarray(concs, dtype=float)
+        self.mics = np.asarray(mics, dtype=float)
+        self.B_0 = initcond
+        self.B_max = maxvalue
+        self.results = {
+            bacteria : {metric : np.full((self.concs.size, self.mics.size), np.nan) for metric in METRICS}
+            for bacteria in self.growth_rates
+        }
+
+    def chunks(self, n_chunks):
+        """
+        Splits the grid into about n_chunks pieces of whole rows.
+
+        Returns
+        -------
+            list : (bacteria, row slice) for every chunk
+        """
+        per_strain = max(1, -(-n_chunks // max(1, len(self.growth_rates))))
+        rows = max(1, -(-self.concs.size // per_strain))
+        return [(bacteria, slice(start, start + rows))
+                for bacteria in self.growth_rates
+                for start in range(0, self.concs.size, rows)]
+
+    def submit(self, executor, n_chunks=None):
+        """
+        Submits every chunk of the grid to an executor.
+
+        Returns
+        -------
+            dict : maps each future to its (bacteria, row slice)
+        """
+        if n_chunks is None:
+            n_chunks = 4 * (os.cpu_count() or 1)
+        futures = {}
+        for bacteria, rows in self.chunks(n_chunks):
+            future = executor.submit(sweep_metrics, self.t, self.growth_rates[bacteria],
+                                     self.B_0, self.B_max, self.mics, self.concs[rows])
+            futures[future] = (bacteria, rows)
+        return futures
+
+    def store(self, bacteria, rows, block):
+        """Copies the metrics computed for one chunk into the results."""
+        for metric, values in zip(METRICS, block):
+            self.results[bacteria][metric][rows] = values
+
+    def run(self, max_workers=None, n_chunks=None):
+        """
+        Computes the whole grid in a process pool.
+
+        Yields
+        ------
+            (bacteria, rows) : the bacteria and row slice of each chunk as it
+            finishes, after its metrics have been stored in the results
+        """
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = self.submit(executor, n_chunks)
+            for future in as_completed(futures):
+                bacteria, rows = futures[future]
+                self.store(bacteria, rows, future.result())
+                yield bacteria, rows
+
+    def figure(self, bacteria, metric='final'):
+        """
+        Creates a matplotlib Figure, which contains a heatmap of one metric
+        over the grid of concentrations and MICs.
+
+        Returns
+        -------
+            figure (Figure) : heatmap of the metric
+        """
+        # imported here so solving and fitting work without matplotlib
+        from matplotlib.figure import Figure
+
+        figure = Figure(figsize=(5, 4), dpi=100)
+        ax = figure.add_subplot(111)
+        image = ax.imshow(self.results[bacteria][metric], origin='lower', aspect='auto',
+                          extent=(self.mics[0], self.mics[-1], self.concs[0], self.concs[-1]))
+        figure.colorbar(image, ax=ax, label=METRICS[metric])
+        ax.set_xlabel('Antibiotic MIC (µg/ml)')
+        ax.set_ylabel('Antibiotic conc (µg/ml)')
+        return figure
+
+if __name__ == '__main__':
+    import time
+    s = Sweep({'P. aeruginosa' : 0.957}, np.linspace(0, 10, 200), np.linspace(0, 10, 200))
+    start = time.perf_counter()
+    for _ in s.run():
+        pass
+    print(f"{s.concs.size * s.mics.size} combinations in {time.perf_counter() - start:.3f} s")
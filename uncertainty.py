@@ -0,0 +1,215 @@
+# uncertainty.py
+
+import numpy as np
+
+import model
+
+class QuantileSketch:
+    """
+    A class for estimating quantiles of many variables at once from a stream
+    of samples, in memory that does not grow with the number of samples.
+
+    Every variable keeps a histogram over the same log-spaced bins, so the
+    quantiles are found to within the relative width of one bin. Values at
+    or below the lowest edge, including 0, fall in the first bin.
+
+    Attributes
+    ----------
+    edges : array
+        bin edges, edges[0] is 0
+    counts : array
+        number of samples per variable and bin
+    total : int
+        number of samples added
+
+    Methods
+    -------
+    add():
+        adds a batch of samples
+    quantiles():
+        returns the estimated quantiles of every variable
+    """
+
+    def __init__(self, n_vars, low=1e-9, high=1e3, bins=4096):
+        """
+        Constructs all the necessary attributes for the QuantileSketch object.
+
+        Parameters
+        ----------
+            n_vars : int
+                number of variables, e.g. time points of a growth curve
+            low : float
+                smallest value resolved, smaller values are counted in the first bin
+            high : float
+                largest value resolved, larger values are counted in the last bin
+            bins : int
+                number of bins, the relative resolution is (high / low)^(1 / bins)
+        """
+        self.edges = np.concatenate([[0.0], np.geomspace(low, high, bins)])
+        self.counts = np.zeros((n_vars, bins), dtype=np.int64)
+        self.total = 0
+
+    def add(self, values):
+        """
+        Adds a batch of samples.
+
+        Parameters
+        ----------
+            values : array
+                one row per sample, one column per variable
+        """
+        values = np.atleast_2d(values)
+        n_vars, bins = self.counts.shape
+        index = np.clip(np.searchsorted(self.edges, values, side='right') - 1, 0, bins - 1)
+        index += np.arange(n_vars) * bins
+        self.counts += np.bincount(index.ravel(), minlength=n_vars * bins).reshape(n_vars, bins)
+        self.total += values.shape[0]
+
+    def quantiles(self, q):
+        """
+        Returns the estimated quantiles of every variable, interpolating
+        geometrically inside the bin that contains each quantile.
+
+        Parameters
+        ----------
+            q : array_like
+                quantiles between 0 and 1
+
+        Returns
+        -------
+            array : one row per quantile, one column per variable
+        """
+        q = np.asarray(q, dtype=float)
+        cdf = np.cumsum(self.counts, axis=1)
+        target = q[:, None, None] * self.total
+        index = np.argmax(cdf[None] >= np.maximum(target, 1e-12), axis=2)
+        rows = np.arange(self.counts.shape[0])
+        below = np.where(index > 0, cdf[rows, index - 1], 0)
+        inside = np.maximum(self.counts[rows, index], 1)
+        fraction = np.clip((target[..., 0] - below) / inside, 0, 1)
+        lower, upper = self.edges[index], self.edges[np.minimum(index + 1, len(self.edges) - 1)]
+        return np.where(lower > 0, lower * (upper / np.where(lower > 0, lower, 1)) ** fraction,
+                        upper * fraction)
+
+class Uncertainty:
+    """
+    A class for propagating the uncertainty of a fitted growth rate, and
+    optionally of the initial and maximum amount of biofilm, to the biofilm
+    growth curve of Model by Monte Carlo sampling.
+
+    The samples are solved in batches with the analytic solver of
+    model.Ensemble, and every batch is folded into a QuantileSketch, so the
+    memory needed does not depend on the number of samples.
+
+    Attributes
+    ----------
+    t : array
+        time points
+    percentiles : array
+        percentiles of the bands, e.g. 2.5 and 97.5 for a 95% band
+    bands : array
+        biofilm at every percentile, one row per percentile and one column per time point
+    median : array
+        median biofilm at every time point
+
+    Methods
+    -------
+    figure():
+        creates a figure plotting the median and the bands
+    """
+
+    def __init__(self, growthrate, stderr, initcond, maxvalue, abx_mic, abx_conc,
+                 initcond_sd=0.0, maxvalue_sd=0.0, samples=10000, batch=2000,
+                 percentiles=(2.5, 25, 75, 97.5), seed=None, horizon=24, resolution=1):
+        """
+        Constructs all the necessary attributes for the Uncertainty object
+        and computes the bands.
+
+        Parameters
+        ----------
+            growthrate : float
+                fitted growth rate of bacteria
+            stderr : float
+                standard error of the growth rate, e.g. from Plotter.stderr()
+            initcond : float
+                initial amount of biofilm
+            maxvalue : float
+                maximum amount of biofilm that can be reached
+            abx_mic : float
+                minimum inhibitory concentration of antibiotic, in micrograms per ml
+            abx_conc : float
+                concentration of antibiotic, in micrograms per ml
+            initcond_sd : float
+                standard deviation of the initial amount of biofilm, 0 to keep it fixed
+            maxvalue_sd : float
+                standard deviation of the maximum amount of biofilm, 0 to keep it fixed
+            samples : int
+                number of Monte Carlo samples, at least 1
+            batch : int
+                number of samples solved at once
+            percentiles : tuple
+                percentiles of the bands
+            seed : int
+                seed of the random number generator
+            horizon : float
+                length of the simulation in hours
+            resolution : float
+                time between the points of the bands in hours
+        """
+        rng = np.random.default_rng(seed)
+        # growth rates from Plotter.fit() are arrays of one value
+        growthrate = np.asarray(growthrate, dtype=float).item()
+        self.percentiles = np.asarray(percentiles, dtype=float)
+
+        # normal samples, truncated at 0 since none of the parameters can be negative
+        def sample(mean, sd, n):
+            if sd == 0:
+                return np.full(n, float(mean))
+            return np.abs(rng.normal(mean, sd, n))
+
+        sketch = None
+        for start in range(0, samples, batch):
+            n = min(batch, samples - start)
+            ensemble = model.Ensemble(sample(growthrate, stderr, n), sample(initcond, initcond_sd, n),
+                                      sample(maxvalue, maxvalue_sd, n), abx_mic, abx_conc, solver='analytic',
+                                      horizon=horizon, resolution=resolution)
+            if sketch is None:
+                self.t = ensemble.t
+                sketch = QuantileSketch(self.t.size, high=10 * max(maxvalue + 5 * maxvalue_sd, initcond))
+            sketch.add(ensemble.y)
+
+        self.samples = samples
+        quantiles = sketch.quantiles(np.concatenate([self.percentiles, [50.0]]) / 100)
+        self.bands, self.median = quantiles[:-1], quantiles[-1]
+
+    def band_pairs(self):
+        """
+        Pairs the bands from the outside in, e.g. (2.5, 97.5) and (25, 75).
+
+        Returns
+        -------
+            list : (lower, upper) arrays of every band
+        """
+        n = len(self.bands)
+        return [(self.bands[i], self.bands[n - 1 - i]) for i in range(n // 2)]
+
+    def figure(self):
+        """
+        Creates a matplotlib Figure, which contains the median biofilm growth
+        and the percentile bands versus time.
+
+        Returns
+        -------
+            figure (Figure) : plot of biofilm growth with uncertainty bands
+        """
+        # imported here so solving works without matplotlib
+        from matplotlib.figure import Figure
+
+        figure = Figure(figsize=(5, 4), dpi=100)
+        ax = figure.add_subplot(111)
+        ax.plot(self.t, self.median)
+        for lower, upper in self.band_pairs():
+            ax.fill_between(self.t, lower, upper, alpha=0.2, color='C0', linewidth=0)
+        ax.set_xlabel('Time (hours)')
+        ax.set_ylabel('Biofilm (OD)')
+        return figure
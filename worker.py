@@ -0,0 +1,167 @@
+# worker.py
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import numpy as np
+
+class Worker:
+    """
+    A class that runs Model solves and Plotter fits in background threads,
+    and hands their results back to the Tk main thread with after().
+
+    Requests are grouped in channels, e.g. one per plot. Every request gets
+    the next generation number of its channel, and only the result of the
+    newest generation is passed to its callback; superseded requests are
+    cancelled if they have not started, and their results dropped otherwise.
+
+    Attributes
+    ----------
+    widget : tkinter widget
+        widget whose after() is used to poll for finished requests
+    poll_ms : int
+        milliseconds between polls while requests are running
+    generations : dict
+        newest generation number of every channel
+    dropped : int
+        number of superseded requests that were cancelled or not rendered
+    latencies : deque
+        seconds from submitting to handing back the most recent requests
+    lags : deque
+        seconds that recent polls ran late, i.e. how long the main thread
+        was blocked while requests were running
+
+    Methods
+    -------
+    submit():
+        runs a computation in the background
+    busy():
+        checks whether any request is running
+    stats():
+        returns latency percentiles and counters
+    """
+
+    def __init__(self, widget, poll_ms=10, max_workers=2, on_busy=None, history=1000):
+        """
+        Constructs all the necessary attributes for the Worker object.
+
+        Parameters
+        ----------
+            widget : tkinter widget
+                widget whose after() is used to poll for finished requests
+            poll_ms : int
+                milliseconds between polls while requests are running
+            max_workers : int
+                number of background threads
+            on_busy : callable
+                called with True when the first request starts running and
+                with False when the last one finishes, e.g. to show a busy indicator
+            history : int
+                number of latencies kept for stats()
+        """
+        self.widget = widget
+        self.poll_ms = poll_ms
+        self.on_busy = on_busy
+        self.generations = {}
+        self.dropped = 0
+        self.latencies = deque(maxlen=history)
+        self.lags = deque(maxlen=history)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._pending = {}
+        self._polling = False
+
+    def submit(self, channel, compute, callback, errback=None):
+        """
+        Runs compute() in a background thread. When it finishes and no newer
+        request was submitted to the channel, callback(result) is called on
+        the main thread, or errback(exception) if compute() raised one.
+
+        Parameters
+        ----------
+            channel : str
+                name of the group of requests that supersede each other
+            compute : callable
+                takes no arguments, must not touch Tk or matplotlib
+            callback : callable
+                takes the result of compute()
+            errback : callable
+                takes the exception raised by compute(), by default it is raised on the main thread
+
+        Returns
+        -------
+            int : generation number of the request
+        """
+        generation = self.generations.get(channel, 0) + 1
+        self.generations[channel] = generation
+
+        # cancel the superseded request of this channel if it has not started
+        for future, (other, _, _, _, _) in list(self._pending.items()):
+            if other == channel and future.cancel():
+                del self._pending[future]
+                self.dropped += 1
+
+        future = self._executor.submit(compute)
+        self._pending[future] = (channel, generation, callback, errback, time.perf_counter())
+        if not self._polling:
+            self._polling = True
+            if self.on_busy is not None:
+                self.on_busy(True)
+            self._schedule()
+        return generation
+
+    def busy(self):
+        """Checks whether any request is still running."""
+        return bool(self._pending)
+
+    def _schedule(self):
+        self._expected = time.perf_counter() + self.poll_ms / 1000
+        self.widget.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        """Hands back finished requests on the main thread and polls again while any are running."""
+        now = time.perf_counter()
+        self.lags.append(max(0.0, now - self._expected))
+
+        for future in [future for future in self._pending if future.done()]:
+            channel, generation, callback, errback, submitted = self._pending.pop(future)
+            if generation != self.generations[channel]:
+                self.dropped += 1
+                continue
+            error = future.exception()
+            if error is None:
+                callback(future.result())
+            elif errback is not None:
+                errback(error)
+            else:
+                raise error
+            self.latencies.append(time.perf_counter() - submitted)
+
+        if self._pending:
+            self._schedule()
+        else:
+            self._polling = False
+            if self.on_busy is not None:
+                self.on_busy(False)
+
+    def stats(self):
+        """
+        Returns percentiles of the recent latencies and UI lags, in
+        milliseconds, and the number of dropped requests.
+
+        Returns
+        -------
+            dict : latency_p50, latency_p95, lag_p50, lag_p95, lag_max and dropped
+        """
+        result = {'dropped' : self.dropped}
+        for name, values in (('latency', self.latencies), ('lag', self.lags)):
+            values = np.asarray(values) * 1000 if values else np.zeros(1)
+            result[name + '_p50'] = float(np.percentile(values, 50))
+            result[name + '_p95'] = float(np.percentile(values, 95))
+        result['lag_max'] = float(max(self.lags, default=0.0) * 1000)
+        return result
+
+    def shutdown(self):
+        """Stops the background threads, dropping requests that have not started."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._pending.clear()